@@ -0,0 +1,169 @@
+"""
+benchmarks.cpu_inference
+
+Measures the generation throughput and peak memory of the local model for
+each CPU inference configuration. Every configuration runs in its own
+process, so peak RSS is not shared between them.
+
+Usage:
+    python -m benchmarks.cpu_inference --model ./.models/tiny-gpt2 --threads 4
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from dataclasses import asdict
+from typing import List, Optional
+
+from evolving_ideas.infra.inference import InferenceOptions
+from evolving_ideas.settings import settings
+
+CONFIGURATIONS = {
+    "fp32": {},
+    "bf16": {"dtype": "bfloat16"},
+    "int8": {"quantize": True},
+    "onnx": {"runtime": "onnx"},
+    "onnx-int8": {"runtime": "onnx", "quantize": True},
+}
+
+PROMPT = "Help the user rethink the following task with the SCAMPER technique:"
+
+
+def peak_rss() -> Optional[int]:
+    """
+    The peak resident memory of this process.
+
+    :return: The peak RSS in bytes, or None where it cannot be measured.
+    :rtype: Optional[int]
+    """
+    try:
+        import resource  # pylint: disable=import-outside-toplevel
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def measure(model: str, options: InferenceOptions, prompts: int, tokens: int) -> dict:
+    """
+    Load the model with some inference options and time a batch of
+    generations of a fixed length.
+
+    :param model: The model name or local directory.
+    :type model: str
+
+    :param options: The inference options.
+    :type options: InferenceOptions
+
+    :param prompts: The number of prompts generated together.
+    :type prompts: int
+
+    :param tokens: The number of tokens generated per prompt.
+    :type tokens: int
+
+    :return: The load time, tokens per second and peak RSS.
+    :rtype: dict
+    """
+    # pylint: disable=import-outside-toplevel
+    from evolving_ideas.infra.local_llm_client import LocalLLM
+
+    started = time.perf_counter()
+    llm = LocalLLM(model, batch_size=prompts, prefix_cache_bytes=0, inference=options)
+    load_seconds = time.perf_counter() - started
+    # Every prompt generates exactly ``tokens`` tokens.
+    llm.generation_params.update(min_new_tokens=tokens, do_sample=False)
+    params = {"max_tokens": tokens, "sample": False}
+    llm.ask(PROMPT, "warm up", params)
+    started = time.perf_counter()
+    llm.ask_many(
+        [f"{PROMPT} idea {i}" for i in range(prompts)], ["context"] * prompts, params
+    )
+    elapsed = time.perf_counter() - started
+    return {
+        "load_seconds": load_seconds,
+        "tokens_per_second": prompts * tokens / elapsed,
+        "peak_rss": peak_rss(),
+    }
+
+
+def run(name: str, args: argparse.Namespace) -> dict:
+    """
+    Measure a configuration in a new process.
+
+    :param name: The name of the configuration.
+    :type name: str
+
+    :param args: The command line arguments.
+    :type args: argparse.Namespace
+
+    :return: The measurement, or the error that prevented it.
+    :rtype: dict
+    """
+    command = [
+        sys.executable,
+        "-m",
+        "benchmarks.cpu_inference",
+        "--model",
+        args.model,
+        "--prompts",
+        str(args.prompts),
+        "--tokens",
+        str(args.tokens),
+        "--measure",
+        name,
+    ]
+    if args.threads:
+        command += ["--threads", str(args.threads)]
+    process = subprocess.run(command, capture_output=True, text=True, check=False)
+    lines = process.stdout.strip().splitlines()
+    if process.returncode or not lines:
+        error = process.stderr.strip().splitlines()
+        return {"error": error[-1] if error else f"exit code {process.returncode}"}
+    return json.loads(lines[-1])
+
+
+def report(results: dict):
+    print(f"{'configuration':<12} {'load s':>8} {'tokens/s':>10} {'peak RSS':>10}")
+    for name, result in results.items():
+        if "error" in result:
+            print(f"{name:<12} {result['error']}")
+            continue
+        rss = result["peak_rss"]
+        rss = f"{rss / 1024 ** 2:.0f} MiB" if rss is not None else "n/a"
+        print(
+            f"{name:<12} {result['load_seconds']:>8.2f} "
+            f"{result['tokens_per_second']:>10.1f} {rss:>10}"
+        )
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--model", default=settings.get("llm.path"), help="Model name or directory"
+    )
+    parser.add_argument(
+        "--configurations",
+        nargs="+",
+        default=list(CONFIGURATIONS),
+        choices=CONFIGURATIONS,
+        help="Configurations to compare",
+    )
+    parser.add_argument("--threads", type=int, help="Torch/ONNX Runtime threads")
+    parser.add_argument("--prompts", type=int, default=4, help="Prompts per batch")
+    parser.add_argument("--tokens", type=int, default=64, help="Tokens per prompt")
+    parser.add_argument("--measure", choices=CONFIGURATIONS, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.measure:
+        options = InferenceOptions(threads=args.threads, **CONFIGURATIONS[args.measure])
+        result = measure(args.model, options, args.prompts, args.tokens)
+        print(json.dumps({**result, "options": asdict(options)}))
+        return
+    report({name: run(name, args) for name in args.configurations})
+
+
+if __name__ == "__main__":
+    main()
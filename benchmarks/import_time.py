@@ -0,0 +1,125 @@
+"""
+benchmarks.import_time
+
+Measures how long importing the CLI and running a lightweight command take
+in a fresh interpreter, and which heavy modules the import pulls in.
+
+Usage:
+    python -m benchmarks.import_time --check
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Modules that must only be imported once a command actually needs an LLM.
+HEAVY_MODULES = ("transformers", "torch", "openai")
+
+# Wall time for importing the CLI. Lazy backend imports keep this around
+# 0.15s on CPython 3.11; importing transformers and torch eagerly takes
+# several seconds.
+IMPORT_BUDGET_SECONDS = 1.5
+
+# Wall time for a lightweight command, interpreter startup included.
+COMMAND_BUDGET_SECONDS = 3.0
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import evolving_ideas.cli
+elapsed = time.perf_counter() - start
+print(json.dumps({"elapsed": elapsed, "modules": sorted(sys.modules)}))
+"""
+
+
+def run_python(args: list, cwd: Path) -> subprocess.CompletedProcess:
+    """
+    Run a fresh interpreter with the repository on its path.
+
+    :param args: The interpreter arguments.
+    :type args: list
+
+    :param cwd: The working directory.
+    :type cwd: Path
+
+    :return: The completed process, with its output captured.
+    :rtype: subprocess.CompletedProcess
+    """
+    env = {**os.environ, "PYTHONPATH": str(REPO_ROOT)}
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+        timeout=60,
+    )
+
+
+def probe_import(cwd: Path) -> dict:
+    """
+    Import the CLI in a fresh interpreter.
+
+    :param cwd: The working directory.
+    :type cwd: Path
+
+    :return: The import time in seconds and the heavy modules loaded.
+    :rtype: dict
+    """
+    result = json.loads(run_python(["-c", _PROBE], cwd).stdout.splitlines()[-1])
+    return {
+        "elapsed": result["elapsed"],
+        "heavy_modules": [m for m in HEAVY_MODULES if m in result["modules"]],
+    }
+
+
+def time_command(cwd: Path) -> float:
+    """
+    Run ``settings --view`` in a fresh interpreter.
+
+    :param cwd: The working directory.
+    :type cwd: Path
+
+    :return: The wall time in seconds.
+    :rtype: float
+    """
+    start = time.perf_counter()
+    run_python(
+        ["-c", "from evolving_ideas.cli import main; main()", "settings", "--view"],
+        cwd,
+    )
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--check", action="store_true", help="Exit with 1 if over budget"
+    )
+    args = parser.parse_args()
+    cwd = Path.cwd()
+    imported = probe_import(cwd)
+    command = time_command(cwd)
+    print(
+        f"import: {imported['elapsed']:.3f}s (budget {IMPORT_BUDGET_SECONDS}s), "
+        f"heavy modules: {imported['heavy_modules'] or 'none'}"
+    )
+    print(f"settings --view: {command:.3f}s (budget {COMMAND_BUDGET_SECONDS}s)")
+    over = (
+        imported["heavy_modules"]
+        or imported["elapsed"] > IMPORT_BUDGET_SECONDS
+        or command > COMMAND_BUDGET_SECONDS
+    )
+    if args.check and over:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+benchmarks.memory_footprint
+
+Measures the memory held by N loaded ideas.
+
+Usage:
+    python -m benchmarks.memory_footprint --ideas 1000 --check
+"""
+
+import argparse
+import gc
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+from evolving_ideas.domain.models.idea import QAPair
+from evolving_ideas.domain.repositories.idea_repository import IdeaRepository
+
+AUTHORS = ["alice", "bob", "carol", "dave"]
+METHODS = ["classic", "scamper", "six_hats", "lotus_blossom"]
+
+# Bytes retained per loaded idea (current version with 10 Q&A pairs).
+# Slotted models and interned fields keep this around 3.8 KB on CPython 3.11;
+# plain dataclasses with per-instance __dict__ need about 4.7 KB.
+BYTES_PER_IDEA_BUDGET = 4400
+
+
+def build_store(store_path: Path, ideas: int, questions: int = 10) -> IdeaRepository:
+    """
+    Create a store filled with synthetic ideas.
+
+    :param store_path: The directory of the store.
+    :type store_path: Path
+
+    :param ideas: The number of ideas to create.
+    :type ideas: int
+
+    :param questions: The number of Q&A pairs per idea.
+    :type questions: int
+
+    :return: The repository of the new store.
+    :rtype: IdeaRepository
+    """
+    repo = IdeaRepository(store_path)
+    for i in range(ideas):
+        repo.add(
+            role="Software architect",
+            task=f"Idea number {i} about evolving ideas with AI",
+            qna=[
+                QAPair(question=f"Question {q} for idea {i}?", answer=f"Answer {q}")
+                for q in range(questions)
+            ],
+            summary=f"Summary of idea {i}.",
+            author=AUTHORS[i % len(AUTHORS)],
+            method=METHODS[i % len(METHODS)],
+            method_metadata={"steps": ["Substitute", "Combine", "Adapt"]},
+        )
+    return repo
+
+
+def measure(ideas: int = 500) -> dict:
+    """
+    Load every idea of a synthetic store and measure the retained memory.
+
+    :param ideas: The number of ideas to load.
+    :type ideas: int
+
+    :return: The total and per-idea retained bytes.
+    :rtype: dict
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = build_store(Path(tmp) / "ideas", ideas)
+        ids = repo.list()
+        gc.collect()
+        tracemalloc.start()
+        baseline = tracemalloc.take_snapshot()
+        loaded = [repo.load(idea_id).current_version() for idea_id in ids]
+        gc.collect()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        retained = sum(
+            stat.size_diff for stat in snapshot.compare_to(baseline, "filename")
+        )
+        assert len(loaded) == ideas
+    return {"ideas": ideas, "bytes": retained, "bytes_per_idea": retained / ideas}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ideas", type=int, default=1000, help="Ideas to load")
+    parser.add_argument(
+        "--check", action="store_true", help="Exit with 1 if over budget"
+    )
+    args = parser.parse_args()
+    result = measure(args.ideas)
+    print(
+        f"{result['ideas']} ideas: {result['bytes'] / 1024:.1f} KiB retained, "
+        f"{result['bytes_per_idea']:.0f} bytes per idea "
+        f"(budget {BYTES_PER_IDEA_BUDGET})"
+    )
+    if args.check and result["bytes_per_idea"] > BYTES_PER_IDEA_BUDGET:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,8 +5,9 @@ evolving_ideas.app
 import json
 import logging
 import os
+from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Sequence
 
 from evolving_ideas.common.cache_store import CacheStore
 from evolving_ideas.common.logger import setup_logging
@@ -14,6 +15,7 @@ from evolving_ideas.domain.models.idea import QAPair
 from evolving_ideas.domain.repositories.idea_repository import IdeaRepository
 from evolving_ideas.domain.services.idea_tree import IdeaTree
 from evolving_ideas.infra.responder import LLMResponder
+from evolving_ideas.infra.usage import aggregate, load_usage
 from evolving_ideas.interface.presenters import chat_logger
 from evolving_ideas.sessions.chat import ChatSession
 from evolving_ideas.settings import settings
@@ -93,6 +95,182 @@ class SettingsApp:
         print(json.dumps(data, indent=2))
 
 
+class UsageApp:
+    """
+    Application class for reporting LLM usage.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        """
+        :param path: The metrics file (default is the ``llm.usage.path``
+            setting).
+        :type path: Optional[Path]
+        """
+        self.path = Path(path or settings.get("llm.usage.path", ".storage/usage.jsonl"))
+
+    def report(
+        self,
+        by: Sequence[str] = ("strategy", "model"),
+        since: Optional[datetime] = None,
+    ) -> list:
+        """
+        Print the recorded token usage, latency and cost, totalled by group.
+
+        :param by: The record fields to group by.
+        :type by: Sequence[str]
+
+        :param since: Only count calls made at or after this time.
+        :type since: Optional[datetime]
+
+        :return: The report rows.
+        :rtype: list
+        """
+        rows = aggregate(load_usage(self.path, since=since), by)
+        if not rows:
+            chat_logger.system("No usage recorded.")
+            return rows
+        header = [*by, "calls", "cached", "prompt", "completion", "latency", "cost"]
+        table = [
+            [
+                *(str(row[name]) for name in by),
+                str(row["calls"]),
+                str(row["cached_calls"]),
+                str(row["prompt_tokens"]),
+                str(row["completion_tokens"]),
+                f"{row['latency']:.1f}s",
+                "-" if row["cost"] is None else f"${row['cost']:.6f}",
+            ]
+            for row in rows
+        ]
+        widths = [
+            max(len(line[i]) for line in [header, *table]) for i in range(len(header))
+        ]
+        for line in [header, *table]:
+            print("  ".join(cell.ljust(width) for cell, width in zip(line, widths)))
+        return rows
+
+
+class StoreApp:
+    """
+    Application class for browsing and maintaining the idea store.
+    """
+
+    def __init__(self, repository: Optional[IdeaRepository] = None):
+        """
+        :param repository: The idea repository to operate on.
+        :type repository: Optional[IdeaRepository]
+        """
+        self.repository = repository or IdeaRepository.from_settings()
+
+    def list(
+        self,
+        author: Optional[str] = None,
+        method: Optional[str] = None,
+        tag: Optional[str] = None,
+        sort: str = "created_at",
+        descending: bool = False,
+        limit: Optional[int] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        recent: Optional[int] = None,
+    ):
+        """
+        List ideas from the catalog index.
+
+        :param author: Only list ideas created by this author.
+        :type author: Optional[str]
+
+        :param method: Only list ideas whose current version used this method.
+        :type method: Optional[str]
+
+        :param tag: Only list ideas whose current version has this tag.
+        :type tag: Optional[str]
+
+        :param sort: The catalog column to sort by.
+        :type sort: str
+
+        :param descending: Whether to sort in descending order.
+        :type descending: bool
+
+        :param limit: The maximum number of ideas to list.
+        :type limit: Optional[int]
+
+        :param since: Only list ideas created at or after this time.
+        :type since: Optional[datetime]
+
+        :param until: Only list ideas created at or before this time.
+        :type until: Optional[datetime]
+
+        :param recent: List only this many of the newest ideas; the other
+            filters are ignored.
+        :type recent: Optional[int]
+        """
+        if recent is not None:
+            entries = self.repository.recent(recent)
+        else:
+            entries = self.repository.search(
+                author=author,
+                method=method,
+                tag=tag,
+                order_by=sort,
+                descending=descending,
+                limit=limit,
+                since=since,
+                until=until,
+            )
+        for entry in entries:
+            print(
+                f"{entry.id}  v{entry.current_version}  {entry.created_at}  "
+                f"{entry.author or '-'}  {entry.method or '-'}  {entry.title}"
+            )
+        if not entries:
+            chat_logger.system("No ideas found.")
+
+    def reindex(self) -> int:
+        """
+        Rebuild the catalog index from the idea files.
+
+        :return: The number of ideas indexed.
+        :rtype: int
+        """
+        count = self.repository.reindex()
+        chat_logger.system(f"Catalog rebuilt with {count} ideas.")
+        return count
+
+    def migrate(self, storage_format: str) -> int:
+        """
+        Convert every file in the idea store to another storage format.
+
+        :param storage_format: The target format.
+        :type storage_format: str
+
+        :return: The number of files converted.
+        :rtype: int
+        """
+        count = self.repository.migrate(storage_format)
+        chat_logger.system(f"Converted {count} files to {storage_format}.")
+        if storage_format != self.repository.codec.name:
+            chat_logger.system(
+                f"Set 'storage_format: {storage_format}' in .storage/config.yml "
+                "to write new ideas in this format."
+            )
+        return count
+
+    def reshard(self, shard_depth: int) -> int:
+        """
+        Move every idea in the store to a sharded (or flat) directory layout.
+
+        :param shard_depth: The number of hash-prefix directory levels.
+        :type shard_depth: int
+
+        :return: The number of ideas moved.
+        :rtype: int
+        """
+        count = self.repository.reshard(shard_depth)
+        chat_logger.system(f"Moved {count} ideas to a {shard_depth}-level layout.")
+        return count
+
+
 class EvolvingIdeaApp:
     """
     Main application class for the Ideas app.
@@ -131,7 +309,7 @@ class EvolvingIdeaApp:
             context=inputs.get("context"),
         )
 
-        repo = IdeaRepository(Path(settings.get("storage_path")))
+        repo = IdeaRepository.from_settings()
         idea_tree = repo.add(
             role=idea_data["role"],
             task=idea_data["task"],
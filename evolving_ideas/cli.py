@@ -4,10 +4,14 @@ evolving_ideas.cli
 
 import argparse
 import sys
+from datetime import datetime
 
-from evolving_ideas.app import EvolvingIdeaApp, SettingsApp
+from evolving_ideas.app import EvolvingIdeaApp, SettingsApp, StoreApp, UsageApp
 from evolving_ideas.common import constants
-from evolving_ideas.infra.local_llm_downloader import LocalLLMDownloader
+from evolving_ideas.common.codecs import CODECS
+from evolving_ideas.domain.repositories.catalog import SORTABLE_COLUMNS
+from evolving_ideas.infra.usage import GROUP_FIELDS
+from evolving_ideas.settings import settings
 
 
 def main():
@@ -44,6 +48,56 @@ def main():
     )
     evolve_parser.add_argument("id", help="ID of the idea to evolve")
 
+    # List command
+    list_parser = subparsers.add_parser("list", help="List captured ideas")
+    list_parser.add_argument("--author", help="Only list ideas by this author")
+    list_parser.add_argument("--method", help="Only list ideas using this method")
+    list_parser.add_argument("--tag", help="Only list ideas with this tag")
+    list_parser.add_argument(
+        "--sort",
+        default="created_at",
+        choices=SORTABLE_COLUMNS,
+        help="Column to sort by",
+    )
+    list_parser.add_argument(
+        "--desc", action="store_true", help="Sort in descending order"
+    )
+    list_parser.add_argument("--limit", type=int, help="Maximum ideas to list")
+    list_parser.add_argument(
+        "--since",
+        type=datetime.fromisoformat,
+        help="Only list ideas created at or after this ISO date/time",
+    )
+    list_parser.add_argument(
+        "--until",
+        type=datetime.fromisoformat,
+        help="Only list ideas created at or before this ISO date/time",
+    )
+    list_parser.add_argument(
+        "--recent", type=int, help="List the N most recent ideas (ignores filters)"
+    )
+
+    subparsers.add_parser(
+        "reindex", help="Rebuild the idea catalog index from the idea files"
+    )
+
+    migrate_parser = subparsers.add_parser(
+        "migrate-store", help="Convert the idea store to another storage format"
+    )
+    migrate_parser.add_argument(
+        "--format", required=True, choices=list(CODECS), help="Target storage format"
+    )
+
+    shard_parser = subparsers.add_parser(
+        "shard-store", help="Move the idea store to a sharded directory layout"
+    )
+    shard_parser.add_argument(
+        "--depth",
+        type=int,
+        default=2,
+        help="Number of hash-prefix directory levels (0 for a flat layout)",
+    )
+
     settings_parser = subparsers.add_parser(
         "settings", help="View or modify application settings"
     )
@@ -51,28 +105,101 @@ def main():
         "--view", action="store_true", help="View current settings"
     )
 
-    subparsers.add_parser(
+    usage_parser = subparsers.add_parser(
+        "usage", help="Report LLM token usage, latency and cost"
+    )
+    usage_parser.add_argument(
+        "--by",
+        nargs="+",
+        default=["strategy", "model"],
+        choices=GROUP_FIELDS,
+        help="Fields to group the report by",
+    )
+    usage_parser.add_argument(
+        "--since",
+        type=datetime.fromisoformat,
+        help="Only count calls made at or after this ISO date/time",
+    )
+
+    download_parser = subparsers.add_parser(
         "download-model", help="Download the local LLM model and tokenizer"
     )
+    download_parser.add_argument(
+        "--archive", help="Install from a tarball instead of the Hugging Face Hub"
+    )
+    download_parser.add_argument(
+        "--offline",
+        action="store_true",
+        default=None,
+        help="Only use the local Hugging Face cache",
+    )
+    download_parser.add_argument(
+        "--force", action="store_true", help="Reinstall even if already installed"
+    )
+
+    subparsers.add_parser(
+        "serve-model",
+        help="Keep the local model loaded and serve it to other sessions",
+    )
 
     # Parse args
     args = parser.parse_args()
 
-    app = EvolvingIdeaApp()
-
-    # Dispatch commands
+    # Dispatch commands; the LLM backend is only loaded by commands using it
     if args.command == "add":
-        app.add()
+        EvolvingIdeaApp().add()
     elif args.command == "improve":
         print("🚧 The 'improve' command is coming soon. Stay tuned!")
         sys.exit(0)
     elif args.command == "evolve":
         print("🚧 The 'evolve' command is coming soon. Stay tuned!")
         sys.exit(0)
+    elif args.command == "list":
+        StoreApp().list(
+            author=args.author,
+            method=args.method,
+            tag=args.tag,
+            sort=args.sort,
+            descending=args.desc,
+            limit=args.limit,
+            since=args.since,
+            until=args.until,
+            recent=args.recent,
+        )
+    elif args.command == "reindex":
+        StoreApp().reindex()
+    elif args.command == "migrate-store":
+        StoreApp().migrate(args.format)
+    elif args.command == "shard-store":
+        StoreApp().reshard(args.depth)
     elif args.command == "settings":
         settings_app = SettingsApp()
         if args.view:
             settings_app.view()
+    elif args.command == "usage":
+        UsageApp().report(by=args.by, since=args.since)
     elif args.command == "download-model":
-        downloader = LocalLLMDownloader()
-        downloader.download()
+        # pylint: disable=import-outside-toplevel
+        from evolving_ideas.infra.local_llm_downloader import LocalLLMDownloader
+
+        downloader = LocalLLMDownloader(offline=args.offline)
+        if not downloader.download(archive=args.archive, force=args.force):
+            sys.exit(1)
+    elif args.command == "serve-model":
+        # pylint: disable=import-outside-toplevel
+        from evolving_ideas.infra.local_llm_worker import (
+            LocalLLMWorker,
+            worker_supported,
+        )
+
+        if not worker_supported():
+            print(
+                "❌ serve-model needs Unix domain sockets, "
+                "which this platform does not provide."
+            )
+            sys.exit(1)
+        LocalLLMWorker(
+            model_name=settings.get("llm.model"),
+            socket_path=settings.get("llm.worker.socket"),
+            batch_size=settings.get("llm.batch_size", 8),
+        ).serve_forever()
@@ -0,0 +1,187 @@
+"""
+evolving_ideas.common.blob_store
+"""
+
+import hashlib
+import json
+import os
+import zlib
+from collections.abc import MutableMapping
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+BLOB_KEY = "$blob"
+
+
+def is_blob_ref(value: Any) -> bool:
+    """
+    Check whether a value is a reference to a stored blob.
+
+    :param value: The value to check.
+    :type value: Any
+
+    :return: True if the value is a blob reference.
+    :rtype: bool
+    """
+    return isinstance(value, dict) and len(value) == 1 and BLOB_KEY in value
+
+
+class BlobStore:
+    """
+    Content-addressed store of zlib-compressed JSON values.
+    Blobs are named after the SHA-256 of their content, so identical values
+    written by different versions are stored once.
+    """
+
+    def __init__(self, root: Path, threshold: Optional[int] = None):
+        """
+        :param root: The directory where blobs are stored.
+        :type root: Path
+
+        :param threshold: The encoded size in bytes from which values are
+            moved into blobs on write. None keeps every value inline.
+        :type threshold: Optional[int]
+        """
+        self.root = root
+        self.threshold = threshold
+
+    def path_for(self, digest: str) -> Path:
+        """
+        Get the path of a blob.
+
+        :param digest: The blob digest.
+        :type digest: str
+
+        :return: The blob file path.
+        :rtype: Path
+        """
+        return self.root / f"{digest}.zlib"
+
+    def put(self, value: Any) -> dict:
+        """
+        Store a value, unless an identical blob already exists.
+
+        :param value: A JSON-serializable value.
+        :type value: Any
+
+        :return: A reference to the blob.
+        :rtype: dict
+        """
+        raw = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        return self._put_raw(raw)
+
+    def _put_raw(self, raw: bytes) -> dict:
+        digest = hashlib.sha256(raw).hexdigest()
+        path = self.path_for(digest)
+        if not path.exists():
+            self.root.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            tmp_path.write_bytes(zlib.compress(raw))
+            os.replace(tmp_path, path)
+        return {BLOB_KEY: digest}
+
+    def get(self, ref: dict) -> Any:
+        """
+        Load the value behind a blob reference.
+
+        :param ref: The blob reference.
+        :type ref: dict
+
+        :return: The stored value.
+        :rtype: Any
+
+        :raises FileNotFoundError: If the blob does not exist.
+        """
+        raw = zlib.decompress(self.path_for(ref[BLOB_KEY]).read_bytes())
+        return json.loads(raw)
+
+    def externalize(self, data: dict) -> dict:
+        """
+        Replace the large values of a mapping with blob references.
+
+        :param data: The mapping to process. It is not modified.
+        :type data: dict
+
+        :return: A new mapping where large values are blob references.
+        :rtype: dict
+        """
+        if isinstance(data, LazyBlobDict):
+            return data.to_refs(self)
+        result = {}
+        for key, value in data.items():
+            result[key] = self._maybe_put(value)
+        return result
+
+    def _maybe_put(self, value: Any) -> Any:
+        if self.threshold is None or is_blob_ref(value):
+            return value
+        raw = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        if len(raw) < self.threshold:
+            return value
+        return self._put_raw(raw)
+
+
+class LazyBlobDict(MutableMapping):
+    """
+    Mapping whose blob-referenced values are loaded on first access.
+    Loaded values that cannot change in place keep their reference; loaded
+    dicts and lists are stored again, so edits made to them are saved.
+    """
+
+    def __init__(self, data: dict, blobs: BlobStore):
+        """
+        :param data: The stored mapping, possibly holding blob references.
+        :type data: dict
+
+        :param blobs: The blob store the references point to.
+        :type blobs: BlobStore
+        """
+        self._data = dict(data)
+        self._refs: Dict[str, dict] = {}
+        self.blobs = blobs
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._data[key]
+        if is_blob_ref(value):
+            ref = value
+            value = self._data[key] = self.blobs.get(ref)
+            if not isinstance(value, (dict, list)):
+                self._refs[key] = ref
+        return value
+
+    def __setitem__(self, key: str, value: Any):
+        self._refs.pop(key, None)
+        self._data[key] = value
+
+    def __delitem__(self, key: str):
+        self._refs.pop(key, None)
+        del self._data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return f"LazyBlobDict({list(self._data)})"
+
+    def to_refs(self, blobs: Optional[BlobStore] = None) -> dict:
+        """
+        Get the stored form of the mapping without loading any blob.
+
+        :param blobs: The blob store used for values that became large.
+        :type blobs: Optional[BlobStore]
+
+        :return: A mapping where loaded blob values are references again.
+        :rtype: dict
+        """
+        result = {}
+        for key, value in self._data.items():
+            if key in self._refs:
+                result[key] = self._refs[key]
+            elif blobs is not None:
+                result[key] = blobs._maybe_put(value)
+            else:
+                result[key] = value
+        return result
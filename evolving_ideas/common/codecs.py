@@ -0,0 +1,247 @@
+"""
+evolving_ideas.common.codecs
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+import yaml
+
+try:
+    from yaml import CSafeDumper as YamlDumper
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:  # libyaml is not available, fall back to pure Python
+    from yaml import SafeDumper as YamlDumper
+    from yaml import SafeLoader as YamlLoader
+
+
+class Codec:
+    """
+    Base class for document serialization formats.
+    The file extension acts as the format marker, so a store can hold
+    documents in several formats at once.
+    """
+
+    name: str = ""
+    extension: str = ""
+
+    def loads(self, data: bytes) -> dict:
+        """
+        Deserialize a document.
+
+        :param data: The raw file content.
+        :type data: bytes
+
+        :return: The decoded document.
+        :rtype: dict
+        """
+        raise NotImplementedError
+
+    def dumps(self, document: dict) -> bytes:
+        """
+        Serialize a document.
+
+        :param document: The document to encode.
+        :type document: dict
+
+        :return: The encoded file content.
+        :rtype: bytes
+        """
+        raise NotImplementedError
+
+
+class YamlCodec(Codec):
+    """
+    YAML codec, using the libyaml C loader and dumper when available.
+    """
+
+    name = "yaml"
+    extension = ".yaml"
+
+    def loads(self, data: bytes) -> dict:
+        return yaml.load(data, Loader=YamlLoader)
+
+    def dumps(self, document: dict) -> bytes:
+        return yaml.dump(document, Dumper=YamlDumper, sort_keys=False).encode()
+
+
+class JsonCodec(Codec):
+    """
+    JSON codec.
+    """
+
+    name = "json"
+    extension = ".json"
+
+    def loads(self, data: bytes) -> dict:
+        return json.loads(data)
+
+    def dumps(self, document: dict) -> bytes:
+        return json.dumps(document, ensure_ascii=False).encode("utf-8")
+
+
+class MsgpackCodec(Codec):
+    """
+    Compact binary codec based on msgpack (optional dependency).
+    """
+
+    name = "msgpack"
+    extension = ".msgpack"
+
+    @staticmethod
+    def _msgpack():
+        try:
+            import msgpack  # pylint: disable=import-outside-toplevel
+        except ImportError as e:
+            raise ValueError(
+                "The msgpack format requires the 'msgpack' package to be installed."
+            ) from e
+        return msgpack
+
+    def loads(self, data: bytes) -> dict:
+        return self._msgpack().unpackb(data, raw=False, strict_map_key=False)
+
+    def dumps(self, document: dict) -> bytes:
+        return self._msgpack().packb(document, use_bin_type=True)
+
+
+TMP_SUFFIX = ".tmp"
+
+CODECS = {codec.name: codec for codec in (YamlCodec(), JsonCodec(), MsgpackCodec())}
+DEFAULT_CODEC = "yaml"
+
+
+def get_codec(name: Optional[str] = None) -> Codec:
+    """
+    Get a codec by name.
+
+    :param name: The codec name (default is "yaml").
+    :type name: Optional[str]
+
+    :return: The codec instance.
+    :rtype: Codec
+
+    :raises ValueError: If the codec is not supported.
+    """
+    try:
+        return CODECS[name or DEFAULT_CODEC]
+    except KeyError as e:
+        raise ValueError(f"Unsupported storage format: {name}") from e
+
+
+def codec_for(path: Path) -> Codec:
+    """
+    Get the codec of a document from its file extension.
+
+    :param path: The document path.
+    :type path: Path
+
+    :return: The codec instance.
+    :rtype: Codec
+
+    :raises ValueError: If the extension does not belong to any codec.
+    """
+    for codec in CODECS.values():
+        if path.suffix == codec.extension:
+            return codec
+    raise ValueError(f"Unknown document format: {path}")
+
+
+def is_document(path: Path) -> bool:
+    """
+    Check whether a file name carries a known format marker.
+
+    :param path: The file path.
+    :type path: Path
+
+    :return: True if a codec handles the file.
+    :rtype: bool
+    """
+    return any(path.suffix == codec.extension for codec in CODECS.values())
+
+
+def find_document(directory: Path, stem: str) -> Optional[Path]:
+    """
+    Find a document by name regardless of its format.
+
+    :param directory: The directory to look in.
+    :type directory: Path
+
+    :param stem: The file name without extension (e.g. "metadata").
+    :type stem: str
+
+    :return: The path of the document, or None if it does not exist.
+    :rtype: Optional[Path]
+    """
+    for codec in CODECS.values():
+        path = directory / f"{stem}{codec.extension}"
+        if path.exists():
+            return path
+    return None
+
+
+def read_document(path: Path) -> dict:
+    """
+    Read a document using the codec matching its extension.
+
+    :param path: The document path.
+    :type path: Path
+
+    :return: The decoded document.
+    :rtype: dict
+    """
+    return codec_for(path).loads(path.read_bytes())
+
+
+def staged_path(path: Path) -> Path:
+    """
+    Get the temporary sibling a document is staged to.
+
+    :param path: The final document path.
+    :type path: Path
+
+    :return: The path of the temporary file.
+    :rtype: Path
+    """
+    return path.with_name(f".{path.name}{TMP_SUFFIX}")
+
+
+def stage_document(path: Path, document: dict, sync: bool = False) -> Path:
+    """
+    Write a document to a temporary sibling of its final path.
+
+    :param path: The final document path.
+    :type path: Path
+
+    :param document: The document to write.
+    :type document: dict
+
+    :param sync: Flush the file to disk before returning.
+    :type sync: bool
+
+    :return: The path of the temporary file.
+    :rtype: Path
+    """
+    tmp_path = staged_path(path)
+    with open(tmp_path, "wb") as f:
+        f.write(codec_for(path).dumps(document))
+        if sync:
+            f.flush()
+            os.fsync(f.fileno())
+    return tmp_path
+
+
+def write_document(path: Path, document: dict):
+    """
+    Write a document using the codec matching its extension.
+    The file is written to a temporary sibling first and then renamed.
+
+    :param path: The document path.
+    :type path: Path
+
+    :param document: The document to write.
+    :type document: dict
+    """
+    os.replace(stage_document(path, document), path)
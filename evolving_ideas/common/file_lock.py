@@ -0,0 +1,115 @@
+"""
+evolving_ideas.common.file_lock
+"""
+
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+POLL_INTERVAL = 0.05
+
+
+def fsync_directory(directory: Path):
+    """
+    Flush a directory entry, so that renames and new files in it survive a
+    power loss. Windows has no directory handles to flush.
+
+    :param directory: The directory.
+    :type directory: Path
+    """
+    if fcntl is None:
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class FileLock:
+    """
+    Exclusive lock held through a lock file, shared by every process and
+    thread opening the same path. The lock is released when its holder
+    releases it or exits, so a crashed holder never leaves it taken.
+    A lock object is not reentrant; create one per critical section.
+    """
+
+    def __init__(self, path: Path, create_parents: bool = True):
+        """
+        :param path: The lock file, created if missing.
+        :type path: Path
+
+        :param create_parents: Create the directories leading to the lock
+            file. Without it, taking the lock in a missing directory raises
+            FileNotFoundError.
+        :type create_parents: bool
+        """
+        self.path = Path(path)
+        self.create_parents = create_parents
+        self._fd: Optional[int] = None
+
+    def _try_lock(self, fd: int) -> bool:
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            return False
+        return True
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """
+        Take the lock.
+
+        :param blocking: Wait for the lock instead of giving up when it is
+            held elsewhere.
+        :type blocking: bool
+
+        :return: True if the lock was taken.
+        :rtype: bool
+
+        :raises FileNotFoundError: If the lock file's directory is missing and
+            ``create_parents`` is off.
+        """
+        if self.create_parents:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None and blocking:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        else:
+            while not self._try_lock(fd):
+                if not blocking:
+                    os.close(fd)
+                    return False
+                time.sleep(POLL_INTERVAL)
+        self._fd = fd
+        return True
+
+    def release(self):
+        """
+        Release the lock, if held.
+        """
+        if self._fd is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        os.close(self._fd)
+        self._fd = None
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.release()
@@ -0,0 +1,123 @@
+"""
+evolving_ideas.common.ids
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Optional, Tuple
+
+# Crockford's base32, lower-cased; it keeps the lexicographic order of the
+# encoded values, so IDs sort by creation time.
+ALPHABET = "0123456789abcdefghjkmnpqrstvwxyz"
+ID_PREFIX = "idea_"
+TIME_LENGTH = 10
+RANDOM_LENGTH = 16
+ULID_LENGTH = TIME_LENGTH + RANDOM_LENGTH
+_RANDOM_BITS = 80
+_MAX_RANDOM = (1 << _RANDOM_BITS) - 1
+
+_lock = threading.Lock()
+_last: Tuple[int, int] = (-1, 0)
+
+
+def _encode(value: int, length: int) -> str:
+    chars = []
+    for _ in range(length):
+        value, index = divmod(value, 32)
+        chars.append(ALPHABET[index])
+    return "".join(reversed(chars))
+
+
+def new_ulid(timestamp_ms: Optional[int] = None) -> str:
+    """
+    Generate a ULID: 48 bits of millisecond timestamp followed by 80 random
+    bits. IDs generated in the same millisecond by this process increment the
+    random part, so they remain strictly ordered.
+
+    :param timestamp_ms: The creation time in milliseconds since the epoch
+        (default is now).
+    :type timestamp_ms: Optional[int]
+
+    :return: A 26-character, time-sortable identifier.
+    :rtype: str
+    """
+    global _last  # pylint: disable=global-statement
+    if timestamp_ms is None:
+        timestamp_ms = time.time_ns() // 1_000_000
+    with _lock:
+        last_ms, last_random = _last
+        if timestamp_ms == last_ms and last_random < _MAX_RANDOM:
+            random_part = last_random + 1
+        else:
+            random_part = int.from_bytes(os.urandom(10), "big")
+        _last = (timestamp_ms, random_part)
+    return _encode(timestamp_ms, TIME_LENGTH) + _encode(random_part, RANDOM_LENGTH)
+
+
+def ulid_time(ulid: str) -> datetime:
+    """
+    Get the creation time encoded in a ULID.
+
+    :param ulid: The identifier.
+    :type ulid: str
+
+    :return: The creation time, as a naive local datetime.
+    :rtype: datetime
+    """
+    timestamp_ms = 0
+    for char in ulid[:TIME_LENGTH].lower():
+        timestamp_ms = timestamp_ms * 32 + ALPHABET.index(char)
+    return datetime.fromtimestamp(timestamp_ms / 1000)
+
+
+def ulid_bound(moment: datetime, upper: bool = False) -> str:
+    """
+    Get the smallest (or largest) ULID that can be generated at a moment.
+    Naive datetimes are taken as local time.
+
+    :param moment: The point in time.
+    :type moment: datetime
+
+    :param upper: Whether to return the largest ULID instead of the smallest.
+    :type upper: bool
+
+    :return: The bounding identifier.
+    :rtype: str
+    """
+    timestamp_ms = int(moment.timestamp() * 1000)
+    fill = ALPHABET[-1] if upper else ALPHABET[0]
+    return _encode(timestamp_ms, TIME_LENGTH) + fill * RANDOM_LENGTH
+
+
+def new_idea_id(created: Optional[datetime] = None) -> str:
+    """
+    Generate a time-sortable idea ID.
+
+    :param created: The creation time of the idea (default is now).
+    :type created: Optional[datetime]
+
+    :return: The idea ID, e.g. ``idea_01j9z3k4x8...``.
+    :rtype: str
+    """
+    timestamp_ms = int(created.timestamp() * 1000) if created else None
+    return f"{ID_PREFIX}{new_ulid(timestamp_ms)}"
+
+
+def is_sortable_id(idea_id: str) -> bool:
+    """
+    Check whether an idea ID embeds its creation time.
+    IDs allocated before sortable IDs were introduced do not.
+
+    :param idea_id: The unique identifier of the idea.
+    :type idea_id: str
+
+    :return: True if the ID is a prefixed ULID.
+    :rtype: bool
+    """
+    return (
+        len(idea_id) == len(ID_PREFIX) + ULID_LENGTH
+        and idea_id.startswith(ID_PREFIX)
+        and all(c in ALPHABET for c in idea_id[len(ID_PREFIX) :])
+    )
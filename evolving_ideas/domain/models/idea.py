@@ -2,13 +2,59 @@
 evolving_ideas.domain.models.idea
 """
 
-from dataclasses import dataclass
+import sys
+from dataclasses import dataclass, fields
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, List, Optional
 
-import yaml
+from evolving_ideas.common.blob_store import BlobStore, LazyBlobDict
+from evolving_ideas.common.codecs import read_document, write_document
 
 
+def slotted(cls):
+    """
+    Rebuild a dataclass with ``__slots__`` so instances carry no ``__dict__``.
+    Equivalent to ``dataclass(slots=True)``, which needs Python 3.10.
+    """
+    names = tuple(f.name for f in fields(cls))
+    namespace = {
+        k: v
+        for k, v in cls.__dict__.items()
+        if k not in names and k not in ("__dict__", "__weakref__")
+    }
+    namespace["__slots__"] = names
+    slotted_cls = type(cls)(cls.__name__, cls.__bases__, namespace)
+    slotted_cls.__qualname__ = cls.__qualname__
+    return slotted_cls
+
+
+def as_dict(instance: Any) -> dict:
+    """
+    Shallow dictionary of a slotted dataclass' fields.
+
+    :param instance: The dataclass instance.
+    :type instance: Any
+
+    :return: A mapping of field names to values.
+    :rtype: dict
+    """
+    return {f.name: getattr(instance, f.name) for f in fields(instance)}
+
+
+def intern(value: Any) -> Any:
+    """
+    Intern a low-cardinality string so equal values share one object.
+
+    :param value: The value to intern; non-strings are returned unchanged.
+    :type value: Any
+
+    :return: The interned value.
+    :rtype: Any
+    """
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+@slotted
 @dataclass
 class Attachment:
     """
@@ -22,6 +68,7 @@ class Attachment:
     description: str
 
 
+@slotted
 @dataclass
 class QAPair:
     """
@@ -35,6 +82,7 @@ class QAPair:
     answer: str
 
 
+@slotted
 @dataclass
 class IdeaVersion:
     """
@@ -77,32 +125,96 @@ class IdeaVersion:
     # related_ideas: List[str] = None
 
     @classmethod
-    def from_file(cls, path: Path) -> "IdeaVersion":
+    def from_dict(cls, data: dict, blobs: Optional[BlobStore] = None) -> "IdeaVersion":
+        """
+        Build an IdeaVersion from its serialized form.
+
+        :param data: The serialized version.
+        :type data: dict
+
+        :param blobs: The blob store holding externalized method metadata.
+        :type blobs: Optional[BlobStore]
+
+        :return: An IdeaVersion object.
+        :rtype: IdeaVersion
+        """
+        data = dict(data)
+        for key in ("status", "author", "method"):
+            data[key] = intern(data.get(key))
+        data["tags"] = [intern(tag) for tag in data.get("tags") or []]
+        if isinstance(data.get("context"), dict):
+            data["context"] = {
+                intern(k): intern(v) if k == "role" else v
+                for k, v in data["context"].items()
+            }
+        if blobs is not None and data.get("method_metadata"):
+            data["method_metadata"] = LazyBlobDict(data["method_metadata"], blobs)
+        data["qna"] = [
+            qa if isinstance(qa, QAPair) else QAPair(**qa) for qa in data["qna"] or []
+        ]
+        data["attachments"] = [
+            att if isinstance(att, Attachment) else Attachment(**att)
+            for att in data["attachments"] or []
+        ]
+        return cls(**data)
+
+    def to_dict(self, blobs: Optional[BlobStore] = None) -> dict:
+        """
+        Convert the IdeaVersion to its serialized form.
+
+        :param blobs: The blob store where large method metadata values are
+            moved. Without it, metadata is written inline.
+        :type blobs: Optional[BlobStore]
+
+        :return: A dictionary representation of the IdeaVersion.
+        :rtype: dict
+        """
+        data = as_dict(self)
+        if blobs is not None and self.method_metadata:
+            data["method_metadata"] = blobs.externalize(self.method_metadata)
+        elif isinstance(self.method_metadata, LazyBlobDict):
+            data["method_metadata"] = dict(self.method_metadata.items())
+        data["qna"] = [
+            as_dict(qa) if isinstance(qa, QAPair) else dict(qa) for qa in self.qna
+        ]
+        data["attachments"] = [
+            as_dict(att) if isinstance(att, Attachment) else dict(att)
+            for att in self.attachments
+        ]
+        return data
+
+    @classmethod
+    def from_file(cls, path: Path, blobs: Optional[BlobStore] = None) -> "IdeaVersion":
         """
-        Load an IdeaVersion from a YAML file.
+        Load an IdeaVersion from a file.
+        The format is picked from the file extension.
 
-        :param path: The path to the YAML file.
+        :param path: The path to the version file.
         :type path: Path
 
+        :param blobs: The blob store holding externalized method metadata.
+        :type blobs: Optional[BlobStore]
+
         :return: An IdeaVersion object loaded from the file.
         :rtype: IdeaVersion
         """
-        data = yaml.safe_load(path.read_text())
-        return cls(**data)
+        return cls.from_dict(read_document(path), blobs=blobs)
 
-    def to_file(self, path: Path):
+    def to_file(self, path: Path, blobs: Optional[BlobStore] = None):
         """
-        Save the IdeaVersion to a YAML file.
+        Save the IdeaVersion to a file.
+        The format is picked from the file extension.
 
-        :param path: The path where the YAML file will be saved.
+        :param path: The path where the version file will be saved.
         :type path: Path
+
+        :param blobs: The blob store where large method metadata values are moved.
+        :type blobs: Optional[BlobStore]
         """
-        data = self.__dict__
-        data["qna"] = [qa.__dict__ for qa in self.qna]
-        data["attachments"] = [att.__dict__ for att in self.attachments]
-        path.write_text(yaml.safe_dump(data, sort_keys=False))
+        write_document(path, self.to_dict(blobs=blobs))
 
 
+@slotted
 @dataclass
 class Tree:
     """
@@ -118,6 +230,7 @@ class Tree:
     children: dict[str, List[int]]
 
 
+@slotted
 @dataclass
 class NodeData:
     """
@@ -132,6 +245,7 @@ class NodeData:
     tags: List[str]
 
 
+@slotted
 @dataclass
 class IdeaMetadata:
     """
@@ -163,6 +277,6 @@ class IdeaMetadata:
             "title": self.title,
             "created_by": self.created_by,
             "created_at": self.created_at,
-            "tree": self.tree.__dict__,
-            "node_data": {k: v.__dict__ for k, v in self.node_data.items()},
+            "tree": as_dict(self.tree),
+            "node_data": {k: as_dict(v) for k, v in self.node_data.items()},
         }
@@ -0,0 +1,345 @@
+"""
+evolving_ideas.domain.repositories.catalog
+"""
+
+import json
+import logging
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+from evolving_ideas.common.ids import ID_PREFIX, ULID_LENGTH, ulid_bound
+from evolving_ideas.domain.models.idea import IdeaVersion
+
+logger = logging.getLogger(__name__)
+
+
+SORTABLE_COLUMNS = ("id", "title", "author", "created_at", "current_version", "method")
+
+_COLUMNS = "id, title, author, created_at, current_version, method, tags"
+# Sortable IDs all have this length; shorter ones predate them and are
+# looked up by their created_at column instead.
+_SORTABLE_ID_LENGTH = len(ID_PREFIX) + ULID_LENGTH
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ideas (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    author TEXT,
+    created_at TEXT NOT NULL,
+    current_version INTEGER NOT NULL,
+    method TEXT,
+    tags TEXT NOT NULL DEFAULT '[]'
+);
+CREATE TABLE IF NOT EXISTS idea_tags (
+    idea_id TEXT NOT NULL REFERENCES ideas(id) ON DELETE CASCADE,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (idea_id, tag)
+);
+CREATE INDEX IF NOT EXISTS ix_ideas_author ON ideas(author);
+CREATE INDEX IF NOT EXISTS ix_ideas_created_at ON ideas(created_at);
+CREATE INDEX IF NOT EXISTS ix_ideas_method ON ideas(method);
+CREATE INDEX IF NOT EXISTS ix_idea_tags_tag ON idea_tags(tag);
+"""
+
+
+@dataclass
+class CatalogEntry:
+    """
+    Represents a single row of the idea catalog.
+
+    :cvar id: str: Unique identifier for the idea.
+    :cvar title: str: The title of the idea.
+    :cvar author: str: The author of the idea.
+    :cvar created_at: str: The timestamp when the idea was created.
+    :cvar current_version: int: The current version number of the idea.
+    :cvar method: Optional[str]: The method used by the current version.
+    :cvar tags: List[str]: Tags of the current version.
+    """
+
+    id: str
+    title: str
+    author: Optional[str]
+    created_at: str
+    current_version: int
+    method: Optional[str] = None
+    tags: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_metadata(
+        cls, metadata: dict, version: Optional[IdeaVersion] = None
+    ) -> "CatalogEntry":
+        """
+        Build a catalog entry from an idea's metadata and its current version.
+
+        :param metadata: The idea metadata as stored in ``metadata.yaml``.
+        :type metadata: dict
+
+        :param version: The current version of the idea, if available.
+        :type version: Optional[IdeaVersion]
+
+        :return: The catalog entry for the idea.
+        :rtype: CatalogEntry
+        """
+        return cls(
+            id=metadata["id"],
+            title=metadata["title"],
+            author=metadata.get("created_by"),
+            created_at=metadata["created_at"],
+            current_version=int(metadata["tree"]["current"]),
+            method=version.method if version else None,
+            tags=list(version.tags) if version and version.tags else [],
+        )
+
+
+class IdeaCatalog:
+    """
+    SQLite-backed index of the ideas in a store.
+    It mirrors the fields needed for listing, filtering and sorting so those
+    operations do not need to open every ``metadata.yaml``.
+    """
+
+    def __init__(self, path: Path):
+        """
+        :param path: The path of the SQLite catalog file.
+        :type path: Path
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.created = not self.path.exists()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA foreign_keys = ON")
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _write(conn: sqlite3.Connection, entry: CatalogEntry):
+        conn.execute(
+            "INSERT OR REPLACE INTO ideas "
+            "(id, title, author, created_at, current_version, method, tags) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                entry.id,
+                entry.title,
+                entry.author,
+                entry.created_at,
+                entry.current_version,
+                entry.method,
+                json.dumps(entry.tags),
+            ),
+        )
+        conn.execute("DELETE FROM idea_tags WHERE idea_id = ?", (entry.id,))
+        conn.executemany(
+            "INSERT OR IGNORE INTO idea_tags (idea_id, tag) VALUES (?, ?)",
+            [(entry.id, tag) for tag in entry.tags],
+        )
+
+    def upsert(self, entry: CatalogEntry):
+        """
+        Insert or update a catalog entry.
+
+        :param entry: The entry to store.
+        :type entry: CatalogEntry
+        """
+        with self._connect() as conn:
+            self._write(conn, entry)
+
+    def remove(self, idea_id: str):
+        """
+        Remove an idea from the catalog.
+
+        :param idea_id: The unique identifier of the idea.
+        :type idea_id: str
+        """
+        with self._connect() as conn:
+            conn.execute("DELETE FROM ideas WHERE id = ?", (idea_id,))
+
+    def replace_all(self, entries: Iterable[CatalogEntry]) -> int:
+        """
+        Replace the whole catalog content in a single transaction.
+
+        :param entries: The entries to store.
+        :type entries: Iterable[CatalogEntry]
+
+        :return: The number of entries written.
+        :rtype: int
+        """
+        count = 0
+        with self._connect() as conn:
+            conn.execute("DELETE FROM ideas")
+            for entry in entries:
+                self._write(conn, entry)
+                count += 1
+        return count
+
+    def get(self, idea_id: str) -> Optional[CatalogEntry]:
+        """
+        Get a catalog entry by idea ID.
+
+        :param idea_id: The unique identifier of the idea.
+        :type idea_id: str
+
+        :return: The entry, or None if the idea is not indexed.
+        :rtype: Optional[CatalogEntry]
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT {_COLUMNS} FROM ideas WHERE id = ?",
+                (idea_id,),
+            ).fetchone()
+        return self._to_entry(row) if row else None
+
+    def query(
+        self,
+        author: Optional[str] = None,
+        method: Optional[str] = None,
+        tag: Optional[str] = None,
+        order_by: str = "created_at",
+        descending: bool = False,
+        limit: Optional[int] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[CatalogEntry]:
+        """
+        Query the catalog.
+        Creation time ranges are resolved as a range scan over the sortable
+        idea IDs.
+
+        :param author: Only return ideas created by this author.
+        :type author: Optional[str]
+
+        :param method: Only return ideas whose current version used this method.
+        :type method: Optional[str]
+
+        :param tag: Only return ideas whose current version has this tag.
+        :type tag: Optional[str]
+
+        :param order_by: The column to sort by.
+        :type order_by: str
+
+        :param descending: Whether to sort in descending order.
+        :type descending: bool
+
+        :param limit: The maximum number of entries to return.
+        :type limit: Optional[int]
+
+        :param since: Only return ideas created at or after this time.
+        :type since: Optional[datetime]
+
+        :param until: Only return ideas created at or before this time.
+        :type until: Optional[datetime]
+
+        :return: The matching entries.
+        :rtype: List[CatalogEntry]
+
+        :raises ValueError: If ``order_by`` is not a sortable column.
+        """
+        if order_by not in SORTABLE_COLUMNS:
+            raise ValueError(f"Cannot sort catalog by: {order_by}")
+
+        sql = f"SELECT {_COLUMNS} FROM ideas"
+        clauses, params = [], []
+        if author is not None:
+            clauses.append("author = ?")
+            params.append(author)
+        if method is not None:
+            clauses.append("method = ?")
+            params.append(method)
+        if tag is not None:
+            clauses.append("id IN (SELECT idea_id FROM idea_tags WHERE tag = ?)")
+            params.append(tag)
+        if since is not None or until is not None:
+            clauses.append(
+                "((length(id) = ? AND id BETWEEN ? AND ?)"
+                " OR (length(id) != ? AND created_at BETWEEN ? AND ?))"
+            )
+            params += [
+                _SORTABLE_ID_LENGTH,
+                ID_PREFIX + ulid_bound(since) if since else ID_PREFIX,
+                ID_PREFIX + ulid_bound(until, upper=True) if until else ID_PREFIX + "~",
+                _SORTABLE_ID_LENGTH,
+                since.isoformat() if since else "",
+                until.isoformat() if until else "~",
+            ]
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {order_by} {'DESC' if descending else 'ASC'}, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [self._to_entry(row) for row in rows]
+
+    def recent(self, limit: int) -> List[CatalogEntry]:
+        """
+        Get the most recently created ideas.
+        Sortable IDs are read backwards from the end of the primary key, so
+        only ``limit`` rows are visited.
+
+        :param limit: The number of ideas to return.
+        :type limit: int
+
+        :return: The entries, newest first.
+        :rtype: List[CatalogEntry]
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {_COLUMNS} FROM ideas WHERE length(id) = ? "
+                "ORDER BY id DESC LIMIT ?",
+                (_SORTABLE_ID_LENGTH, int(limit)),
+            ).fetchall()
+            rows += conn.execute(
+                f"SELECT {_COLUMNS} FROM ideas WHERE length(id) != ? "
+                "ORDER BY created_at DESC LIMIT ?",
+                (_SORTABLE_ID_LENGTH, int(limit)),
+            ).fetchall()
+        entries = [self._to_entry(row) for row in rows]
+        entries.sort(key=lambda entry: entry.created_at, reverse=True)
+        return entries[: int(limit)]
+
+    def ids(self) -> List[str]:
+        """
+        List the IDs of all indexed ideas.
+
+        :return: The idea IDs, sorted.
+        :rtype: List[str]
+        """
+        with self._connect() as conn:
+            rows = conn.execute("SELECT id FROM ideas ORDER BY id").fetchall()
+        return [row[0] for row in rows]
+
+    def count(self) -> int:
+        """
+        Count the indexed ideas.
+
+        :return: The number of ideas in the catalog.
+        :rtype: int
+        """
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM ideas").fetchone()[0]
+
+    @staticmethod
+    def _to_entry(row: tuple) -> CatalogEntry:
+        idea_id, title, author, created_at, current, method, tags = row
+        return CatalogEntry(
+            id=idea_id,
+            title=title,
+            author=author,
+            created_at=created_at,
+            current_version=current,
+            method=method,
+            tags=json.loads(tags or "[]"),
+        )
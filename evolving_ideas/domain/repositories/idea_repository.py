@@ -2,14 +2,30 @@
 evolving_ideas.domain.repositories.idea_repository
 """
 
+import logging
 import os
-import uuid
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional
-
-import yaml
+from typing import Iterable, Iterator, List, Optional, Tuple, Type
 
+from evolving_ideas.common.blob_store import BlobStore
+from evolving_ideas.common.codecs import (
+    codec_for,
+    find_document,
+    get_codec,
+    is_document,
+    read_document,
+    write_document,
+)
+from evolving_ideas.common.ids import new_idea_id
 from evolving_ideas.domain.models.idea import (
     IdeaMetadata,
     IdeaVersion,
@@ -17,7 +33,51 @@ from evolving_ideas.domain.models.idea import (
     QAPair,
     Tree,
 )
-from evolving_ideas.domain.services.idea_tree import IdeaTree
+from evolving_ideas.domain.repositories.catalog import CatalogEntry, IdeaCatalog
+from evolving_ideas.domain.repositories.layout import StoreLayout
+from evolving_ideas.domain.services.idea_tree import BLOBS_DIR, IdeaTree
+from evolving_ideas.settings import settings
+
+logger = logging.getLogger(__name__)
+
+ID_ATTEMPTS = 8
+
+EXECUTORS = {"thread": ThreadPoolExecutor, "process": ProcessPoolExecutor}
+
+
+@dataclass
+class LoadResult:
+    """
+    Outcome of loading a single idea during a bulk load.
+
+    :cvar idea_id: str: The unique identifier of the idea.
+    :cvar tree: Optional[IdeaTree]: The loaded idea, if it could be read.
+    :cvar error: Optional[Exception]: The error raised while loading, if any.
+    """
+
+    idea_id: str
+    tree: Optional[IdeaTree] = None
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        """
+        Whether the idea was loaded successfully.
+        """
+        return self.error is None
+
+
+def _load_tree(idea_dir: Path, tree_options: dict, preload_current: bool) -> IdeaTree:
+    """
+    Load an idea tree in a pool worker.
+    Kept at module level so it can be pickled for process pools.
+    """
+    if not idea_dir.exists():
+        raise FileNotFoundError(f"Idea {idea_dir.name} does not exist.")
+    tree = IdeaTree(idea_dir, **tree_options)
+    if preload_current:
+        tree.current_version()
+    return tree
 
 
 class IdeaRepository:
@@ -26,13 +86,69 @@ class IdeaRepository:
     This class provides methods to add, load, and list ideas stored in a directory.
     """
 
-    def __init__(self, store_path: Path):
+    def __init__(
+        self,
+        store_path: Path,
+        catalog_path: Optional[Path] = None,
+        storage_format: Optional[str] = None,
+        blob_threshold: Optional[int] = None,
+        snapshot_interval: Optional[int] = None,
+        shard_depth: int = 0,
+    ):
         """
         :param store_path: The path where ideas will be stored.
         :type store_path: Path
+
+        :param catalog_path: The path of the SQLite catalog index
+            (default is ``<store_path>.catalog.db`` next to the store).
+        :type catalog_path: Optional[Path]
+
+        :param storage_format: The format used for new files (default is "yaml").
+        :type storage_format: Optional[str]
+
+        :param blob_threshold: The encoded size in bytes from which method
+            metadata values are moved to content-addressed blobs. None keeps
+            them inline.
+        :type blob_threshold: Optional[int]
+
+        :param snapshot_interval: When set, child versions are stored as deltas
+            against their parent, with a full snapshot every this many versions
+            along a chain. None stores every version in full.
+        :type snapshot_interval: Optional[int]
+
+        :param shard_depth: The number of hash-prefix directory levels used
+            when creating a new store (default is 0, a flat layout). Existing
+            stores keep the layout recorded in their ``.layout.json``.
+        :type shard_depth: int
         """
         self.store_path = store_path
+        self.codec = get_codec(storage_format)
+        self.blob_threshold = blob_threshold
+        self.snapshot_interval = snapshot_interval
         os.makedirs(self.store_path, exist_ok=True)
+        self.layout = StoreLayout(store_path, shard_depth=shard_depth)
+        if catalog_path is None:
+            catalog_path = store_path.parent / f"{store_path.name}.catalog.db"
+        self.catalog = IdeaCatalog(catalog_path)
+        if self.catalog.created:
+            self.reindex()
+
+    @classmethod
+    def from_settings(cls) -> "IdeaRepository":
+        """
+        Open the idea store configured by ``storage_path`` and the storage
+        settings.
+
+        :return: The idea repository.
+        :rtype: IdeaRepository
+        """
+        return cls(
+            Path(settings.get("storage_path")),
+            storage_format=settings.get("storage_format"),
+            blob_threshold=settings.get("blob_threshold"),
+            snapshot_interval=settings.get("snapshot_interval"),
+            shard_depth=settings.get("shard_depth", 0),
+        )
 
     def add(
         self,
@@ -65,11 +181,10 @@ class IdeaRepository:
         :return: An IdeaTree object representing the newly created idea.
         :rtype: IdeaTree
         """
-        idea_id = f"idea_{str(uuid.uuid4())[:8]}"
-        idea_dir = self.store_path / idea_id
-        os.makedirs(idea_dir, exist_ok=True)
+        created = datetime.now()
+        idea_id, idea_dir = self._allocate_id(created)
 
-        now = datetime.now().isoformat()
+        now = created.isoformat()
         root_version = IdeaVersion(
             id=idea_id,
             version=1,
@@ -87,7 +202,10 @@ class IdeaRepository:
             method=method,
             method_metadata=method_metadata or {},
         )
-        root_version.to_file(idea_dir / "v1.yaml")
+        root_version.to_file(
+            idea_dir / f"v1{self.codec.extension}",
+            blobs=BlobStore(idea_dir / BLOBS_DIR, threshold=self.blob_threshold),
+        )
 
         metadata = IdeaMetadata(
             id=idea_id,
@@ -98,10 +216,34 @@ class IdeaRepository:
             node_data={"1": NodeData(created_at=now, note=task, tags=[])},
         )
 
-        (idea_dir / "metadata.yaml").write_text(
-            yaml.safe_dump(metadata.to_dict(), sort_keys=False)
+        write_document(idea_dir / f"metadata{self.codec.extension}", metadata.to_dict())
+        self.catalog.upsert(
+            CatalogEntry.from_metadata(metadata.to_dict(), root_version)
         )
-        return IdeaTree(idea_dir)
+        return self._tree(idea_dir)
+
+    def _allocate_id(self, created: datetime) -> Tuple[str, Path]:
+        """
+        Allocate a new time-sortable idea ID and create its directory.
+        The directory is created exclusively, so an ID already taken by this
+        or another process is detected and a new one is drawn.
+
+        :param created: The creation time of the idea.
+        :type created: datetime
+
+        :return: The idea ID and its directory.
+        :rtype: Tuple[str, Path]
+
+        :raises RuntimeError: If no free ID could be allocated.
+        """
+        for _ in range(ID_ATTEMPTS):
+            idea_id = new_idea_id(created)
+            try:
+                return idea_id, self.layout.create(idea_id)
+            except FileExistsError:
+                pass
+            logger.warning(f"Idea ID collision on {idea_id}, drawing a new one")
+        raise RuntimeError(f"Could not allocate a free idea ID in {self.store_path}")
 
     def load(self, idea_id: str) -> IdeaTree:
         """
@@ -115,16 +257,291 @@ class IdeaRepository:
 
         :raises FileNotFoundError: If the idea with the given ID does not exist.
         """
-        idea_dir = self.store_path / idea_id
+        idea_dir = self.layout.locate(idea_id)
         if not idea_dir.exists():
             raise FileNotFoundError(f"Idea {idea_id} does not exist.")
-        return IdeaTree(idea_dir)
+        return self._tree(idea_dir)
+
+    def _tree(self, idea_dir: Path) -> IdeaTree:
+        return IdeaTree(idea_dir, **self._tree_options())
+
+    def _tree_options(self) -> dict:
+        return {
+            "catalog": self.catalog,
+            "storage_format": self.codec.name,
+            "blob_threshold": self.blob_threshold,
+            "snapshot_interval": self.snapshot_interval,
+        }
+
+    def _idea_dirs(self) -> Iterator[Path]:
+        """
+        Iterates over the idea directories in the store.
+
+        :return: A generator of idea directories.
+        :rtype: Iterator[Path]
+        """
+        return self.layout.iter_idea_dirs()
+
+    def load_many(
+        self,
+        idea_ids: Iterable[str],
+        workers: Optional[int] = None,
+        executor: str = "thread",
+        preload_current: bool = True,
+    ) -> Iterator[LoadResult]:
+        """
+        Loads many ideas concurrently, yielding each one as soon as it is ready.
+        A failing idea is reported in its LoadResult and does not stop the scan.
+
+        :param idea_ids: The unique identifiers of the ideas to load.
+        :type idea_ids: Iterable[str]
+
+        :param workers: The number of pool workers (default is the CPU count).
+        :type workers: Optional[int]
+
+        :param executor: The pool type, "thread" or "process" (default is "thread").
+        :type executor: str
+
+        :param preload_current: Whether to parse the current version in the worker.
+        :type preload_current: bool
+
+        :return: A generator of LoadResult objects, in completion order.
+        :rtype: Iterator[LoadResult]
+
+        :raises ValueError: If the executor type is not supported.
+        """
+        return self._load_dirs(
+            (self.layout.locate(idea_id) for idea_id in idea_ids),
+            workers=workers,
+            executor=executor,
+            preload_current=preload_current,
+        )
+
+    def iter_all(
+        self,
+        workers: Optional[int] = None,
+        executor: str = "thread",
+        preload_current: bool = True,
+    ) -> Iterator[LoadResult]:
+        """
+        Streams every idea in the store, loading them concurrently.
+
+        :param workers: The number of pool workers (default is the CPU count).
+        :type workers: Optional[int]
+
+        :param executor: The pool type, "thread" or "process" (default is "thread").
+        :type executor: str
+
+        :param preload_current: Whether to parse the current version in the worker.
+        :type preload_current: bool
+
+        :return: A generator of LoadResult objects, in completion order.
+        :rtype: Iterator[LoadResult]
+
+        :raises ValueError: If the executor type is not supported.
+        """
+        return self._load_dirs(
+            self._idea_dirs(),
+            workers=workers,
+            executor=executor,
+            preload_current=preload_current,
+        )
+
+    def _load_dirs(
+        self,
+        idea_dirs: Iterable[Path],
+        workers: Optional[int],
+        executor: str,
+        preload_current: bool,
+    ) -> Iterator[LoadResult]:
+        try:
+            executor_class = EXECUTORS[executor]
+        except KeyError as e:
+            raise ValueError(f"Unsupported executor: {executor}") from e
+        workers = workers or os.cpu_count() or 1
+        return self._run_pool(executor_class, workers, iter(idea_dirs), preload_current)
+
+    def _run_pool(
+        self,
+        executor_class: Type[Executor],
+        workers: int,
+        idea_dirs: Iterator[Path],
+        preload_current: bool,
+    ) -> Iterator[LoadResult]:
+        # Only a bounded window of ideas is in flight at a time, so streaming
+        # a very large store does not queue one future per idea up front.
+        window = workers * 4
+        tree_options = self._tree_options()
+        with executor_class(max_workers=workers) as pool:
+            pending = {}
+
+            def submit_next() -> bool:
+                idea_dir = next(idea_dirs, None)
+                if idea_dir is None:
+                    return False
+                future = pool.submit(
+                    _load_tree, idea_dir, tree_options, preload_current
+                )
+                pending[future] = idea_dir.name
+                return True
+
+            while len(pending) < window and submit_next():
+                pass
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    idea_id = pending.pop(future)
+                    try:
+                        yield LoadResult(idea_id, tree=future.result())
+                    except Exception as e:
+                        logger.warning(f"Failed to load idea {idea_id}: {e}")
+                        yield LoadResult(idea_id, error=e)
+                    submit_next()
 
     def list(self) -> List[str]:
         """
         Lists all ideas stored in the repository.
 
-        :return: A list of idea names (directories) in the store path.
+        :return: A list of idea IDs from the catalog index.
         :rtype: List[str]
         """
-        return [p.name for p in self.store_path.iterdir() if p.is_dir()]
+        return self.catalog.ids()
+
+    def search(
+        self,
+        author: Optional[str] = None,
+        method: Optional[str] = None,
+        tag: Optional[str] = None,
+        order_by: str = "created_at",
+        descending: bool = False,
+        limit: Optional[int] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[CatalogEntry]:
+        """
+        Lists, filters and sorts ideas using the catalog index.
+
+        :param author: Only return ideas created by this author.
+        :type author: Optional[str]
+
+        :param method: Only return ideas whose current version used this method.
+        :type method: Optional[str]
+
+        :param tag: Only return ideas whose current version has this tag.
+        :type tag: Optional[str]
+
+        :param order_by: The catalog column to sort by (default is "created_at").
+        :type order_by: str
+
+        :param descending: Whether to sort in descending order.
+        :type descending: bool
+
+        :param limit: The maximum number of ideas to return.
+        :type limit: Optional[int]
+
+        :param since: Only return ideas created at or after this time.
+        :type since: Optional[datetime]
+
+        :param until: Only return ideas created at or before this time.
+        :type until: Optional[datetime]
+
+        :return: The matching catalog entries.
+        :rtype: List[CatalogEntry]
+        """
+        return self.catalog.query(
+            author=author,
+            method=method,
+            tag=tag,
+            order_by=order_by,
+            descending=descending,
+            limit=limit,
+            since=since,
+            until=until,
+        )
+
+    def recent(self, limit: int) -> List[CatalogEntry]:
+        """
+        Lists the most recently created ideas.
+
+        :param limit: The number of ideas to return.
+        :type limit: int
+
+        :return: The catalog entries, newest first.
+        :rtype: List[CatalogEntry]
+        """
+        return self.catalog.recent(limit)
+
+    def reindex(self) -> int:
+        """
+        Rebuilds the catalog index from the YAML files in the store.
+
+        :return: The number of ideas indexed.
+        :rtype: int
+        """
+        logger.info(f"Rebuilding idea catalog from {self.store_path}")
+        count = self.catalog.replace_all(self._scan_entries())
+        logger.info(f"Indexed {count} ideas into {self.catalog.path}")
+        return count
+
+    def _scan_entries(self):
+        """
+        Reads the catalog entry of every idea directory in the store.
+
+        :return: A generator of catalog entries.
+        :rtype: Iterator[CatalogEntry]
+        """
+        for idea_dir in self._idea_dirs():
+            if find_document(idea_dir, "metadata") is None:
+                continue
+            try:
+                tree = IdeaTree(idea_dir, cache_size=1)
+                current = int(tree.metadata["tree"]["current"])
+                yield CatalogEntry.from_metadata(
+                    tree.metadata,
+                    tree.versions[current] if current in tree.versions else None,
+                )
+            except Exception as e:
+                logger.warning(f"Skipping unreadable idea {idea_dir.name}: {e}")
+
+    def migrate(self, storage_format: str) -> int:
+        """
+        Converts every document in the store to the given format.
+        Each file is rewritten next to the original before the original is
+        removed, so readers always find one complete copy.
+
+        :param storage_format: The target format (e.g. "yaml", "json", "msgpack").
+        :type storage_format: str
+
+        :return: The number of files converted.
+        :rtype: int
+        """
+        target = get_codec(storage_format)
+        converted = 0
+        for idea_dir in self._idea_dirs():
+            for path in sorted(idea_dir.iterdir()):
+                if (
+                    path.name.startswith(".")
+                    or not is_document(path)
+                    or codec_for(path) is target
+                ):
+                    continue
+                write_document(path.with_suffix(target.extension), read_document(path))
+                path.unlink()
+                converted += 1
+        logger.info(
+            f"Converted {converted} files in {self.store_path} to {target.name}"
+        )
+        return converted
+
+    def reshard(self, shard_depth: int) -> int:
+        """
+        Moves every idea to a new directory layout while the store stays
+        readable.
+
+        :param shard_depth: The new number of hash-prefix directory levels.
+        :type shard_depth: int
+
+        :return: The number of ideas moved.
+        :rtype: int
+        """
+        return self.layout.reshard(shard_depth)
@@ -0,0 +1,222 @@
+"""
+evolving_ideas.domain.repositories.layout
+"""
+
+import hashlib
+import json
+import logging
+import os
+import string
+from pathlib import Path
+from typing import Iterator, Optional
+
+from evolving_ideas.common.file_lock import FileLock
+from evolving_ideas.domain.services.journal import LOCK_NAME as JOURNAL_LOCK_NAME
+
+logger = logging.getLogger(__name__)
+
+LAYOUT_NAME = ".layout.json"
+LOCK_NAME = ".layout.lock"
+SHARD_WIDTH = 2
+
+
+def _is_shard(name: str) -> bool:
+    return len(name) == SHARD_WIDTH and all(c in string.hexdigits for c in name)
+
+
+class StoreLayout:
+    """
+    Maps idea IDs to directories in the store.
+    With ``shard_depth`` greater than 0, ideas live under nested directories
+    named after a hash prefix of their ID (e.g. ``3f/a2/idea_xxx``), which
+    keeps every directory small in very large stores.
+    The layout in use is recorded in ``.layout.json`` at the store root and
+    takes precedence over the configured depth. New idea directories are
+    created under the store lock (``.layout.lock``) against the recorded
+    layout, so a process that opened the store before a reshard never
+    creates one in the old layout.
+    """
+
+    def __init__(self, root: Path, shard_depth: int = 0):
+        """
+        :param root: The root directory of the store.
+        :type root: Path
+
+        :param shard_depth: The number of shard levels for a new store.
+        :type shard_depth: int
+        """
+        self.root = root
+        self.layout_path = root / LAYOUT_NAME
+        self.lock_path = root / LOCK_NAME
+        self.shard_depth = shard_depth
+        self.previous_depth: Optional[int] = None
+        if self.layout_path.exists():
+            self._reload()
+        elif next(self.iter_idea_dirs(), None) is None:
+            self._record(shard_depth, None)
+        else:
+            # An existing store without a layout file predates sharding.
+            self._record(0, None)
+            if shard_depth:
+                logger.warning(
+                    f"{root} uses a flat layout; run 'shard-store' to shard it."
+                )
+
+    def _reload(self):
+        recorded = json.loads(self.layout_path.read_text())
+        self.shard_depth = int(recorded["shard_depth"])
+        self.previous_depth = recorded.get("previous_depth")
+
+    def _record(self, depth: int, previous: Optional[int]):
+        tmp_path = self.layout_path.with_name(self.layout_path.name + ".tmp")
+        tmp_path.write_text(
+            json.dumps({"shard_depth": depth, "previous_depth": previous})
+        )
+        os.replace(tmp_path, self.layout_path)
+        self.shard_depth = depth
+        self.previous_depth = previous
+
+    def path_for(self, idea_id: str, depth: Optional[int] = None) -> Path:
+        """
+        Get the directory of an idea in a given layout.
+
+        :param idea_id: The unique identifier of the idea.
+        :type idea_id: str
+
+        :param depth: The number of shard levels (default is the current one).
+        :type depth: Optional[int]
+
+        :return: The idea directory.
+        :rtype: Path
+        """
+        depth = self.shard_depth if depth is None else depth
+        digest = hashlib.sha1(idea_id.encode()).hexdigest()
+        path = self.root
+        for level in range(depth):
+            path = path / digest[level * SHARD_WIDTH : (level + 1) * SHARD_WIDTH]
+        return path / idea_id
+
+    def locate(self, idea_id: str) -> Path:
+        """
+        Resolve the directory of an existing idea.
+        While a store is being resharded, the previous layout is checked too,
+        and a miss re-reads the layout file in case another process resharded
+        the store since this one opened it.
+
+        :param idea_id: The unique identifier of the idea.
+        :type idea_id: str
+
+        :return: The idea directory, or its expected path if it does not exist.
+        :rtype: Path
+        """
+        path = self._find(idea_id)
+        if path is None and self.layout_path.exists():
+            self._reload()
+            path = self._find(idea_id)
+        return path or self.path_for(idea_id)
+
+    def create(self, idea_id: str) -> Path:
+        """
+        Create the directory of a new idea in the current layout.
+
+        :param idea_id: The unique identifier of the idea.
+        :type idea_id: str
+
+        :return: The new idea directory.
+        :rtype: Path
+
+        :raises FileExistsError: If the idea already exists in either layout.
+        """
+        with FileLock(self.lock_path):
+            if self.layout_path.exists():
+                self._reload()
+            idea_dir = self.path_for(idea_id)
+            if self._find(idea_id) is not None:
+                raise FileExistsError(f"Idea {idea_id} already exists")
+            idea_dir.parent.mkdir(parents=True, exist_ok=True)
+            idea_dir.mkdir()
+            return idea_dir
+
+    def _find(self, idea_id: str) -> Optional[Path]:
+        depths = [self.shard_depth]
+        if self.previous_depth is not None:
+            # The current layout is checked again last, in case the idea was
+            # moved between the first two checks.
+            depths += [self.previous_depth, self.shard_depth]
+        for depth in depths:
+            path = self.path_for(idea_id, depth)
+            if path.exists():
+                return path
+        return None
+
+    def iter_idea_dirs(self) -> Iterator[Path]:
+        """
+        Iterate over every idea directory, whatever shard it is in.
+
+        :return: A generator of idea directories.
+        :rtype: Iterator[Path]
+        """
+        yield from self._walk(self.root)
+
+    def _walk(self, directory: Path) -> Iterator[Path]:
+        for entry in os.scandir(directory):
+            if not entry.is_dir() or entry.name.startswith("."):
+                continue
+            if _is_shard(entry.name):
+                yield from self._walk(Path(entry.path))
+            else:
+                yield Path(entry.path)
+
+    def reshard(self, depth: int) -> int:
+        """
+        Move every idea to its directory in a new layout.
+        Ideas are moved one rename at a time and readers check both layouts
+        until the move completes, so the store stays readable throughout.
+        The previous layout stays recorded until a final pass, under the
+        store lock, finds no idea left in it.
+        Each idea is renamed under its journal lock, so no commit is cut in
+        half by the move; a tree opened before the move fails its next
+        commit instead of writing to the old directory.
+
+        :param depth: The new number of shard levels.
+        :type depth: int
+
+        :return: The number of ideas moved.
+        :rtype: int
+        """
+        with FileLock(self.lock_path):
+            if self.layout_path.exists():
+                self._reload()
+            previous = self.previous_depth
+            if previous is None:
+                previous = self.shard_depth
+            self._record(depth, previous)
+        moved = self._move_all()
+        with FileLock(self.lock_path):
+            # Ideas created in the old layout before it was recorded.
+            moved += self._move_all()
+            self._prune(self.root)
+            self._record(depth, None)
+        logger.info(f"Moved {moved} ideas to a {depth}-level layout in {self.root}")
+        return moved
+
+    def _move_all(self) -> int:
+        moved = 0
+        for idea_dir in list(self.iter_idea_dirs()):
+            target = self.path_for(idea_dir.name)
+            if target == idea_dir:
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with FileLock(idea_dir / JOURNAL_LOCK_NAME, create_parents=False):
+                os.rename(idea_dir, target)
+            moved += 1
+        return moved
+
+    def _prune(self, directory: Path):
+        for entry in os.scandir(directory):
+            if entry.is_dir() and _is_shard(entry.name):
+                self._prune(Path(entry.path))
+                try:
+                    os.rmdir(entry.path)
+                except OSError:
+                    pass
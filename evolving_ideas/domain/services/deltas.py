@@ -0,0 +1,134 @@
+"""
+evolving_ideas.domain.services.deltas
+"""
+
+from typing import Any, Optional
+
+DELTA_KEY = "$delta"
+
+
+def is_delta(document: dict) -> bool:
+    """
+    Check whether a stored version document is a delta.
+
+    :param document: The stored document.
+    :type document: dict
+
+    :return: True if the document is a delta against another version.
+    :rtype: bool
+    """
+    return isinstance(document, dict) and DELTA_KEY in document
+
+
+def diff(base: Any, target: Any) -> Optional[dict]:
+    """
+    Compute a structural patch turning ``base`` into ``target``.
+    Dictionaries are diffed key by key and lists of equal length item by item;
+    anything else is replaced as a whole.
+
+    :param base: The original value.
+    :type base: Any
+
+    :param target: The new value.
+    :type target: Any
+
+    :return: The patch, or None if both values are equal.
+    :rtype: Optional[dict]
+    """
+    if base == target:
+        return None
+    if isinstance(base, dict) and isinstance(target, dict):
+        patch = {"set": {}, "patch": {}, "del": [k for k in base if k not in target]}
+        for key, value in target.items():
+            if key not in base:
+                patch["set"][key] = value
+                continue
+            sub = _nested(base[key], value)
+            if sub is not None:
+                patch["patch"][key] = sub
+            elif base[key] != value:
+                patch["set"][key] = value
+        return {"dict": {k: v for k, v in patch.items() if v}}
+    if isinstance(base, list) and isinstance(target, list) and len(base) == len(target):
+        patch = {"set": {}, "patch": {}}
+        for index, (old, new) in enumerate(zip(base, target)):
+            sub = _nested(old, new)
+            if sub is not None:
+                patch["patch"][str(index)] = sub
+            elif old != new:
+                patch["set"][str(index)] = new
+        return {"list": {k: v for k, v in patch.items() if v}}
+    return {"replace": target}
+
+
+def _nested(base: Any, target: Any) -> Optional[dict]:
+    if base == target:
+        return None
+    if isinstance(base, (dict, list)) and type(base) is type(target):
+        sub = diff(base, target)
+        if sub is not None and "replace" not in sub:
+            return sub
+    return None
+
+
+def apply(base: Any, patch: Optional[dict]) -> Any:
+    """
+    Apply a patch produced by :func:`diff`.
+    The base value is not modified; untouched branches are shared.
+
+    :param base: The original value.
+    :type base: Any
+
+    :param patch: The patch to apply.
+    :type patch: Optional[dict]
+
+    :return: The patched value.
+    :rtype: Any
+    """
+    if patch is None:
+        return base
+    if "replace" in patch:
+        return patch["replace"]
+    if "dict" in patch:
+        ops = patch["dict"]
+        result = {k: v for k, v in base.items() if k not in ops.get("del", [])}
+        for key, sub in ops.get("patch", {}).items():
+            result[key] = apply(base[key], sub)
+        result.update(ops.get("set", {}))
+        return result
+    ops = patch["list"]
+    result = list(base)
+    for index, sub in ops.get("patch", {}).items():
+        result[int(index)] = apply(base[int(index)], sub)
+    for index, value in ops.get("set", {}).items():
+        result[int(index)] = value
+    return result
+
+
+def make_delta(base: dict, target: dict, base_version: int, depth: int) -> dict:
+    """
+    Build a stored delta document.
+
+    :param base: The stored document of the base version.
+    :type base: dict
+
+    :param target: The stored document of the new version.
+    :type target: dict
+
+    :param base_version: The version number of the base.
+    :type base_version: int
+
+    :param depth: The number of deltas between the new version and the
+        nearest full snapshot.
+    :type depth: int
+
+    :return: The delta document.
+    :rtype: dict
+    """
+    return {
+        DELTA_KEY: {
+            "base": base_version,
+            "depth": depth,
+            "patch": diff(base, target),
+        }
+    }
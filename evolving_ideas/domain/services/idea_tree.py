@@ -2,11 +2,24 @@
 evolving_ideas.domain.services.ide_tree.py
 """
 
+import copy
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Dict, Iterator, List, Optional
 
-import yaml
-
+from evolving_ideas.common.blob_store import BlobStore
+from evolving_ideas.common.codecs import (
+    find_document,
+    get_codec,
+    read_document,
+)
 from evolving_ideas.domain.models.idea import IdeaVersion
+from evolving_ideas.domain.repositories.catalog import CatalogEntry, IdeaCatalog
+from evolving_ideas.domain.services.deltas import make_delta
+from evolving_ideas.domain.services.journal import WriteJournal
+from evolving_ideas.domain.services.versions import DEFAULT_CACHE_SIZE, LazyVersionMap
+
+BLOBS_DIR = "blobs"
 
 
 class IdeaTree:
@@ -15,27 +28,165 @@ class IdeaTree:
     This class provides methods to manage the idea's versions and metadata.
     """
 
-    def __init__(self, idea_dir: Path):
+    def __init__(
+        self,
+        idea_dir: Path,
+        catalog: Optional[IdeaCatalog] = None,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        storage_format: Optional[str] = None,
+        blob_threshold: Optional[int] = None,
+        snapshot_interval: Optional[int] = None,
+    ):
         """
         :param idea_dir: The directory where the idea and its versions are stored.
         :type idea_dir: Path
+
+        :param catalog: The catalog index to keep up to date, if any.
+        :type catalog: Optional[IdeaCatalog]
+
+        :param cache_size: The maximum number of parsed versions kept in memory.
+        :type cache_size: int
+
+        :param storage_format: The format used for new version files
+            (default is "yaml"). Existing files keep their own format.
+        :type storage_format: Optional[str]
+
+        :param blob_threshold: The encoded size in bytes from which method
+            metadata values are moved to the idea's blob store on write.
+            None keeps them inline.
+        :type blob_threshold: Optional[int]
+
+        :param snapshot_interval: When set, child versions are stored as deltas
+            against their parent and a full snapshot is written once a delta
+            chain reaches this length. None stores every version in full.
+        :type snapshot_interval: Optional[int]
+
+        :raises FileNotFoundError: If the idea has no metadata file.
         """
         self.idea_dir = idea_dir
-        self.meta_path = idea_dir / "metadata.yaml"
-        self.metadata = yaml.safe_load(self.meta_path.read_text())
-        self.versions = self._load_versions()
+        self.catalog = catalog
+        self.codec = get_codec(storage_format)
+        self.snapshot_interval = snapshot_interval
+        self.journal = WriteJournal(idea_dir)
+        self.journal.recover()
+        self._staged: Dict[int, dict] = {}
+        self._staged_current: Optional[IdeaVersion] = None
+        self._in_batch = False
+        self.meta_path = find_document(idea_dir, "metadata")
+        if self.meta_path is None:
+            raise FileNotFoundError(f"No metadata found in {idea_dir}")
+        self.metadata = read_document(self.meta_path)
+        self.blobs = BlobStore(idea_dir / BLOBS_DIR, threshold=blob_threshold)
+        self.versions = LazyVersionMap(
+            idea_dir, cache_size=cache_size, blobs=self.blobs
+        )
+
+    def version_path(self, number: int) -> Path:
+        """
+        Get the path where a new version file is written.
+
+        :param number: The version number.
+        :type number: int
+
+        :return: The version file path in the tree's storage format.
+        :rtype: Path
+        """
+        return self.idea_dir / f"v{number}{self.codec.extension}"
+
+    @contextmanager
+    def batch(self) -> Iterator["IdeaTree"]:
+        """
+        Groups version additions into a single atomic commit.
+        Version files and the metadata are written once, when the block exits;
+        if the block or the commit raises, every staged change is discarded.
+        Nested batches join the outermost one.
+
+        :return: A context manager yielding this tree.
+        :rtype: Iterator[IdeaTree]
+        """
+        if self._in_batch:
+            yield self
+            return
 
-    def _load_versions(self) -> dict:
+        snapshot = copy.deepcopy(self.metadata)
+        self._in_batch = True
+        try:
+            yield self
+            # A failed commit is rolled back too, so that memory never holds
+            # versions that are not on disk.
+            self._commit()
+        except BaseException:
+            self.metadata = snapshot
+            for number in self._staged:
+                self.versions.discard(number)
+            raise
+        finally:
+            self._staged = {}
+            self._staged_current = None
+            self._in_batch = False
+
+    def _commit(self):
+        """
+        Writes the staged version files and the metadata through the journal.
         """
-        Loads all versions of the idea from the directory.
+        if not self._staged:
+            return
+        documents = [
+            (self.version_path(number), document)
+            for number, document in self._staged.items()
+        ]
+        documents.append((self.meta_path, self.metadata))
+        self.journal.commit(documents)
+        for number in self._staged:
+            self.versions.unpin(number)
+        self._update_catalog(self._staged_current)
 
-        :return: A dictionary mapping version numbers to IdeaVersion objects.
-        :rtype: dict
+    def _stage_version(self, version: IdeaVersion):
         """
-        return {
-            int(f.stem[1:]): IdeaVersion.from_file(f)
-            for f in self.idea_dir.glob("v*.yaml")
-        }
+        Stages a version file, as a delta against its parent when enabled.
+
+        :param version: The IdeaVersion object to stage.
+        :type version: IdeaVersion
+        """
+        document = version.to_dict(blobs=self.blobs)
+        stored, depth = document, 0
+        parent = int(version.parent_id) if version.parent_id else None
+        if self.snapshot_interval and parent in self.versions:
+            parent_depth = self.versions.depth(parent) + 1
+            if parent_depth < self.snapshot_interval:
+                depth = parent_depth
+                stored = make_delta(
+                    self.versions.document(parent), document, parent, depth
+                )
+        self._staged[version.version] = stored
+        self._staged_current = version
+        self.versions.pin(version.version, document, depth)
+
+    def current_version(self) -> IdeaVersion:
+        """
+        Loads only the current version of the idea.
+
+        :return: The current IdeaVersion.
+        :rtype: IdeaVersion
+        """
+        return self.versions[int(self.metadata["tree"]["current"])]
+
+    def version_range(
+        self, start: int = 1, end: Optional[int] = None
+    ) -> List[IdeaVersion]:
+        """
+        Loads the versions whose number falls within ``[start, end]``.
+
+        :param start: The first version number to include.
+        :type start: int
+
+        :param end: The last version number to include (default is the latest).
+        :type end: Optional[int]
+
+        :return: The matching versions, ordered by version number.
+        :rtype: List[IdeaVersion]
+        """
+        return self.versions.range(start, end)
 
     def add_version(self, version: IdeaVersion):
         """
@@ -44,13 +195,23 @@ class IdeaTree:
         :param version: The IdeaVersion object to add.
         :type version: IdeaVersion
         """
-        version_file = self.idea_dir / f"v{version.version}.yaml"
-        version.to_file(version_file)
-        self.metadata["tree"]["children"].setdefault(str(version.parent_id), []).append(
-            version.version
-        )
-        self.metadata["tree"]["current"] = version.version
-        self.meta_path.write_text(yaml.safe_dump(self.metadata, sort_keys=False))
+        with self.batch():
+            self._stage_version(version)
+            self.metadata["tree"]["children"].setdefault(
+                str(version.parent_id), []
+            ).append(version.version)
+            self.metadata["tree"]["current"] = version.version
+            self.versions[version.version] = version
+
+    def _update_catalog(self, current: IdeaVersion):
+        """
+        Refresh this idea's entry in the catalog index, if one is attached.
+
+        :param current: The current version of the idea.
+        :type current: IdeaVersion
+        """
+        if self.catalog is not None:
+            self.catalog.upsert(CatalogEntry.from_metadata(self.metadata, current))
 
     def show_tree(self):
         """
@@ -81,20 +242,19 @@ class IdeaTree:
         if new_version.version in self.versions:
             raise ValueError(f"Version {new_version.version} already exists")
 
-        # Save the new version YAML
-        version_file = self.idea_dir / f"v{new_version.version}.yaml"
-        new_version.to_file(version_file)
+        with self.batch():
+            # Stage the new version file
+            self._stage_version(new_version)
 
-        # Update metadata tree structure:
-        parent = (
-            str(new_version.parent_id)
-            if new_version.parent_id
-            else str(self.metadata["tree"]["current"])
-        )
-        if parent not in self.metadata["tree"]["children"]:
-            self.metadata["tree"]["children"][parent] = []
-        self.metadata["tree"]["children"][parent].append(new_version.version)
+            # Update metadata tree structure:
+            parent = (
+                str(new_version.parent_id)
+                if new_version.parent_id
+                else str(self.metadata["tree"]["current"])
+            )
+            if parent not in self.metadata["tree"]["children"]:
+                self.metadata["tree"]["children"][parent] = []
+            self.metadata["tree"]["children"][parent].append(new_version.version)
 
-        self.metadata["tree"]["current"] = new_version.version
-        self.versions[new_version.version] = new_version
-        self.meta_path.write_text(yaml.safe_dump(self.metadata, sort_keys=False))
+            self.metadata["tree"]["current"] = new_version.version
+            self.versions[new_version.version] = new_version
@@ -0,0 +1,155 @@
+"""
+evolving_ideas.domain.services.journal
+"""
+
+import json
+import logging
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from evolving_ideas.common.codecs import TMP_SUFFIX, stage_document, staged_path
+from evolving_ideas.common.file_lock import FileLock, fsync_directory
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_NAME = ".journal.json"
+LOCK_NAME = ".journal.lock"
+
+
+class WriteJournal:
+    """
+    Makes a group of document writes in an idea directory atomic.
+    Every document is staged to a temporary file, then a journal listing the
+    pending renames is written; that journal is the commit point. Once the
+    renames are done the journal is removed.
+    Commits and recoveries of the same idea hold a lock file, so a process
+    opening the idea never discards the files another one is staging, and
+    the staged files are flushed to disk before the journal is renamed.
+    The lock is never taken in a missing directory: an idea moved by a
+    reshard fails its next commit instead of being recreated where it was.
+    """
+
+    def __init__(self, idea_dir: Path):
+        """
+        :param idea_dir: The directory where the idea is stored.
+        :type idea_dir: Path
+        """
+        self.idea_dir = idea_dir
+        self.path = idea_dir / JOURNAL_NAME
+        self.lock_path = idea_dir / LOCK_NAME
+
+    def commit(self, documents: List[Tuple[Path, dict]]):
+        """
+        Atomically write a group of documents.
+
+        :param documents: The final paths and documents to write.
+        :type documents: List[Tuple[Path, dict]]
+
+        :raises FileNotFoundError: If the idea directory was moved, e.g. by
+            a reshard; nothing is written then.
+        :raises OSError: If staging fails; nothing is written then.
+        """
+        with self._locked():
+            tmp_journal = self.path.with_name(self.path.name + TMP_SUFFIX)
+            try:
+                renames = [
+                    (stage_document(path, document, sync=True).name, path.name)
+                    for path, document in documents
+                ]
+                with open(tmp_journal, "w", encoding="utf-8") as f:
+                    json.dump({"renames": renames}, f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                # The staged files must be on disk before the journal says so.
+                fsync_directory(self.idea_dir)
+                os.replace(tmp_journal, self.path)
+            except BaseException:
+                # Nothing was committed; drop what was staged.
+                for path, _ in documents:
+                    staged_path(path).unlink(missing_ok=True)
+                tmp_journal.unlink(missing_ok=True)
+                raise
+            fsync_directory(self.idea_dir)
+            self._apply(renames)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        moved = f"{self.idea_dir} no longer exists; reopen the idea"
+        lock = FileLock(self.lock_path, create_parents=False)
+        try:
+            lock.acquire()
+        except FileNotFoundError:
+            raise FileNotFoundError(moved) from None
+        try:
+            # The directory may have been moved while this process waited.
+            if not self.idea_dir.is_dir():
+                raise FileNotFoundError(moved)
+            yield
+        finally:
+            lock.release()
+
+    def _apply(self, renames: List[Tuple[str, str]]):
+        for tmp_name, final_name in renames:
+            tmp_path = self.idea_dir / tmp_name
+            # Already renamed if an earlier replay was interrupted.
+            if tmp_path.exists():
+                os.replace(tmp_path, self.idea_dir / final_name)
+        self.path.unlink(missing_ok=True)
+
+    def pending(self) -> bool:
+        """
+        Check, without taking the lock, whether a commit left a journal or
+        staged files behind.
+
+        :return: True if there may be a commit to finish or undo.
+        :rtype: bool
+        """
+        try:
+            with os.scandir(self.idea_dir) as entries:
+                return any(
+                    entry.name == JOURNAL_NAME
+                    or (entry.name.startswith(".") and entry.name.endswith(TMP_SUFFIX))
+                    for entry in entries
+                )
+        except FileNotFoundError:
+            return False
+
+    def recover(self) -> Optional[str]:
+        """
+        Finish or undo a commit that was interrupted.
+        A commit whose journal was written is replayed; staged files without
+        a journal are discarded. The lock is only taken when something is
+        pending, so opening a clean idea writes nothing.
+
+        :return: "replayed", "rolled_back", or None if nothing was pending.
+        :rtype: Optional[str]
+        """
+        if not self.pending():
+            return None
+        with self._locked():
+            return self._recover()
+
+    def _recover(self) -> Optional[str]:
+        if self.path.exists():
+            try:
+                renames = json.loads(self.path.read_text())["renames"]
+            except FileNotFoundError:
+                renames = []
+            except (ValueError, KeyError):
+                # The journal rename is atomic, so this only happens if the
+                # file was damaged afterwards; the staged files are dropped.
+                renames = None
+            if renames:
+                logger.warning(f"Replaying interrupted commit in {self.idea_dir}")
+                self._apply(renames)
+                return "replayed"
+            self.path.unlink(missing_ok=True)
+        stale = list(self.idea_dir.glob(f".*{TMP_SUFFIX}"))
+        for tmp_path in stale:
+            tmp_path.unlink(missing_ok=True)
+        if stale:
+            logger.warning(f"Rolled back interrupted commit in {self.idea_dir}")
+            return "rolled_back"
+        return None
@@ -0,0 +1,250 @@
+"""
+evolving_ideas.domain.services.versions
+"""
+
+import copy
+from collections import OrderedDict
+from collections.abc import Mapping
+from pathlib import Path
+from threading import RLock
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from evolving_ideas.common.blob_store import BlobStore
+from evolving_ideas.common.codecs import find_document, is_document, read_document
+from evolving_ideas.domain.models.idea import IdeaVersion
+from evolving_ideas.domain.services.deltas import DELTA_KEY, apply, is_delta
+
+DEFAULT_CACHE_SIZE = 32
+
+
+class LazyVersionMap(Mapping):
+    """
+    Read-on-demand mapping of version numbers to IdeaVersion objects.
+    Version numbers are discovered from file names only, in any storage
+    format; a version file is parsed the first time it is accessed and kept
+    in a bounded LRU. Versions stored as deltas are rebuilt from their base,
+    and rebuilt documents are kept in a second LRU of the same size.
+    """
+
+    def __init__(
+        self,
+        idea_dir: Path,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        blobs: Optional[BlobStore] = None,
+    ):
+        """
+        :param idea_dir: The directory where the idea versions are stored.
+        :type idea_dir: Path
+
+        :param cache_size: The maximum number of parsed versions kept in memory.
+        :type cache_size: int
+
+        :param blobs: The blob store holding externalized method metadata.
+        :type blobs: Optional[BlobStore]
+        """
+        self.idea_dir = idea_dir
+        self.blobs = blobs
+        self.cache_size = max(1, cache_size)
+        self._paths: Dict[int, Optional[Path]] = dict(self._scan())
+        self._cache: "OrderedDict[int, IdeaVersion]" = OrderedDict()
+        self._documents: "OrderedDict[int, Tuple[dict, int]]" = OrderedDict()
+        self._pinned: Dict[int, Tuple[dict, int]] = {}
+        self._lock = RLock()
+
+    def __getstate__(self) -> dict:
+        state = dict(self.__dict__)
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._lock = RLock()
+
+    def _scan(self) -> Iterator[Tuple[int, Path]]:
+        for f in self.idea_dir.glob("v*.*"):
+            if f.stem[1:].isdigit() and is_document(f):
+                yield int(f.stem[1:]), f
+
+    def path_for(self, number: int) -> Path:
+        """
+        Get the file path of a version.
+
+        :param number: The version number.
+        :type number: int
+
+        :return: The path of the version file.
+        :rtype: Path
+
+        :raises KeyError: If the version file does not exist.
+        """
+        path = self._paths.get(number)
+        if path is None or not path.exists():
+            path = find_document(self.idea_dir, f"v{number}")
+            if path is None:
+                raise KeyError(number)
+            self._paths[number] = path
+        return path
+
+    def _remember(self, number: int, version: IdeaVersion):
+        self._cache[number] = version
+        self._cache.move_to_end(number)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _resolve(self, number: int) -> Tuple[dict, int]:
+        with self._lock:
+            if number in self._pinned:
+                return self._pinned[number]
+            if number in self._documents:
+                self._documents.move_to_end(number)
+                return self._documents[number]
+            stored = read_document(self.path_for(number))
+            if is_delta(stored):
+                header = stored[DELTA_KEY]
+                base, _ = self._resolve(int(header["base"]))
+                resolved = (apply(base, header["patch"]), int(header["depth"]))
+            else:
+                resolved = (stored, 0)
+            self._documents[number] = resolved
+            while len(self._documents) > self.cache_size:
+                self._documents.popitem(last=False)
+            return resolved
+
+    def document(self, number: int) -> dict:
+        """
+        Get the full stored document of a version, rebuilding deltas.
+        The returned document is shared with the cache and must not be modified.
+
+        :param number: The version number.
+        :type number: int
+
+        :return: The stored document.
+        :rtype: dict
+        """
+        return self._resolve(number)[0]
+
+    def depth(self, number: int) -> int:
+        """
+        Get the number of deltas between a version and its nearest full snapshot.
+
+        :param number: The version number.
+        :type number: int
+
+        :return: 0 for a full snapshot, otherwise the delta chain length.
+        :rtype: int
+        """
+        return self._resolve(number)[1]
+
+    def __getitem__(self, number: int) -> IdeaVersion:
+        with self._lock:
+            if number in self._cache:
+                self._cache.move_to_end(number)
+                return self._cache[number]
+            if number not in self._paths:
+                raise KeyError(number)
+            version = IdeaVersion.from_dict(
+                copy.deepcopy(self.document(number)), blobs=self.blobs
+            )
+            self._remember(number, version)
+            return version
+
+    def __setitem__(self, number: int, version: IdeaVersion):
+        with self._lock:
+            self._paths.setdefault(number, None)
+            self._remember(number, version)
+
+    def pin(self, number: int, document: dict, depth: int = 0):
+        """
+        Keep the full document of a version that is not written yet.
+
+        :param number: The version number.
+        :type number: int
+
+        :param document: The full stored document of the version.
+        :type document: dict
+
+        :param depth: The delta chain depth the version is written with.
+        :type depth: int
+        """
+        with self._lock:
+            self._paths.setdefault(number, None)
+            self._pinned[number] = (document, depth)
+
+    def unpin(self, number: int):
+        """
+        Release a pinned document once its version file is written.
+
+        :param number: The version number.
+        :type number: int
+        """
+        with self._lock:
+            pinned = self._pinned.pop(number, None)
+            if pinned is not None:
+                self._documents[number] = pinned
+                while len(self._documents) > self.cache_size:
+                    self._documents.popitem(last=False)
+
+    def discard(self, number: int):
+        """
+        Forget a version that was registered but never written.
+
+        :param number: The version number.
+        :type number: int
+        """
+        with self._lock:
+            self._pinned.pop(number, None)
+            self._documents.pop(number, None)
+            self._cache.pop(number, None)
+            self._paths.pop(number, None)
+
+    def __contains__(self, number: object) -> bool:
+        return number in self._paths
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(sorted(self._paths))
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def numbers(self) -> List[int]:
+        """
+        List the known version numbers without parsing any file.
+
+        :return: The sorted version numbers.
+        :rtype: List[int]
+        """
+        return sorted(self._paths)
+
+    def range(self, start: int = 1, end: Optional[int] = None) -> List[IdeaVersion]:
+        """
+        Load the versions whose number falls within ``[start, end]``.
+
+        :param start: The first version number to include.
+        :type start: int
+
+        :param end: The last version number to include (default is the latest).
+        :type end: Optional[int]
+
+        :return: The matching versions, ordered by version number.
+        :rtype: List[IdeaVersion]
+        """
+        return [
+            self[n] for n in self.numbers() if n >= start and (end is None or n <= end)
+        ]
+
+    def cached(self) -> List[int]:
+        """
+        List the version numbers currently held in the LRU.
+
+        :return: The cached version numbers, least recently used first.
+        :rtype: List[int]
+        """
+        return list(self._cache)
+
+    def clear_cache(self):
+        """
+        Drop every parsed version from memory.
+        """
+        with self._lock:
+            self._cache.clear()
+            self._documents.clear()
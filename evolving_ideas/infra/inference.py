@@ -0,0 +1,235 @@
+"""
+evolving_ideas.infra.inference
+"""
+
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+import torch
+from transformers import AutoConfig, AutoModelForCausalLM, AutoTokenizer
+
+from evolving_ideas.settings import settings
+
+logger = logging.getLogger(__name__)
+
+DTYPES = {"float32": torch.float32, "bfloat16": torch.bfloat16}
+RUNTIMES = ("torch", "onnx")
+
+# Artifacts produced next to a downloaded checkpoint by :func:`export_model`.
+INT8_FILE = "model_int8.pt"
+ONNX_DIR = "onnx"
+ONNX_INT8_FILE = "model_quantized.onnx"
+
+
+def bf16_supported() -> bool:
+    """
+    Check whether the CPU has native bfloat16 kernels.
+
+    :return: True if bfloat16 matmuls are accelerated.
+    :rtype: bool
+    """
+    try:
+        # pylint: disable=protected-access
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        return False
+
+
+@dataclass
+class InferenceOptions:
+    """
+    How the local model runs on the CPU.
+
+    ``dtype`` is ``float32``, ``bfloat16`` or ``auto`` (bfloat16 where the
+    CPU supports it). ``quantize`` applies dynamic int8 quantization to the
+    linear layers, which keeps float32 activations. ``runtime`` is ``torch``
+    or ``onnx``, the latter requiring the ``optimum[onnxruntime]`` package.
+    """
+
+    threads: Optional[int] = None
+    dtype: str = "float32"
+    quantize: bool = False
+    runtime: str = "torch"
+
+    @classmethod
+    def from_settings(cls) -> "InferenceOptions":
+        """
+        Read the options configured under ``llm.inference``.
+
+        :return: The inference options.
+        :rtype: InferenceOptions
+        """
+        return cls(
+            threads=settings.get("llm.inference.threads"),
+            dtype=settings.get("llm.inference.dtype", "float32"),
+            quantize=bool(settings.get("llm.inference.quantize", False)),
+            runtime=settings.get("llm.inference.runtime", "torch"),
+        )
+
+    @property
+    def torch_dtype(self) -> torch.dtype:
+        """
+        The dtype the model weights are loaded in.
+
+        :return: The torch dtype.
+        :rtype: torch.dtype
+
+        :raises ValueError: If the dtype is not supported.
+        """
+        if self.dtype == "auto":
+            return torch.bfloat16 if bf16_supported() else torch.float32
+        if self.dtype not in DTYPES:
+            raise ValueError(
+                f"Unsupported dtype: {self.dtype} (use {', '.join(DTYPES)} or auto)"
+            )
+        return DTYPES[self.dtype]
+
+    def validate(self):
+        """
+        Check that the options can be combined.
+
+        :raises ValueError: If an option is unsupported or conflicts with
+            another.
+        """
+        if self.runtime not in RUNTIMES:
+            raise ValueError(
+                f"Unsupported runtime: {self.runtime} (use {', '.join(RUNTIMES)})"
+            )
+        if self.quantize and self.runtime == "torch" and self.dtype == "bfloat16":
+            raise ValueError("Dynamic int8 quantization requires float32 weights.")
+        if self.threads is not None and self.threads < 1:
+            raise ValueError("The thread count must be at least 1.")
+
+
+def _optimum():
+    try:
+        # pylint: disable=import-outside-toplevel
+        from optimum.onnxruntime import ORTModelForCausalLM
+    except ImportError as e:
+        raise ValueError(
+            "The onnx runtime requires the 'optimum[onnxruntime]' package to be "
+            "installed."
+        ) from e
+    return ORTModelForCausalLM
+
+
+def _quantize(model: torch.nn.Module) -> torch.nn.Module:
+    return torch.ao.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+
+
+def _session_options(options: InferenceOptions):
+    # pylint: disable=import-outside-toplevel
+    import onnxruntime
+
+    session_options = onnxruntime.SessionOptions()
+    if options.threads:
+        session_options.intra_op_num_threads = options.threads
+    return session_options
+
+
+def _load_torch(source: str, options: InferenceOptions) -> torch.nn.Module:
+    if not options.quantize:
+        return AutoModelForCausalLM.from_pretrained(
+            source, torch_dtype=options.torch_dtype
+        )
+    artifact = Path(source) / INT8_FILE
+    if artifact.is_file():
+        # The quantized layout is rebuilt, then filled with the saved weights.
+        model = _quantize(
+            AutoModelForCausalLM.from_config(AutoConfig.from_pretrained(source))
+        )
+        model.load_state_dict(torch.load(artifact, weights_only=True))
+        return model
+    logger.info(f"Quantizing {source}; download-model saves the quantized weights")
+    return _quantize(AutoModelForCausalLM.from_pretrained(source))
+
+
+def _load_onnx(source: str, options: InferenceOptions) -> Any:
+    ort_model = _optimum()
+    session_options = _session_options(options)
+    exported = Path(source) / ONNX_DIR
+    if not exported.is_dir():
+        if options.quantize:
+            logger.warning("ONNX int8 weights are only produced by download-model")
+        logger.info(f"Exporting {source} to ONNX; download-model does this once")
+        return ort_model.from_pretrained(
+            source, export=True, session_options=session_options
+        )
+    kwargs = {}
+    if options.quantize:
+        if (exported / ONNX_INT8_FILE).is_file():
+            kwargs["file_name"] = ONNX_INT8_FILE
+        else:
+            logger.warning(f"No {ONNX_INT8_FILE} in {exported}, running float32")
+    return ort_model.from_pretrained(
+        exported, session_options=session_options, **kwargs
+    )
+
+
+def load_model(source: str, options: InferenceOptions) -> Tuple[Any, Any]:
+    """
+    Load a causal language model and its tokenizer for CPU inference,
+    preferring the artifacts :func:`export_model` saved next to a local
+    checkpoint.
+
+    :param source: The model name or local directory.
+    :type source: str
+
+    :param options: The inference options.
+    :type options: InferenceOptions
+
+    :return: The model and the tokenizer.
+    :rtype: Tuple[Any, Any]
+
+    :raises ValueError: If the options are invalid or the ONNX runtime is
+        not installed.
+    """
+    options.validate()
+    if options.threads:
+        torch.set_num_threads(options.threads)
+    tokenizer = AutoTokenizer.from_pretrained(source)
+    if options.runtime == "onnx":
+        return _load_onnx(source, options), tokenizer
+    model = _load_torch(source, options)
+    model.eval()
+    return model, tokenizer
+
+
+def export_model(directory: str, options: InferenceOptions):
+    """
+    Produce the optimized artifact for the inference options next to a
+    saved checkpoint, so that loading the model does no conversion.
+
+    :param directory: The directory of the saved checkpoint.
+    :type directory: str
+
+    :param options: The inference options.
+    :type options: InferenceOptions
+
+    :raises ValueError: If the options are invalid or the ONNX runtime is
+        not installed.
+    """
+    options.validate()
+    directory = Path(directory)
+    if options.runtime == "onnx":
+        exported = directory / ONNX_DIR
+        model = _optimum().from_pretrained(directory, export=True)
+        model.save_pretrained(exported)
+        if options.quantize:
+            # pylint: disable=import-outside-toplevel
+            from optimum.onnxruntime import ORTQuantizer
+            from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+            ORTQuantizer.from_pretrained(model).quantize(
+                save_dir=exported,
+                quantization_config=AutoQuantizationConfig.avx2(is_static=False),
+            )
+        logger.info(f"ONNX model saved to {exported}")
+    elif options.quantize:
+        model = _quantize(AutoModelForCausalLM.from_pretrained(directory))
+        torch.save(model.state_dict(), directory / INT8_FILE)
+        logger.info(f"Quantized weights saved to {directory / INT8_FILE}")
@@ -2,16 +2,40 @@
 evolving_ideas.infra.llm_interface
 """
 
+import asyncio
 from abc import ABC, abstractmethod
+from typing import Iterator, List, Optional
+
+from evolving_ideas.infra.usage import estimate_tokens
 
 
 class LLMInterface(ABC):
     """
     Abstract base class for LLM interfaces.
+    ``generation_params`` holds the parameters the backend generates with;
+    they are part of the response cache key.
+    Backends without native asyncio support get ``aask``/``achat`` running
+    the blocking calls in a worker thread. Backends that set
+    ``supports_batching`` generate ``ask_many`` prompts in true batches.
+    Backends without streaming support yield their whole response as a single
+    chunk from ``stream``/``stream_chat``. ``count_tokens`` estimates token
+    counts unless the backend has its tokenizer at hand.
+    Every call accepts ``params``, the generation parameters of the prompt
+    template (``max_tokens``, ``stop``, ``sample``, ``temperature``,
+    ``return_full_text``), which backends map onto their own and apply over
+    ``generation_params``.
     """
 
+    generation_params: dict = {}
+    supports_batching: bool = False
+
     @abstractmethod
-    def ask(self, prompt: str, context: str = "You are a helpful assistant.") -> str:
+    def ask(
+        self,
+        prompt: str,
+        context: str = "You are a helpful assistant.",
+        params: Optional[dict] = None,
+    ) -> str:
         """
         Ask the LLM a question with a given prompt and context.
 
@@ -21,18 +45,146 @@ class LLMInterface(ABC):
         :param context: Additional context for the LLM (default is "You are a helpful assistant.").
         :type context: str
 
+        :param params: Generation parameters overriding the backend's.
+        :type params: Optional[dict]
+
         :return: The LLM's response.
         :rtype: str
         """
 
     @abstractmethod
-    def chat(self, chatlog: list) -> str:
+    def chat(self, chatlog: list, params: Optional[dict] = None) -> str:
         """
         Start a chat session with the LLM.
 
         :param chatlog: A list of messages to include in the chat context.
         :type chatlog: list
 
+        :param params: Generation parameters overriding the backend's.
+        :type params: Optional[dict]
+
         :return: The LLM's response.
         :rtype: str
         """
+
+    def count_tokens(self, text: str) -> int:
+        """
+        Count the tokens of a text, for usage records.
+
+        :param text: The text.
+        :type text: str
+
+        :return: The number of tokens.
+        :rtype: int
+        """
+        return estimate_tokens(text)
+
+    def ask_many(
+        self,
+        prompts: List[str],
+        contexts: List[str],
+        params: Optional[dict] = None,
+    ) -> List[str]:
+        """
+        Ask the LLM several independent questions.
+
+        :param prompts: The prompts to send to the LLM.
+        :type prompts: List[str]
+
+        :param contexts: The context of each prompt.
+        :type contexts: List[str]
+
+        :param params: Generation parameters overriding the backend's.
+        :type params: Optional[dict]
+
+        :return: The LLM's responses, in prompt order.
+        :rtype: List[str]
+        """
+        return [
+            self.ask(prompt, context, params)
+            for prompt, context in zip(prompts, contexts)
+        ]
+
+    def stream(
+        self,
+        prompt: str,
+        context: str = "You are a helpful assistant.",
+        params: Optional[dict] = None,
+    ) -> Iterator[str]:
+        """
+        Ask the LLM a question and yield the response as it is generated.
+
+        :param prompt: The prompt to send to the LLM.
+        :type prompt: str
+
+        :param context: Additional context for the LLM (default is "You are a helpful assistant.").
+        :type context: str
+
+        :param params: Generation parameters overriding the backend's.
+        :type params: Optional[dict]
+
+        :return: The chunks of the LLM's response.
+        :rtype: Iterator[str]
+        """
+        yield self.ask(prompt, context, params)
+
+    def stream_chat(
+        self, chatlog: list, params: Optional[dict] = None
+    ) -> Iterator[str]:
+        """
+        Continue a chat session and yield the response as it is generated.
+
+        :param chatlog: A list of messages to include in the chat context.
+        :type chatlog: list
+
+        :param params: Generation parameters overriding the backend's.
+        :type params: Optional[dict]
+
+        :return: The chunks of the LLM's response.
+        :rtype: Iterator[str]
+        """
+        yield self.chat(chatlog, params)
+
+    async def aask(
+        self,
+        prompt: str,
+        context: str = "You are a helpful assistant.",
+        params: Optional[dict] = None,
+    ) -> str:
+        """
+        Asynchronously ask the LLM a question with a given prompt and context.
+
+        :param prompt: The prompt to send to the LLM.
+        :type prompt: str
+
+        :param context: Additional context for the LLM (default is "You are a helpful assistant.").
+        :type context: str
+
+        :param params: Generation parameters overriding the backend's.
+        :type params: Optional[dict]
+
+        :return: The LLM's response.
+        :rtype: str
+        """
+        return await asyncio.to_thread(self.ask, prompt, context, params)
+
+    async def achat(self, chatlog: list, params: Optional[dict] = None) -> str:
+        """
+        Asynchronously continue a chat session with the LLM.
+
+        :param chatlog: A list of messages to include in the chat context.
+        :type chatlog: list
+
+        :param params: Generation parameters overriding the backend's.
+        :type params: Optional[dict]
+
+        :return: The LLM's response.
+        :rtype: str
+        """
+        return await asyncio.to_thread(self.chat, chatlog, params)
+
+    async def aclose(self):
+        """
+        Release the resources bound to the running event loop, e.g. pooled
+        HTTP clients. Call it before the loop closes.
+        """
@@ -2,35 +2,355 @@
 evolving_ideas.infra.local_llm
 """
 
-from typing import Optional
+import copy
+from collections import deque
+from threading import Thread
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
 
-from transformers import pipeline
+import torch
+from transformers import DynamicCache, TextIteratorStreamer, pipeline
 
+from evolving_ideas.infra.inference import InferenceOptions, load_model
 from evolving_ideas.infra.llm_interface import LLMInterface
+from evolving_ideas.infra.model_manifest import installed_path
+from evolving_ideas.infra.prefix_cache import (
+    DEFAULT_MAX_BYTES,
+    DEFAULT_MIN_TOKENS,
+    PrefixCache,
+    PrefixEntry,
+    shared_prefix,
+)
+from evolving_ideas.settings import settings
+
+# Prompts a new prompt is compared with to find a prefix worth caching.
+RECENT_PROMPTS = 8
+
+
+def _cut(text: str, stop: List[str]) -> str:
+    ends = [text.find(sequence) for sequence in stop if sequence in text]
+    return text[: min(ends)] if ends else text
+
+
+def _until_stop(chunks: Iterable[str], stop: List[str]) -> Iterator[str]:
+    if not stop:
+        yield from chunks
+        return
+    # Hold back enough text to catch a stop sequence split across chunks.
+    hold = max(len(sequence) for sequence in stop) - 1
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        cut = _cut(buffer, stop)
+        if len(cut) < len(buffer):
+            if cut:
+                yield cut
+            return
+        if len(buffer) > hold:
+            yield buffer[: len(buffer) - hold]
+            buffer = buffer[len(buffer) - hold :]
+    if buffer:
+        yield buffer
+
+
+def _stream(generate: Callable[[], object], streamer) -> Iterator[str]:
+    errors = []
+
+    def run():
+        try:
+            generate()
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            errors.append(e)
+            # Unblock the consumer, which would otherwise wait forever.
+            streamer.end()
+
+    # Generation runs in a thread and feeds the streamer token by token.
+    worker = Thread(target=run, daemon=True)
+    worker.start()
+    yield from streamer
+    worker.join()
+    if errors:
+        raise errors[0]
 
 
 class LocalLLM(LLMInterface):
     """
     A simple local LLM interface using Hugging Face Transformers.
     This is a naive implementation and can be improved with better prompt formatting.
+    Prompts sharing a long prefix with a recent prompt, or with the rest of
+    their batch, reuse the key/values computed for that prefix from a
+    memory-bounded :class:`PrefixCache` instead of encoding it again.
+    Responses hold only the generated text, cut at the first stop sequence,
+    unless the call's ``params`` set ``return_full_text``.
+    The model is loaded with the :class:`InferenceOptions` configured under
+    ``llm.inference`` (threads, dtype, int8 quantization, ONNX Runtime).
     """
 
-    def __init__(self, model_name: Optional[str] = "tiiuae/falcon-rw-1b"):
+    supports_batching = True
+
+    def __init__(
+        self,
+        model_name: Optional[str] = "tiiuae/falcon-rw-1b",
+        batch_size: int = 8,
+        prefix_cache_bytes: Optional[int] = None,
+        min_prefix_tokens: Optional[int] = None,
+        inference: Optional[InferenceOptions] = None,
+    ):
         """
-        :param model_name: The name of the local model to use.
+        :param model_name: The name of the local model to use, loaded from
+            ``llm.path`` when ``download-model`` installed it there.
         :type model_name: str
+
+        :param batch_size: The number of prompts generated together by
+            ``ask_many``.
+        :type batch_size: int
+
+        :param prefix_cache_bytes: The memory the prefix cache may hold, 0 to
+            disable it (default is the ``llm.prefix_cache.max_bytes`` setting).
+        :type prefix_cache_bytes: Optional[int]
+
+        :param min_prefix_tokens: The shortest prefix worth caching (default
+            is the ``llm.prefix_cache.min_tokens`` setting).
+        :type min_prefix_tokens: Optional[int]
+
+        :param inference: How the model runs on the CPU (default is the
+            ``llm.inference`` settings).
+        :type inference: Optional[InferenceOptions]
         """
+        self.inference = inference or InferenceOptions.from_settings()
+        # The copy installed by download-model loads without network access.
+        source = installed_path(model_name) or model_name
+        model, tokenizer = load_model(str(source), self.inference)
+        self.generator = pipeline("text-generation", model=model, tokenizer=tokenizer)
+        self.generation_params = {"max_new_tokens": 256, "do_sample": True}
+        self.batch_size = batch_size
 
-        self.generator = pipeline("text-generation", model=model_name)
+        # Batches are padded on the left so every prompt ends where generation
+        # starts; causal models often ship without a pad token.
+        tokenizer = self.generator.tokenizer
+        if tokenizer.pad_token_id is None:
+            tokenizer.pad_token_id = self.generator.model.config.eos_token_id
+        tokenizer.padding_side = "left"
 
-    def ask(self, prompt: str, context: str) -> str:
-        full_prompt = f"{context}\n\n{prompt}"
-        result = self.generator(full_prompt, max_new_tokens=256, do_sample=True)[0][
-            "generated_text"
+        if prefix_cache_bytes is None:
+            prefix_cache_bytes = settings.get(
+                "llm.prefix_cache.max_bytes", DEFAULT_MAX_BYTES
+            )
+        if min_prefix_tokens is None:
+            min_prefix_tokens = settings.get(
+                "llm.prefix_cache.min_tokens", DEFAULT_MIN_TOKENS
+            )
+        # ONNX Runtime keeps its key/values inside the session.
+        if self.inference.runtime != "torch":
+            prefix_cache_bytes = 0
+        self.prefix_cache = (
+            PrefixCache(prefix_cache_bytes) if prefix_cache_bytes else None
+        )
+        self.min_prefix_tokens = min_prefix_tokens
+        self._recent = deque(maxlen=RECENT_PROMPTS)
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.generator.tokenizer(text)["input_ids"])
+
+    def _options(self, params: Optional[dict]) -> Tuple[dict, List[str], bool]:
+        """
+        Map the generation parameters of a prompt template onto ``generate``
+        arguments.
+
+        :param params: The template's generation parameters.
+        :type params: Optional[dict]
+
+        :return: The ``generate`` arguments, the stop sequences, and whether
+            to return the prompt with the response.
+        :rtype: Tuple[dict, List[str], bool]
+        """
+        params = params or {}
+        kwargs = dict(self.generation_params)
+        if "max_tokens" in params:
+            kwargs["max_new_tokens"] = params["max_tokens"]
+        if "sample" in params:
+            kwargs["do_sample"] = bool(params["sample"])
+        if "temperature" in params and kwargs.get("do_sample"):
+            kwargs["temperature"] = params["temperature"]
+        stop = [sequence for sequence in params.get("stop") or [] if sequence]
+        if stop:
+            # Generation halts once a stop sequence is produced; the sequence
+            # itself is cut from the response afterwards.
+            kwargs["stop_strings"] = stop
+            kwargs["tokenizer"] = self.generator.tokenizer
+        return kwargs, stop, bool(params.get("return_full_text", False))
+
+    @staticmethod
+    def _finish(full_prompt: str, text: str, stop: List[str], full: bool) -> str:
+        text = _cut(text, stop)
+        return (full_prompt + text if full else text).strip()
+
+    def _prefix(self, full_prompts: List[str]) -> Optional[PrefixEntry]:
+        """
+        Find or encode the prefix shared by a batch of prompts, or by a single
+        prompt and the recent ones.
+
+        :param full_prompts: The prompts about to be generated.
+        :type full_prompts: List[str]
+
+        :return: The prefix entry, or None if no prefix is worth reusing.
+        :rtype: Optional[PrefixEntry]
+        """
+        if self.prefix_cache is None:
+            return None
+        if len(full_prompts) > 1:
+            text = shared_prefix(full_prompts)
+        else:
+            text = max(
+                (shared_prefix([full_prompts[0], recent]) for recent in self._recent),
+                key=len,
+                default="",
+            )
+            self._recent.append(full_prompts[0])
+        cached = self.prefix_cache.lookup(full_prompts[0])
+        if cached is not None and not all(
+            prompt.startswith(cached.text) for prompt in full_prompts
+        ):
+            cached = None
+        if not text or (cached is not None and len(cached.text) >= len(text)):
+            return cached
+
+        input_ids = self.generator.tokenizer(text, return_tensors="pt").input_ids
+        if input_ids.shape[1] < self.min_prefix_tokens:
+            return cached
+        with torch.no_grad():
+            past_key_values = self.generator.model(
+                input_ids, use_cache=True
+            ).past_key_values
+        if isinstance(past_key_values, tuple):
+            past_key_values = DynamicCache.from_legacy_cache(past_key_values)
+        return self.prefix_cache.put(text, input_ids, past_key_values)
+
+    def _generate(
+        self,
+        prefix: PrefixEntry,
+        full_prompts: List[str],
+        kwargs: dict,
+        streamer=None,
+    ) -> List[str]:
+        """
+        Generate prompts starting with a cached prefix, encoding only the rest
+        of each prompt.
+
+        :param prefix: The cached prefix.
+        :type prefix: PrefixEntry
+
+        :param full_prompts: The prompts, all starting with the prefix.
+        :type full_prompts: List[str]
+
+        :param kwargs: The ``generate`` arguments, see :meth:`_options`.
+        :type kwargs: dict
+
+        :param streamer: Receives the tokens as they are generated.
+        :type streamer: Optional[TextIteratorStreamer]
+
+        :return: The generated text of each prompt.
+        :rtype: List[str]
+        """
+        tokenizer = self.generator.tokenizer
+        pad = tokenizer.pad_token_id
+        prefix_ids = prefix.input_ids[0].tolist()
+        suffixes = [
+            tokenizer(prompt[len(prefix.text) :], add_special_tokens=False).input_ids
+            for prompt in full_prompts
         ]
-        return str(result).strip()
+        width = max(len(suffix) for suffix in suffixes)
+        # Padding goes between the prefix and each suffix: the prefix
+        # key/values stay aligned and every row ends where generation starts.
+        input_ids = torch.tensor(
+            [prefix_ids + [pad] * (width - len(s)) + s for s in suffixes]
+        )
+        attention_mask = torch.tensor(
+            [
+                [1] * len(prefix_ids) + [0] * (width - len(s)) + [1] * len(s)
+                for s in suffixes
+            ]
+        )
+        # Generation extends the key/values in place, so the cached ones are
+        # copied.
+        past_key_values = copy.deepcopy(prefix.past_key_values)
+        if len(full_prompts) > 1:
+            past_key_values.batch_repeat_interleave(len(full_prompts))
+        with torch.no_grad():
+            output = self.generator.model.generate(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                past_key_values=past_key_values,
+                pad_token_id=pad,
+                streamer=streamer,
+                **kwargs,
+            )
+        # Decoded the way the pipeline does, so both paths return the same text.
+        results = []
+        for prompt_ids, sequence in zip(input_ids, output):
+            skip = len(tokenizer.decode(prompt_ids, skip_special_tokens=True))
+            results.append(tokenizer.decode(sequence, skip_special_tokens=True)[skip:])
+        return results
 
-    def chat(self, chatlog: list[dict]) -> str:
+    def ask(self, prompt: str, context: str, params: Optional[dict] = None) -> str:
+        return self.ask_many([prompt], [context], params)[0]
+
+    def ask_many(
+        self,
+        prompts: List[str],
+        contexts: List[str],
+        params: Optional[dict] = None,
+    ) -> List[str]:
+        kwargs, stop, full = self._options(params)
+        full_prompts = [
+            f"{context}\n\n{prompt}" for prompt, context in zip(prompts, contexts)
+        ]
+        prefix = self._prefix(full_prompts)
+        if prefix is not None:
+            texts = []
+            for start in range(0, len(full_prompts), self.batch_size):
+                batch = full_prompts[start : start + self.batch_size]
+                texts.extend(self._generate(prefix, batch, kwargs))
+        else:
+            results = self.generator(
+                full_prompts,
+                batch_size=self.batch_size,
+                return_full_text=False,
+                **kwargs,
+            )
+            texts = [str(result[0]["generated_text"]) for result in results]
+        return [
+            self._finish(full_prompt, text, stop, full)
+            for full_prompt, text in zip(full_prompts, texts)
+        ]
+
+    def stream(
+        self, prompt: str, context: str, params: Optional[dict] = None
+    ) -> Iterator[str]:
+        kwargs, stop, _ = self._options(params)
+        full_prompt = f"{context}\n\n{prompt}"
+        streamer = TextIteratorStreamer(
+            self.generator.tokenizer, skip_prompt=True, skip_special_tokens=True
+        )
+        prefix = self._prefix([full_prompt])
+        if prefix is not None:
+            chunks = _stream(
+                lambda: self._generate(prefix, [full_prompt], kwargs, streamer),
+                streamer,
+            )
+        else:
+            chunks = _stream(
+                lambda: self.generator(full_prompt, streamer=streamer, **kwargs),
+                streamer,
+            )
+        yield from _until_stop(chunks, stop)
+
+    def chat(self, chatlog: list[dict], params: Optional[dict] = None) -> str:
         # naive implementation, you can improve prompt formatting later
         conversation = "\n".join([f"{m['role']}: {m['content']}" for m in chatlog])
-        return self.ask(conversation, context="You are a helpful assistant.")
+        return self.ask(conversation, "You are a helpful assistant.", params)
+
+    def stream_chat(
+        self, chatlog: list[dict], params: Optional[dict] = None
+    ) -> Iterator[str]:
+        conversation = "\n".join([f"{m['role']}: {m['content']}" for m in chatlog])
+        return self.stream(conversation, "You are a helpful assistant.", params)
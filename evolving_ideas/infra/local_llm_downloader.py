@@ -3,44 +3,157 @@ evolving_ideas.infra.local_llm_downloader
 """
 
 import logging
+import shutil
+import tarfile
+import tempfile
+from pathlib import Path
 from typing import Optional
 
 from transformers import AutoModelForCausalLM, AutoTokenizer
 
+from evolving_ideas.common.file_lock import FileLock
+from evolving_ideas.infra.inference import InferenceOptions, export_model
+from evolving_ideas.infra.model_manifest import (
+    MANIFEST_FILE,
+    build_manifest,
+    previous_path,
+    verify_install,
+    write_manifest,
+)
+from evolving_ideas.settings import settings
+
 logger = logging.getLogger(__name__)
 
 
-# TODO: This should come from settings or be configurable
-MODEL_NAME = "sshleifer/tiny-gpt2"
-SAVE_DIRECTORY = "./.models/tiny-gpt2"
+def _find_checkpoint(directory: Path) -> Path:
+    # Archives hold the checkpoint at their root or in a single folder.
+    configs = sorted(directory.rglob("config.json"), key=lambda p: len(p.parts))
+    if not configs:
+        raise FileNotFoundError(f"No model checkpoint found in {directory}")
+    return configs[0].parent
+
+
+def _extract(archive: Path, destination: Path):
+    with tarfile.open(archive) as tar:
+        # The "data" filter rejects absolute paths, links out of the archive
+        # and special files.
+        if hasattr(tarfile, "data_filter"):
+            tar.extractall(destination, filter="data")
+        else:
+            tar.extractall(destination)  # nosec B202
 
 
 class LocalLLMDownloader:
     """
     Downloads and saves the local LLM model and tokenizer.
+    The checkpoint is saved in the configured dtype, along with the int8 or
+    ONNX artifact the inference options call for, so that loading the model
+    does no conversion.
+    Installs are staged next to the target directory and swapped in once
+    complete, with a manifest of file sizes and hashes written last; a valid
+    install of the same model and options is left untouched. A lock file
+    next to the target serializes installs, so leftovers of other runs are
+    only removed once their owner is gone.
     """
 
     def __init__(
         self,
-        model_name: Optional[str] = MODEL_NAME,
-        save_directory: str = SAVE_DIRECTORY,
+        model_name: Optional[str] = None,
+        save_directory: Optional[str] = None,
+        inference: Optional[InferenceOptions] = None,
+        offline: Optional[bool] = None,
     ):
-        self.model_name = model_name
-        self.save_directory = save_directory
+        """
+        :param model_name: The name of the model to download (default is the
+            ``llm.model`` setting).
+        :type model_name: Optional[str]
+
+        :param save_directory: The directory to save the model to (default is
+            the ``llm.path`` setting).
+        :type save_directory: Optional[str]
+
+        :param inference: The inference options to produce artifacts for
+            (default is the ``llm.inference`` settings).
+        :type inference: Optional[InferenceOptions]
 
-    def download(self):
+        :param offline: Only use the local Hugging Face cache (default is the
+            ``llm.offline`` setting).
+        :type offline: Optional[bool]
+        """
+        self.model_name = model_name or settings.get("llm.model")
+        self.save_directory = Path(save_directory or settings.get("llm.path"))
+        self.inference = inference or InferenceOptions.from_settings()
+        self.offline = (
+            settings.get("llm.offline", False) if offline is None else offline
+        )
+
+    @property
+    def artifacts(self) -> dict:
+        """
+        The inference options that determine the saved files; the thread
+        count does not.
+
+        :return: The options recorded in the manifest.
+        :rtype: dict
+        """
+        return {
+            "dtype": self.inference.dtype,
+            "quantize": self.inference.quantize,
+            "runtime": self.inference.runtime,
+        }
+
+    def is_installed(self) -> bool:
+        """
+        Check for a complete install of the model with the same options.
+
+        :return: True if every file matches the manifest.
+        :rtype: bool
+        """
+        return verify_install(self.save_directory, self.model_name, self.artifacts)
+
+    def download(self, archive: Optional[str] = None, force: bool = False) -> bool:
         """
         Downloads the model and tokenizer, saving them to the specified directory.
+
+        :param archive: A tarball holding the checkpoint, or a previous
+            install, to install from instead of the Hugging Face Hub.
+        :type archive: Optional[str]
+
+        :param force: Reinstall even if a valid install exists.
+        :type force: bool
+
+        :return: True if the model is installed.
+        :rtype: bool
         """
-        logger.info(f"Downloading model {self.model_name} to {self.save_directory}")
-        try:
-            tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-            model = AutoModelForCausalLM.from_pretrained(self.model_name)
+        if not force and self.is_installed():
+            logger.info(f"Model {self.model_name} is already installed")
+            return True
 
-            tokenizer.save_pretrained(self.save_directory)
-            model.save_pretrained(self.save_directory)
+        target = self.save_directory
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with FileLock(target.with_name(f".{target.name}.lock")):
+            self._recover(target)
+            if not force and self.is_installed():
+                # Installed by a concurrent run while this one waited.
+                logger.info(f"Model {self.model_name} is already installed")
+                return True
+            return self._download(target, archive)
 
-            logger.info(f"Model and tokenizer saved to {self.save_directory}")
+    def _download(self, target: Path, archive: Optional[str]) -> bool:
+        staging = Path(tempfile.mkdtemp(prefix=f".{target.name}.", dir=target.parent))
+        logger.info(f"Downloading model {self.model_name} to {target}")
+        try:
+            if archive:
+                self._install_archive(Path(archive), staging)
+            else:
+                self._install(self.model_name, staging)
+            if not (staging / MANIFEST_FILE).exists():
+                write_manifest(
+                    staging, build_manifest(staging, self.model_name, self.artifacts)
+                )
+            self._replace(staging, target)
+            logger.info(f"Model and tokenizer saved to {target}")
+            return True
         except Exception as e:
             logger.error("❌ Failed to download model.")
             logger.exception(e)
@@ -48,3 +161,92 @@ class LocalLLMDownloader:
             logger.info(
                 "You may need to delete .cache/huggingface/hub/.locks and retry."
             )
+            return False
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def _install(self, source: str, staging: Path):
+        """
+        Save a checkpoint and its artifacts to the staging directory.
+
+        :param source: The model name, or a local checkpoint directory.
+        :type source: str
+
+        :param staging: The staging directory.
+        :type staging: Path
+        """
+        local_only = self.offline or Path(source).is_dir()
+        tokenizer = AutoTokenizer.from_pretrained(source, local_files_only=local_only)
+        # Int8 quantization and the ONNX export start from float32 weights.
+        dtype = None
+        if self.inference.runtime == "torch" and not self.inference.quantize:
+            dtype = self.inference.torch_dtype
+        model = AutoModelForCausalLM.from_pretrained(
+            source, torch_dtype=dtype, local_files_only=local_only
+        )
+
+        tokenizer.save_pretrained(staging)
+        model.save_pretrained(staging)
+        export_model(str(staging), self.inference)
+
+    def _install_archive(self, archive: Path, staging: Path):
+        """
+        Install from a tarball. A previous install of the same model and
+        options is used as is; any other checkpoint is saved like a download.
+
+        :param archive: The tarball.
+        :type archive: Path
+
+        :param staging: The staging directory.
+        :type staging: Path
+        """
+        with tempfile.TemporaryDirectory(
+            prefix=f"{staging.name}.", dir=staging.parent
+        ) as extracted:
+            _extract(archive, Path(extracted))
+            checkpoint = _find_checkpoint(Path(extracted))
+            if verify_install(checkpoint, self.model_name, self.artifacts):
+                logger.info(f"Installing the verified model from {archive}")
+                shutil.rmtree(staging)
+                shutil.move(str(checkpoint), str(staging))
+            else:
+                self._install(str(checkpoint), staging)
+
+    @staticmethod
+    def _recover(target: Path):
+        """
+        Clean up after interrupted runs; only called with the install lock
+        held, so no other run owns the leftovers.
+
+        :param target: The install directory.
+        :type target: Path
+        """
+        previous = previous_path(target)
+        if previous.is_dir() and not target.exists():
+            # Interrupted between the two renames of a swap.
+            logger.warning(f"Restoring the previous install at {target}")
+            previous.rename(target)
+        for stale in target.parent.glob(f".{target.name}.*"):
+            if stale.is_dir():
+                shutil.rmtree(stale, ignore_errors=True)
+
+    @staticmethod
+    def _replace(staging: Path, target: Path):
+        """
+        Swap a complete install in place of the previous one. Until the swap
+        completes, the previous install stays readable at
+        :func:`previous_path` and is restored by the next run if it was
+        interrupted.
+
+        :param staging: The staging directory.
+        :type staging: Path
+
+        :param target: The install directory.
+        :type target: Path
+        """
+        previous = previous_path(target)
+        shutil.rmtree(previous, ignore_errors=True)
+        if target.exists():
+            target.rename(previous)
+        staging.rename(target)
+        shutil.rmtree(previous, ignore_errors=True)
@@ -0,0 +1,315 @@
+"""
+evolving_ideas.infra.local_llm_worker
+"""
+
+import json
+import logging
+import os
+import signal
+import socket
+import socketserver
+import threading
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from evolving_ideas.infra.llm_interface import LLMInterface
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET_PATH = ".storage/llm_worker.sock"
+CONNECT_TIMEOUT = 1.0
+
+
+def _send(sock_file, message: dict):
+    sock_file.write(json.dumps(message).encode("utf-8") + b"\n")
+    sock_file.flush()
+
+
+def _receive(sock_file) -> Optional[dict]:
+    line = sock_file.readline()
+    return json.loads(line) if line else None
+
+
+class LocalLLMWorker:
+    """
+    Long-lived process that loads a local model once and serves generation
+    requests over a Unix domain socket.
+    Requests and responses are newline-delimited JSON objects; generation
+    runs one request at a time since the pipeline is not thread-safe.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        socket_path: str = DEFAULT_SOCKET_PATH,
+        batch_size: int = 8,
+    ):
+        """
+        :param model_name: The name or path of the local model to serve.
+        :type model_name: str
+
+        :param socket_path: The path of the Unix socket to listen on.
+        :type socket_path: str
+
+        :param batch_size: The batch size used for ``ask_many`` requests.
+        :type batch_size: int
+        """
+        # pylint: disable=import-outside-toplevel
+        from evolving_ideas.infra.local_llm_client import LocalLLM
+
+        self.model_name = model_name
+        self.socket_path = Path(socket_path)
+        logger.info(f"Loading local model {model_name}")
+        self.llm = LocalLLM(model_name=model_name, batch_size=batch_size)
+        self._lock = threading.Lock()
+
+    def handle(self, request: dict, reply):
+        """
+        Serve a single request.
+
+        :param request: The decoded request.
+        :type request: dict
+
+        :param reply: A callable sending one response message.
+        :type reply: Callable[[dict], None]
+        """
+        op = request.get("op")
+        if op == "ping":
+            reply(
+                {
+                    "ok": True,
+                    "model": self.model_name,
+                    "generation_params": self.llm.generation_params,
+                }
+            )
+            return
+        params = request.get("params")
+        with self._lock:
+            if op == "ask":
+                reply(
+                    {
+                        "ok": True,
+                        "result": self.llm.ask(
+                            request["prompt"], request["context"], params
+                        ),
+                    }
+                )
+            elif op == "chat":
+                reply({"ok": True, "result": self.llm.chat(request["chatlog"], params)})
+            elif op == "ask_many":
+                reply(
+                    {
+                        "ok": True,
+                        "result": self.llm.ask_many(
+                            request["prompts"], request["contexts"], params
+                        ),
+                    }
+                )
+            elif op in ("stream", "stream_chat"):
+                if op == "stream":
+                    chunks = self.llm.stream(
+                        request["prompt"], request["context"], params
+                    )
+                else:
+                    chunks = self.llm.stream_chat(request["chatlog"], params)
+                for chunk in chunks:
+                    reply({"ok": True, "chunk": chunk})
+                reply({"ok": True, "done": True})
+            else:
+                reply({"ok": False, "error": f"Unknown operation: {op}"})
+
+    def serve_forever(self):
+        """
+        Listen on the socket until interrupted.
+
+        :raises RuntimeError: If the platform has no Unix domain sockets, or
+            another worker already serves the socket.
+        """
+        if not worker_supported():
+            raise RuntimeError(
+                "The local model worker needs Unix domain sockets, "
+                "which this platform does not provide"
+            )
+        worker = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                request = _receive(self.rfile)
+                if request is None:
+                    return
+                try:
+                    worker.handle(request, lambda message: _send(self.wfile, message))
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    logger.exception(e)
+                    _send(self.wfile, {"ok": False, "error": str(e)})
+
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.socket_path.exists():
+            if worker_available(str(self.socket_path)):
+                raise RuntimeError(f"A worker is already serving {self.socket_path}")
+            self.socket_path.unlink()
+        with socketserver.ThreadingUnixStreamServer(
+            str(self.socket_path), Handler
+        ) as server:
+            logger.info(f"Serving {self.model_name} on {self.socket_path}")
+            # Stopping the worker with SIGTERM also removes its socket.
+            signal.signal(signal.SIGTERM, _interrupt)
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                logger.info("Shutting down local model worker")
+            finally:
+                os.unlink(self.socket_path)
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def _request(socket_path: str, message: dict, timeout: Optional[float] = None):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(socket_path)
+        sock.settimeout(timeout)
+        with sock.makefile("rwb") as sock_file:
+            _send(sock_file, message)
+            while True:
+                response = _receive(sock_file)
+                if response is None:
+                    raise ConnectionError("Local model worker closed the connection")
+                if not response.get("ok"):
+                    raise RuntimeError(f"Local model worker: {response.get('error')}")
+                yield response
+                if "chunk" not in response:
+                    return
+
+
+def worker_supported() -> bool:
+    """
+    Check whether the platform provides the Unix domain sockets the worker
+    listens on.
+
+    :return: True if a worker can be served and reached.
+    :rtype: bool
+    """
+    return hasattr(socket, "AF_UNIX")
+
+
+def worker_info(socket_path: str = DEFAULT_SOCKET_PATH) -> Optional[dict]:
+    """
+    Ask a worker which model it serves.
+
+    :param socket_path: The path of the worker socket.
+    :type socket_path: str
+
+    :return: The worker's model and generation parameters, or None if no
+        worker is listening.
+    :rtype: Optional[dict]
+    """
+    if not worker_supported() or not os.path.exists(socket_path):
+        return None
+    try:
+        return next(_request(socket_path, {"op": "ping"}, timeout=CONNECT_TIMEOUT))
+    except (OSError, ValueError, RuntimeError):
+        return None
+
+
+def worker_available(socket_path: str = DEFAULT_SOCKET_PATH) -> bool:
+    """
+    Check whether a worker is listening on a socket.
+
+    :param socket_path: The path of the worker socket.
+    :type socket_path: str
+
+    :return: True if a worker answered.
+    :rtype: bool
+    """
+    return worker_info(socket_path) is not None
+
+
+class WorkerLLM(LLMInterface):
+    """
+    LLM backend delegating generation to a running :class:`LocalLLMWorker`.
+    """
+
+    supports_batching = True
+
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        socket_path: Optional[str] = DEFAULT_SOCKET_PATH,
+        **kwargs,
+    ):
+        """
+        :param model_name: The model expected from the worker (default is
+            whatever it serves).
+        :type model_name: Optional[str]
+
+        :param socket_path: The path of the worker socket.
+        :type socket_path: Optional[str]
+
+        :raises ConnectionError: If no worker is listening, or it serves
+            another model.
+        """
+        socket_path = socket_path or DEFAULT_SOCKET_PATH
+        self.socket_path = socket_path
+        info = worker_info(socket_path)
+        if info is None:
+            raise ConnectionError(f"No local model worker listening on {socket_path}")
+        if model_name and info["model"] != model_name:
+            raise ConnectionError(
+                f"Local model worker serves {info['model']}, not {model_name}"
+            )
+        self.model_name = info["model"]
+        self.generation_params = info["generation_params"]
+
+    def _call(self, message: dict):
+        return next(_request(self.socket_path, message))["result"]
+
+    def ask(
+        self,
+        prompt: str,
+        context: str = "You are a helpful assistant.",
+        params: Optional[dict] = None,
+    ) -> str:
+        return self._call(
+            {"op": "ask", "prompt": prompt, "context": context, "params": params}
+        )
+
+    def chat(self, chatlog: list, params: Optional[dict] = None) -> str:
+        return self._call({"op": "chat", "chatlog": chatlog, "params": params})
+
+    def ask_many(
+        self,
+        prompts: List[str],
+        contexts: List[str],
+        params: Optional[dict] = None,
+    ) -> List[str]:
+        return self._call(
+            {
+                "op": "ask_many",
+                "prompts": prompts,
+                "contexts": contexts,
+                "params": params,
+            }
+        )
+
+    def stream(
+        self,
+        prompt: str,
+        context: str = "You are a helpful assistant.",
+        params: Optional[dict] = None,
+    ) -> Iterator[str]:
+        return self._stream(
+            {"op": "stream", "prompt": prompt, "context": context, "params": params}
+        )
+
+    def stream_chat(
+        self, chatlog: list, params: Optional[dict] = None
+    ) -> Iterator[str]:
+        return self._stream({"op": "stream_chat", "chatlog": chatlog, "params": params})
+
+    def _stream(self, message: dict) -> Iterator[str]:
+        for response in _request(self.socket_path, message):
+            if "chunk" in response:
+                yield response["chunk"]
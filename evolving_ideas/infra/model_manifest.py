@@ -0,0 +1,183 @@
+"""
+evolving_ideas.infra.model_manifest
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+from evolving_ideas.settings import settings
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(path: Path) -> str:
+    """
+    Hash a file without loading it whole.
+
+    :param path: The file.
+    :type path: Path
+
+    :return: The hex SHA-256 digest.
+    :rtype: str
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_manifest(directory: Path, model_name: str, inference: dict) -> dict:
+    """
+    Describe every file of an installed model.
+
+    :param directory: The install directory.
+    :type directory: Path
+
+    :param model_name: The name of the installed model.
+    :type model_name: str
+
+    :param inference: The inference options the artifacts were produced for.
+    :type inference: dict
+
+    :return: The manifest.
+    :rtype: dict
+    """
+    files = {}
+    for path in sorted(directory.rglob("*")):
+        if path.is_file() and path.name != MANIFEST_FILE:
+            files[path.relative_to(directory).as_posix()] = {
+                "size": path.stat().st_size,
+                "sha256": file_digest(path),
+            }
+    return {
+        "model": model_name,
+        "inference": inference,
+        "created_at": time.time(),
+        "files": files,
+    }
+
+
+def write_manifest(directory: Path, manifest: dict):
+    """
+    Write a manifest atomically; it is written last, so its presence marks a
+    complete install.
+
+    :param directory: The install directory.
+    :type directory: Path
+
+    :param manifest: The manifest.
+    :type manifest: dict
+    """
+    path = directory / MANIFEST_FILE
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_manifest(directory: Path) -> Optional[dict]:
+    """
+    Read the manifest of an install.
+
+    :param directory: The install directory.
+    :type directory: Path
+
+    :return: The manifest, or None if there is none or it is unreadable.
+    :rtype: Optional[dict]
+    """
+    try:
+        with open(directory / MANIFEST_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def verify_install(
+    directory: Path,
+    model_name: Optional[str] = None,
+    inference: Optional[dict] = None,
+    check_hashes: bool = True,
+) -> bool:
+    """
+    Check that a directory holds a complete install matching its manifest.
+
+    :param directory: The install directory.
+    :type directory: Path
+
+    :param model_name: The model the install must hold, if any.
+    :type model_name: Optional[str]
+
+    :param inference: The inference options its artifacts must match, if any.
+    :type inference: Optional[dict]
+
+    :param check_hashes: Also hash every file, not only compare sizes.
+    :type check_hashes: bool
+
+    :return: True if the install is valid.
+    :rtype: bool
+    """
+    directory = Path(directory)
+    manifest = read_manifest(directory)
+    if manifest is None:
+        return False
+    if model_name is not None and manifest.get("model") != model_name:
+        logger.debug(f"{directory} holds {manifest.get('model')}, not {model_name}")
+        return False
+    if inference is not None and manifest.get("inference") != inference:
+        logger.debug(f"{directory} was built for other inference options")
+        return False
+    for name, expected in manifest.get("files", {}).items():
+        path = directory / name
+        if not path.is_file() or path.stat().st_size != expected["size"]:
+            logger.debug(f"{path} is missing or truncated")
+            return False
+        if check_hashes and file_digest(path) != expected["sha256"]:
+            logger.debug(f"{path} does not match its hash")
+            return False
+    return True
+
+
+def previous_path(directory: Path) -> Path:
+    """
+    Get where an install is kept while a new one is swapped in.
+
+    :param directory: The install directory.
+    :type directory: Path
+
+    :return: The directory of the previous install.
+    :rtype: Path
+    """
+    directory = Path(directory)
+    return directory.with_name(f".{directory.name}.previous")
+
+
+def installed_path(model_name: str) -> Optional[Path]:
+    """
+    Find the install of a model at ``llm.path``, checking file sizes only so
+    that loading stays fast. While a new install is being swapped in, the
+    previous one is used.
+
+    :param model_name: The name of the model.
+    :type model_name: str
+
+    :return: The install directory, or None if the model is not installed.
+    :rtype: Optional[Path]
+    """
+    path = settings.get("llm.path")
+    if not path:
+        return None
+    for directory in (Path(path), previous_path(Path(path))):
+        if verify_install(directory, model_name, check_hashes=False):
+            return directory
+    return None
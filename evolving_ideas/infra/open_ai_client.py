@@ -2,18 +2,27 @@
 evolving_ideas.infra.open_ai_client
 """
 
+import asyncio
+import hashlib
 import logging
-from functools import wraps
-from typing import Optional
+import os
+import time
+import weakref
+from typing import Iterator, Optional
 
+import httpx
 import openai
 
 from evolving_ideas.common.cache_store import CacheStore
 from evolving_ideas.infra.llm_interface import LLMInterface
+from evolving_ideas.infra.rate_limiter import RequestScheduler, estimate_request_tokens
+from evolving_ideas.infra.usage import report_usage
 from evolving_ideas.interface.presenters import chat_logger
+from evolving_ideas.settings import settings
 
 logger = logging.getLogger(__name__)
-cache = CacheStore()
+
+DEFAULT_MAX_CONNECTIONS = 20
 
 
 class OpenAIClientError(Exception):
@@ -22,43 +31,68 @@ class OpenAIClientError(Exception):
     """
 
 
-class OpenAITransport:
+def get_scheduler() -> RequestScheduler:
     """
-    OpenAI client for interacting with the OpenAI API.
+    Build the request scheduler configured under ``llm.rate_limits``.
+
+    :return: The request scheduler.
+    :rtype: RequestScheduler
     """
+    return RequestScheduler(
+        requests_per_minute=settings.get("llm.rate_limits.requests_per_minute"),
+        tokens_per_minute=settings.get("llm.rate_limits.tokens_per_minute"),
+        max_in_flight=settings.get("llm.rate_limits.max_in_flight", 8),
+        max_retries=settings.get("llm.rate_limits.max_retries", 5),
+    )
 
-    def __init__(self, api_key: Optional[str] = None):
-        """
-        :param api_key: The OpenAI API key.
-        :type api_key: str
 
-        :raises ValueError: If the API key is not provided.
-        """
-        logger.debug("Initializing OpenAITransport with API key.")
-        self.client = openai.OpenAI(api_key=api_key)
-        self.__check_key(api_key)
+def _total_tokens(response) -> Optional[int]:
+    usage = getattr(response, "usage", None)
+    return usage.total_tokens if usage else None
+
 
-    def __check_key(self, api_key: str) -> bool:
+def _chunk_tokens(chunk) -> Optional[int]:
+    # Only the last chunk of a stream carries the usage.
+    return chunk.usage.total_tokens if chunk.usage else None
+
+
+def _content(response) -> str:
+    if response.usage:
+        report_usage(response.usage.prompt_tokens, response.usage.completion_tokens)
+    return response.choices[0].message.content.strip()
+
+
+class OpenAITransport:
+    """
+    OpenAI client for interacting with the OpenAI API.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        scheduler: Optional[RequestScheduler] = None,
+    ):
         """
-        Check if the provided API key is valid.
+        No request is made here; the key is validated lazily by
+        :class:`OpenAICredentialValidator` before the first completion.
+        Completions go through the scheduler, which owns rate limiting and
+        retries, so the client's own retries are disabled.
 
-        :param api_key: The OpenAI API key.
+        :param api_key: The OpenAI API key (default is ``OPENAI_API_KEY``).
         :type api_key: str
 
-        :return: True if the API key is valid, False otherwise.
-        :rtype: bool
+        :param scheduler: The request scheduler (default is built from the
+            ``llm.rate_limits`` settings).
+        :type scheduler: Optional[RequestScheduler]
 
-        :raises ValueError: If the API key is invalid.
+        :raises ValueError: If the API key is not provided.
         """
-
+        logger.debug("Initializing OpenAITransport with API key.")
+        api_key = api_key or os.getenv("OPENAI_API_KEY")
         if api_key is None:
             raise ValueError("API key is required.")
-
-        try:
-            self.client.models.list()
-        except openai.AuthenticationError as e:
-            print(f"Authentication error: {e}")
-            raise ValueError("Invalid API key provided.") from e
+        self.client = openai.OpenAI(api_key=api_key, max_retries=0)
+        self.scheduler = scheduler or get_scheduler()
 
     def get_models(self) -> dict:
         """
@@ -107,7 +141,7 @@ class OpenAITransport:
         }
 
     def chat_completion(
-        self, model: str, messages: list, temperature: float = 0.7
+        self, model: str, messages: list, temperature: float = 0.7, **options
     ) -> dict:
         """
         Chat completion using the OpenAI API.
@@ -121,14 +155,68 @@ class OpenAITransport:
         :param temperature: The temperature for the model (default is 0.7).
         :type temperature: float
 
+        :param options: Further completion arguments, e.g. ``max_tokens`` or
+            ``stop``.
+        :type options: dict
+
         :return: The response from the model.
         :rtype: dict
         """
-        return self.client.chat.completions.create(
-            model=model,
-            messages=messages,
-            temperature=temperature,
+        return self.scheduler.run(
+            lambda: self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                **options,
+            ),
+            estimated_tokens=estimate_request_tokens(
+                messages, options.get("max_tokens")
+            ),
+            usage=_total_tokens,
+        )
+
+    def chat_completion_stream(
+        self, model: str, messages: list, temperature: float = 0.7, **options
+    ) -> Iterator[str]:
+        """
+        Streamed chat completion using the OpenAI API.
+
+        :param model: The model to use (e.g., "gpt-4").
+        :type model: str
+
+        :param messages: The messages to send to the model.
+        :type messages: list
+
+        :param temperature: The temperature for the model (default is 0.7).
+        :type temperature: float
+
+        :param options: Further completion arguments, e.g. ``max_tokens`` or
+            ``stop``.
+        :type options: dict
+
+        :return: The content chunks of the response, as they arrive.
+        :rtype: Iterator[str]
+        """
+        stream = self.scheduler.stream(
+            lambda: self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                stream=True,
+                stream_options={"include_usage": True},
+                **options,
+            ),
+            estimated_tokens=estimate_request_tokens(
+                messages, options.get("max_tokens")
+            ),
+            usage=_chunk_tokens,
         )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+            # The last chunk carries the usage of the whole completion.
+            if chunk.usage:
+                report_usage(chunk.usage.prompt_tokens, chunk.usage.completion_tokens)
 
     def create_thread(self):
         """
@@ -175,68 +263,189 @@ class OpenAITransport:
         )
 
 
-def cached_validation_wrapper(key: str = "valid_api_key"):
+class AsyncOpenAITransport:
     """
-    Decorator to check for a cached validation flag before executing a function.
-
-    :param key: Key in the cached file to verify.
+    Asynchronous OpenAI client for running many completions concurrently.
+    Requests made on the same event loop share one pooled HTTP client.
     """
 
-    def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            cache = CacheStore()
-            cached = cache.get(key)
+    def __init__(
+        self,
+        api_key: Optional[str],
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        scheduler: Optional[RequestScheduler] = None,
+    ):
+        """
+        :param api_key: The OpenAI API key.
+        :type api_key: str
+
+        :param max_connections: The size of the HTTP connection pool.
+        :type max_connections: int
+
+        :param scheduler: The request scheduler, typically shared with the
+            blocking transport (default is built from settings).
+        :type scheduler: Optional[RequestScheduler]
+
+        :raises ValueError: If the API key is not provided.
+        """
+        if api_key is None:
+            raise ValueError("API key is required.")
+        self.api_key = api_key
+        self.max_connections = max_connections
+        self.scheduler = scheduler or get_scheduler()
+        # An HTTP client is bound to the event loop it was first used on.
+        self._clients = weakref.WeakKeyDictionary()
+
+    @property
+    def client(self) -> openai.AsyncOpenAI:
+        """
+        The client for the running event loop.
+
+        :return: The pooled asynchronous client.
+        :rtype: openai.AsyncOpenAI
+        """
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            limits = httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+            )
+            client = openai.AsyncOpenAI(
+                api_key=self.api_key,
+                max_retries=0,
+                http_client=openai.DefaultAsyncHttpxClient(limits=limits),
+            )
+            self._clients[loop] = client
+        return client
+
+    async def chat_completion(
+        self, model: str, messages: list, temperature: float = 0.7, **options
+    ) -> dict:
+        """
+        Chat completion using the OpenAI API.
+
+        :param model: The model to use (e.g., "gpt-4").
+        :type model: str
+
+        :param messages: The messages to send to the model.
+        :type messages: list
+
+        :param temperature: The temperature for the model (default is 0.7).
+        :type temperature: float
 
-            if cached is None:
-                try:
-                    result = func(*args, **kwargs)
-                    cache.set(key, True)
-                    return result
-                except Exception as e:
-                    cache.set(key, False)
-                    raise ValueError(f"Cached validation failed for key: {key}") from e
+        :param options: Further completion arguments, e.g. ``max_tokens`` or
+            ``stop``.
+        :type options: dict
 
-            if cached is False:
-                raise ValueError(f"Cached validation failed for key: {key}")
+        :return: The response from the model.
+        :rtype: dict
+        """
+        return await self.scheduler.arun(
+            lambda: self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                **options,
+            ),
+            estimated_tokens=estimate_request_tokens(
+                messages, options.get("max_tokens")
+            ),
+            usage=_total_tokens,
+        )
 
-            return True  # cached is True
+    async def aclose(self):
+        """
+        Close the client of the running event loop.
+        """
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
 
-        return wrapper
+    async def __aenter__(self) -> "AsyncOpenAITransport":
+        return self
 
-    return decorator
+    async def __aexit__(self, exc_type, exc, traceback):
+        await self.aclose()
 
 
 class OpenAICredentialValidator:
     """
     Validates OpenAI API credentials.
+    The outcome is cached per API key (by hash, never the key itself) for
+    ``ttl`` seconds, so a rotated key is validated again; in offline mode no
+    validation request is made at all.
     """
 
-    def __init__(self, client: openai.OpenAI):
+    def __init__(
+        self,
+        client: openai.OpenAI,
+        ttl: Optional[float] = None,
+        offline: Optional[bool] = None,
+    ):
         """
         :param client: The OpenAI client instance.
         :type client: openai.OpenAI
+
+        :param ttl: How long a validation outcome is trusted, in seconds
+            (default is the ``llm.validation_ttl`` setting).
+        :type ttl: Optional[float]
+
+        :param offline: Skip validation entirely (default is the
+            ``llm.offline`` setting).
+        :type offline: Optional[bool]
         """
         logger.debug("Initializing OpenAICredentialValidator.")
         self.client = client
+        self.ttl = settings.get("llm.validation_ttl", 86400) if ttl is None else ttl
+        self.offline = (
+            settings.get("llm.offline", False) if offline is None else offline
+        )
+        self._validated = False
+
+    @property
+    def cache_key(self) -> str:
+        """
+        The cache entry holding the outcome for the client's API key.
+
+        :return: The cache key.
+        :rtype: str
+        """
+        digest = hashlib.sha256(str(self.client.api_key).encode()).hexdigest()
+        return f"openai_key_{digest[:16]}"
 
-    @cached_validation_wrapper("valid_api_key")
     def validate(self) -> bool:
         """
-        Validate the OpenAI API key.
+        Validate the OpenAI API key, at most once per instance.
 
-        :return: True if the API key is valid, False otherwise.
+        :return: True if the API key is valid (or validation is skipped).
         :rtype: bool
 
         :raises OpenAIClientError: If the API key is invalid.
         """
+        if self._validated or self.offline:
+            return True
+
+        cache = CacheStore()
+        cached = cache.get(self.cache_key)
+        if cached and time.time() - cached.get("checked_at", 0) < self.ttl:
+            if not cached.get("valid"):
+                raise OpenAIClientError("Invalid API key (cached).")
+            self._validated = True
+            return True
+
         try:
             self.client.models.list()
-            cache.set("valid_api_key", True)
-            return True
+            valid = True
         except openai.AuthenticationError as e:
             print(f"Authentication error: {e}")
-            raise OpenAIClientError("Invalid API key.") from e
+            valid = False
+            error = e
+        cache.set(self.cache_key, {"valid": valid, "checked_at": time.time()})
+        if not valid:
+            raise OpenAIClientError("Invalid API key.") from error
+        self._validated = True
+        return True
 
 
 class OpenAILLM(LLMInterface):
@@ -247,40 +456,79 @@ class OpenAILLM(LLMInterface):
     name: str = "openai"
 
     def __init__(
-        self, model="gpt-4.1", transport: Optional[OpenAITransport] = None, **kwargs
+        self,
+        model: Optional[str] = None,
+        transport: Optional[OpenAITransport] = None,
+        async_transport: Optional[AsyncOpenAITransport] = None,
+        **kwargs,
     ):
         """
-        :param model: The model to use (default is "gpt-4.1").
-        :type model: str
+        :param model: The model to use (default is the ``llm.openai.model``
+            setting).
+        :type model: Optional[str]
 
         :param transport: The transport layer for API communication.
         :type transport: OpenAITransport
+
+        :param async_transport: The transport for asynchronous calls (default
+            is created on first use with the same API key).
+        :type async_transport: Optional[AsyncOpenAITransport]
         """
         if transport is None:
             api_key = kwargs.get("api_key")
             transport = OpenAITransport(api_key)
-        self.model = model
+        self.model = model or settings.get("llm.openai.model", "gpt-4.1")
         self.transport = transport
-        self._validator = OpenAICredentialValidator(self.transport.client)
+        self._async_transport = async_transport
+        self.generation_params = {"temperature": 0.7}
+        self._validator = OpenAICredentialValidator(
+            self.transport.client,
+            ttl=kwargs.get("validation_ttl"),
+            offline=kwargs.get("offline"),
+        )
 
         logger.debug(f"Initialized OpenAILLM with model: {self.model}")
 
-        self.__validate()
-
     def __validate(self):
         """
-        Validate the OpenAI API key.
+        Validate the OpenAI API key before the first request.
 
         :raises ValueError: If the API key is invalid.
         """
         try:
             self._validator.validate()
-            logger.debug("OpenAI API key is valid.")
         except OpenAIClientError as e:
             raise ValueError(f"Invalid API key: {e}") from e
 
+    def _request_params(self, params: Optional[dict]) -> dict:
+        """
+        Map the generation parameters of a prompt template onto completion
+        arguments.
+
+        :param params: The template's generation parameters.
+        :type params: Optional[dict]
+
+        :return: The completion arguments.
+        :rtype: dict
+        """
+        params = params or {}
+        request = dict(self.generation_params)
+        if "temperature" in params:
+            request["temperature"] = params["temperature"]
+        if params.get("sample") is False:
+            request["temperature"] = 0
+        if "max_tokens" in params:
+            request["max_tokens"] = params["max_tokens"]
+        if params.get("stop"):
+            # The API accepts up to four stop sequences.
+            request["stop"] = list(params["stop"])[:4]
+        return request
+
     def ask(
-        self, prompt: str, context: Optional[str] = "You are a helpful assistant."
+        self,
+        prompt: str,
+        context: Optional[str] = "You are a helpful assistant.",
+        params: Optional[dict] = None,
     ) -> str:
         """
         Ask the OpenAI model a question and return the answer.
@@ -294,26 +542,162 @@ class OpenAILLM(LLMInterface):
         :param content: The content of the message.
         :type content: str
 
+        :param params: Generation parameters, see :meth:`_request_params`.
+        :type params: Optional[dict]
+
         :return: The answer from the model.
         :rtype: str
         """
+        self.__validate()
         chat_logger.user(prompt)
         messages = [
             {"role": "system", "content": context},
             {"role": "user", "content": prompt},
         ]
-        response = self.transport.chat_completion(model=self.model, messages=messages)
-        return response.choices[0].message.content.strip()
+        response = self.transport.chat_completion(
+            model=self.model, messages=messages, **self._request_params(params)
+        )
+        return _content(response)
 
-    def chat(self, chatlog: list[dict]) -> str:
+    def chat(self, chatlog: list[dict], params: Optional[dict] = None) -> str:
         """
         Chat with the OpenAI model using a chat log.
 
         :param chatlog: The chat log to send to the model.
         :type chatlog: list[dict]
 
+        :param params: Generation parameters, see :meth:`_request_params`.
+        :type params: Optional[dict]
+
         :return: The response from the model.
         :ytype: str
         """
-        response = self.transport.chat_completion(model=self.model, messages=chatlog)
-        return response.choices[0].message.content.strip()
+        self.__validate()
+        response = self.transport.chat_completion(
+            model=self.model, messages=chatlog, **self._request_params(params)
+        )
+        return _content(response)
+
+    def stream(
+        self,
+        prompt: str,
+        context: Optional[str] = "You are a helpful assistant.",
+        params: Optional[dict] = None,
+    ) -> Iterator[str]:
+        """
+        Ask the OpenAI model a question and yield the answer as it arrives.
+
+        :param prompt: The question to ask.
+        :type prompt: str
+
+        :param context: The system message for the model.
+        :type context: str
+
+        :param params: Generation parameters, see :meth:`_request_params`.
+        :type params: Optional[dict]
+
+        :return: The chunks of the answer.
+        :rtype: Iterator[str]
+        """
+        self.__validate()
+        chat_logger.user(prompt)
+        messages = [
+            {"role": "system", "content": context},
+            {"role": "user", "content": prompt},
+        ]
+        yield from self.transport.chat_completion_stream(
+            model=self.model, messages=messages, **self._request_params(params)
+        )
+
+    def stream_chat(
+        self, chatlog: list[dict], params: Optional[dict] = None
+    ) -> Iterator[str]:
+        """
+        Chat with the OpenAI model and yield the response as it arrives.
+
+        :param chatlog: The chat log to send to the model.
+        :type chatlog: list[dict]
+
+        :param params: Generation parameters, see :meth:`_request_params`.
+        :type params: Optional[dict]
+
+        :return: The chunks of the response.
+        :rtype: Iterator[str]
+        """
+        self.__validate()
+        yield from self.transport.chat_completion_stream(
+            model=self.model, messages=chatlog, **self._request_params(params)
+        )
+
+    @property
+    def async_transport(self) -> AsyncOpenAITransport:
+        """
+        The transport used by ``aask`` and ``achat``.
+
+        :return: The asynchronous transport.
+        :rtype: AsyncOpenAITransport
+        """
+        if self._async_transport is None:
+            self._async_transport = AsyncOpenAITransport(
+                self.transport.client.api_key, scheduler=self.transport.scheduler
+            )
+        return self._async_transport
+
+    async def aask(
+        self,
+        prompt: str,
+        context: Optional[str] = "You are a helpful assistant.",
+        params: Optional[dict] = None,
+    ) -> str:
+        """
+        Asynchronously ask the OpenAI model a question and return the answer.
+
+        :param prompt: The question to ask.
+        :type prompt: str
+
+        :param context: The system message for the model.
+        :type context: str
+
+        :param params: Generation parameters, see :meth:`_request_params`.
+        :type params: Optional[dict]
+
+        :return: The answer from the model.
+        :rtype: str
+        """
+        # Validation may make a blocking request.
+        await asyncio.to_thread(self.__validate)
+        chat_logger.user(prompt)
+        messages = [
+            {"role": "system", "content": context},
+            {"role": "user", "content": prompt},
+        ]
+        response = await self.async_transport.chat_completion(
+            model=self.model, messages=messages, **self._request_params(params)
+        )
+        return _content(response)
+
+    async def achat(self, chatlog: list[dict], params: Optional[dict] = None) -> str:
+        """
+        Asynchronously chat with the OpenAI model using a chat log.
+
+        :param chatlog: The chat log to send to the model.
+        :type chatlog: list[dict]
+
+        :param params: Generation parameters, see :meth:`_request_params`.
+        :type params: Optional[dict]
+
+        :return: The response from the model.
+        :rtype: str
+        """
+        await asyncio.to_thread(self.__validate)
+        response = await self.async_transport.chat_completion(
+            model=self.model, messages=chatlog, **self._request_params(params)
+        )
+        return _content(response)
+
+    async def aclose(self):
+        """
+        Close the asynchronous client of the running event loop.
+        """
+        if self._async_transport is not None:
+            await self._async_transport.aclose()
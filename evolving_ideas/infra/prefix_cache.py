@@ -0,0 +1,142 @@
+"""
+evolving_ideas.infra.prefix_cache
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Iterable, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MIN_TOKENS = 64
+
+
+class PrefixEntry(NamedTuple):
+    """
+    An encoded prompt prefix and the key/values the model computed for it.
+    """
+
+    text: str
+    input_ids: Any
+    past_key_values: Any
+    size: int
+
+
+def kv_size(past_key_values: Any) -> int:
+    """
+    Measure the memory held by a model's past key/values.
+
+    :param past_key_values: A transformers cache or legacy tuple of tensors.
+    :type past_key_values: Any
+
+    :return: The size in bytes.
+    :rtype: int
+    """
+    if hasattr(past_key_values, "to_legacy_cache"):
+        past_key_values = past_key_values.to_legacy_cache()
+    return sum(tensor.nbytes for layer in past_key_values for tensor in layer)
+
+
+def shared_prefix(texts: Iterable[str]) -> str:
+    """
+    The longest common prefix of some texts, cut before its last whitespace
+    so that the prefix and the rest of each text tokenize as they would
+    together.
+
+    :param texts: The texts.
+    :type texts: Iterable[str]
+
+    :return: The shared prefix, possibly empty.
+    :rtype: str
+    """
+    prefix = os.path.commonprefix(list(texts))
+    cut = max(prefix.rfind(" "), prefix.rfind("\n"))
+    return prefix[:cut] if cut > 0 else ""
+
+
+class PrefixCache:
+    """
+    LRU of prompt prefixes shared by several generations, e.g. the context,
+    role and task rendered at the start of every SCAMPER step.
+    Reusing a prefix's key/values saves encoding it again; entries are
+    evicted once they hold more than ``max_bytes`` of key/values.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        :param max_bytes: The memory the cached key/values may hold.
+        :type max_bytes: int
+        """
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[str, PrefixEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, text: str) -> Optional[PrefixEntry]:
+        """
+        Find the longest cached prefix of a text, leaving at least one
+        character of the text to encode.
+
+        :param text: The full prompt.
+        :type text: str
+
+        :return: The entry, or None if no cached prefix starts the text.
+        :rtype: Optional[PrefixEntry]
+        """
+        with self._lock:
+            matches = [
+                key
+                for key in self._entries
+                if len(key) < len(text) and text.startswith(key)
+            ]
+            if not matches:
+                return None
+            key = max(matches, key=len)
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, text: str, input_ids: Any, past_key_values: Any) -> PrefixEntry:
+        """
+        Cache the key/values of a prefix, evicting the least recently used
+        entries to stay within ``max_bytes``.
+
+        :param text: The prefix.
+        :type text: str
+
+        :param input_ids: The prefix's token IDs.
+        :type input_ids: Any
+
+        :param past_key_values: The key/values computed for the prefix.
+        :type past_key_values: Any
+
+        :return: The new entry.
+        :rtype: PrefixEntry
+        """
+        entry = PrefixEntry(text, input_ids, past_key_values, kv_size(past_key_values))
+        if entry.size > self.max_bytes:
+            logger.debug(f"Prefix of {entry.size} bytes is too large to cache")
+            return entry
+        with self._lock:
+            previous = self._entries.pop(text, None)
+            if previous is not None:
+                self.size -= previous.size
+            self._entries[text] = entry
+            self.size += entry.size
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= evicted.size
+        return entry
+
+    def clear(self):
+        """
+        Drop every cached prefix.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
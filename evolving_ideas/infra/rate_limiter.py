@@ -0,0 +1,479 @@
+"""
+evolving_ideas.infra.rate_limiter
+"""
+
+import asyncio
+import collections
+import logging
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Iterable, Iterator, Optional, TypeVar
+
+import openai
+
+from evolving_ideas.infra.usage import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at ``per_minute`` tokens
+    per minute. Callers reserve tokens up front and are told how long to wait
+    before using them, so the bucket works for threads and coroutines alike.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        """
+        :param per_minute: The refill rate, in tokens per minute.
+        :type per_minute: float
+
+        :param capacity: The burst size (default is one minute of tokens).
+        :type capacity: Optional[float]
+        """
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """
+        Take tokens from the bucket, going into debt if needed.
+
+        :param amount: The number of tokens to take.
+        :type amount: float
+
+        :return: How long to wait, in seconds, before the tokens are available.
+        :rtype: float
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= min(amount, self.capacity)
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def adjust(self, amount: float):
+        """
+        Correct a reservation once the actual usage is known.
+
+        :param amount: Tokens to give back (positive) or take (negative).
+        :type amount: float
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+
+class SchedulerMetrics:
+    """
+    Counters describing how the scheduler delayed and retried requests.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+        self.failures = 0
+        self.total_queue_delay = 0.0
+        self.max_queue_delay = 0.0
+        self._lock = threading.Lock()
+
+    def record_start(self, queue_delay: float):
+        with self._lock:
+            self.requests += 1
+            self.total_queue_delay += queue_delay
+            self.max_queue_delay = max(self.max_queue_delay, queue_delay)
+
+    def record_retry(self, throttled: bool):
+        with self._lock:
+            self.retries += 1
+            self.throttled += int(throttled)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+
+    def snapshot(self) -> dict:
+        """
+        Get the current counters.
+
+        :return: The counters, with the mean queueing delay in seconds.
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "throttled": self.throttled,
+                "failures": self.failures,
+                "total_queue_delay": self.total_queue_delay,
+                "max_queue_delay": self.max_queue_delay,
+                "mean_queue_delay": (
+                    self.total_queue_delay / self.requests if self.requests else 0.0
+                ),
+            }
+
+
+class InFlightSlots:
+    """
+    A cap on concurrent requests shared by threads and event loops.
+    A released slot is handed to the longest waiting caller: a thread is
+    woken through an event, a coroutine by resolving its future on its own
+    loop, so neither side polls.
+    """
+
+    def __init__(self, size: int):
+        """
+        :param size: The number of requests allowed in flight.
+        :type size: int
+        """
+        self.size = size
+        self._free = size
+        self._waiters = collections.deque()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Wait for a slot from a thread.
+        """
+        with self._lock:
+            if self._free and not self._waiters:
+                self._free -= 1
+                return
+            event = threading.Event()
+            self._waiters.append(event)
+        event.wait()
+
+    async def aacquire(self):
+        """
+        Wait for a slot from a coroutine.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._free and not self._waiters:
+                self._free -= 1
+                return
+            future = loop.create_future()
+            waiter = (loop, future)
+            self._waiters.append(waiter)
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                queued = waiter in self._waiters
+                if queued:
+                    self._waiters.remove(waiter)
+            if not queued and future.done() and not future.cancelled():
+                # The slot was handed over just before the cancellation; a
+                # cancelled future gets its slot back from _wake instead.
+                self.release()
+            raise
+
+    def release(self):
+        """
+        Give a slot back, or hand it to the longest waiting caller.
+        """
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if isinstance(waiter, threading.Event):
+                    waiter.set()
+                    return
+                loop, future = waiter
+                try:
+                    loop.call_soon_threadsafe(self._wake, future)
+                    return
+                except RuntimeError:
+                    # The waiter's event loop is closed.
+                    continue
+            self._free += 1
+
+    def _wake(self, future: asyncio.Future):
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(None)
+
+    def __enter__(self) -> "InFlightSlots":
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.release()
+
+    async def __aenter__(self) -> "InFlightSlots":
+        await self.aacquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        self.release()
+
+
+def estimate_request_tokens(messages: list, max_tokens: Optional[int] = None) -> int:
+    """
+    Roughly estimate the tokens a chat completion will use, with
+    :func:`~evolving_ideas.infra.usage.estimate_tokens`, before the exact
+    usage is reported.
+
+    :param messages: The chat messages.
+    :type messages: list
+
+    :param max_tokens: The completion token limit, if any.
+    :type max_tokens: Optional[int]
+
+    :return: The estimated number of tokens.
+    :rtype: int
+    """
+    prompt = sum(
+        estimate_tokens(str(message.get("content") or "")) for message in messages
+    )
+    return prompt + (max_tokens or 0)
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """
+    Read the delay requested by the server in a failed response.
+
+    :param error: The API error.
+    :type error: Exception
+
+    :return: The delay in seconds, or None if the server did not ask for one.
+    :rtype: Optional[float]
+    """
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+class RequestScheduler:
+    """
+    Schedules API requests under rate limits.
+    Each request waits for its share of the requests- and tokens-per-minute
+    buckets, then for a free in-flight slot; threads and event loops share
+    both. Throttled and
+    transient failures are retried with exponential backoff and full jitter,
+    honouring ``retry-after``.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_in_flight: int = 8,
+        max_retries: int = 5,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+    ):
+        """
+        :param requests_per_minute: The request rate limit (default is none).
+        :type requests_per_minute: Optional[float]
+
+        :param tokens_per_minute: The token rate limit (default is none).
+        :type tokens_per_minute: Optional[float]
+
+        :param max_in_flight: The maximum number of concurrent requests.
+        :type max_in_flight: int
+
+        :param max_retries: The number of retries of a failed request.
+        :type max_retries: int
+
+        :param base_delay: The first backoff delay, in seconds.
+        :type base_delay: float
+
+        :param max_delay: The longest backoff delay, in seconds.
+        :type max_delay: float
+        """
+        self.requests = (
+            TokenBucket(requests_per_minute) if requests_per_minute else None
+        )
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.metrics = SchedulerMetrics()
+        self.max_in_flight = max_in_flight
+        self._slots = InFlightSlots(max_in_flight)
+
+    def _reserve(self, tokens: int) -> float:
+        delay = self.requests.reserve(1) if self.requests else 0.0
+        if self.tokens:
+            delay = max(delay, self.tokens.reserve(tokens))
+        return delay
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        requested = retry_after(error)
+        if requested is not None:
+            return min(self.max_delay, requested) + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    def _settle(self, estimated_tokens: int, used_tokens: Optional[int]):
+        if self.tokens and used_tokens is not None:
+            self.tokens.adjust(estimated_tokens - used_tokens)
+
+    def _should_retry(self, attempt: int, error: Exception) -> bool:
+        if not isinstance(error, RETRYABLE_ERRORS) or attempt >= self.max_retries:
+            self.metrics.record_failure()
+            return False
+        self.metrics.record_retry(isinstance(error, openai.RateLimitError))
+        return True
+
+    def run(
+        self,
+        call: Callable[[], T],
+        estimated_tokens: int = 0,
+        usage: Optional[Callable[[T], Optional[int]]] = None,
+    ) -> T:
+        """
+        Run a request under the limits, retrying transient failures.
+
+        :param call: The function making the request.
+        :type call: Callable[[], T]
+
+        :param estimated_tokens: The tokens the request is expected to use.
+        :type estimated_tokens: int
+
+        :param usage: Extracts the tokens actually used from the result.
+        :type usage: Optional[Callable[[T], Optional[int]]]
+
+        :return: The result of the request.
+        :rtype: T
+        """
+        attempt = 0
+        while True:
+            queued = time.monotonic()
+            # Waiting for the rate limits does not hold a slot.
+            time.sleep(self._reserve(estimated_tokens))
+            with self._slots:
+                self.metrics.record_start(time.monotonic() - queued)
+                try:
+                    result = call()
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    if not self._should_retry(attempt, e):
+                        raise
+                    error, delay = e, self._backoff(attempt, e)
+                else:
+                    self._settle(estimated_tokens, usage(result) if usage else None)
+                    return result
+            logger.warning(f"Request failed, retrying in {delay:.1f}s: {error}")
+            time.sleep(delay)
+            attempt += 1
+
+    def stream(
+        self,
+        call: Callable[[], Iterable[T]],
+        estimated_tokens: int = 0,
+        usage: Optional[Callable[[T], Optional[int]]] = None,
+    ) -> Iterator[T]:
+        """
+        Run a streamed request under the limits. The in-flight slot is held
+        until the stream is exhausted or closed, and the token reservation is
+        settled from the chunk that reports the usage. A transient failure
+        is retried only until the first chunk is delivered: a new completion
+        would not continue the one already under way, so a failure after that
+        is raised.
+
+        :param call: The function starting the stream.
+        :type call: Callable[[], Iterable[T]]
+
+        :param estimated_tokens: The tokens the request is expected to use.
+        :type estimated_tokens: int
+
+        :param usage: Extracts the tokens used from a chunk, None for the
+            chunks that do not report it.
+        :type usage: Optional[Callable[[T], Optional[int]]]
+
+        :return: The chunks of the response.
+        :rtype: Iterator[T]
+        """
+        attempt = 0
+        while True:
+            queued = time.monotonic()
+            # Waiting for the rate limits does not hold a slot.
+            time.sleep(self._reserve(estimated_tokens))
+            with self._slots:
+                self.metrics.record_start(time.monotonic() - queued)
+                used, delivered = None, False
+                try:
+                    for chunk in call():
+                        if usage and used is None:
+                            used = usage(chunk)
+                        delivered = True
+                        yield chunk
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    if delivered:
+                        self.metrics.record_failure()
+                        raise
+                    if not self._should_retry(attempt, e):
+                        raise
+                    error, delay = e, self._backoff(attempt, e)
+                else:
+                    self._settle(estimated_tokens, used)
+                    return
+            logger.warning(f"Stream failed, retrying in {delay:.1f}s: {error}")
+            time.sleep(delay)
+            attempt += 1
+
+    async def arun(
+        self,
+        call: Callable[[], Awaitable[T]],
+        estimated_tokens: int = 0,
+        usage: Optional[Callable[[T], Optional[int]]] = None,
+    ) -> T:
+        """
+        Asynchronously run a request under the limits, retrying transient
+        failures.
+
+        :param call: The coroutine function making the request.
+        :type call: Callable[[], Awaitable[T]]
+
+        :param estimated_tokens: The tokens the request is expected to use.
+        :type estimated_tokens: int
+
+        :param usage: Extracts the tokens actually used from the result.
+        :type usage: Optional[Callable[[T], Optional[int]]]
+
+        :return: The result of the request.
+        :rtype: T
+        """
+        attempt = 0
+        while True:
+            queued = time.monotonic()
+            await asyncio.sleep(self._reserve(estimated_tokens))
+            async with self._slots:
+                self.metrics.record_start(time.monotonic() - queued)
+                try:
+                    result = await call()
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    if not self._should_retry(attempt, e):
+                        raise
+                    error, delay = e, self._backoff(attempt, e)
+                else:
+                    self._settle(estimated_tokens, usage(result) if usage else None)
+                    return result
+            logger.warning(f"Request failed, retrying in {delay:.1f}s: {error}")
+            await asyncio.sleep(delay)
+            attempt += 1
@@ -0,0 +1,465 @@
+"""
+evolving_ideas.infra.replay_llm_client
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional
+
+from evolving_ideas.infra.llm_interface import LLMInterface
+from evolving_ideas.infra.responder import get_llm_backend
+from evolving_ideas.infra.usage import estimate_tokens, measure_usage, report_usage
+from evolving_ideas.settings import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = ".storage/llm_replay.jsonl"
+MODES = ("replay", "record")
+SYNTHETIC_TOKENS = 64
+SYNTHETIC_LINE_WORDS = 8
+
+_WORDS = (
+    "idea user task step question answer option risk cost value test plan "
+    "market feature design change combine adapt remove reverse improve"
+).split()
+
+
+class ReplayMissError(LookupError):
+    """
+    Raised when no response was recorded for a request.
+    """
+
+
+def replay_key(messages: list, params: Optional[dict]) -> str:
+    """
+    Identify a request by its messages and generation parameters, whatever
+    backend and model answered it.
+
+    :param messages: The chat messages of the request.
+    :type messages: list
+
+    :param params: The generation parameters of the request.
+    :type params: Optional[dict]
+
+    :return: A hex digest identifying the request.
+    :rtype: str
+    """
+    payload = json.dumps(
+        {"messages": messages, "params": params or {}},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _synthetic(key: str, tokens: int) -> str:
+    rng = random.Random(key)
+    words = [rng.choice(_WORDS) for _ in range(tokens)]
+    # Short lines, so that strategies parsing lists of ideas get several.
+    return "\n".join(
+        " ".join(words[i : i + SYNTHETIC_LINE_WORDS])
+        for i in range(0, len(words), SYNTHETIC_LINE_WORDS)
+    )
+
+
+def _chunks(text: str) -> List[str]:
+    return re.findall(r"\S+\s*|\s+", text)
+
+
+def _shares(total: int, count: int) -> List[int]:
+    share, remainder = divmod(total, count)
+    return [share + (i < remainder) for i in range(count)]
+
+
+def _messages(prompt: str, context: str) -> list:
+    return [
+        {"role": "system", "content": context},
+        {"role": "user", "content": prompt},
+    ]
+
+
+class ReplayLLM(LLMInterface):
+    """
+    Backend recording real responses to a JSON lines file and serving them
+    back, so that strategies run end to end without an API key or a model.
+    In ``record`` mode every call goes to the configured backend and its
+    response is appended to the file. In ``replay`` mode responses are read
+    back, after a synthetic ``latency`` before the first token and at
+    ``tokens_per_second``; a request that was never recorded raises
+    :class:`ReplayMissError`, or gets a deterministic synthetic response
+    when ``strict`` is off.
+    """
+
+    name: str = "replay"
+
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        batch_size: int = 8,
+        path: Optional[str] = None,
+        mode: Optional[str] = None,
+        llm: Optional[LLMInterface] = None,
+        latency: Optional[float] = None,
+        tokens_per_second: Optional[float] = None,
+        strict: Optional[bool] = None,
+        batching: Optional[bool] = None,
+        **kwargs,
+    ):
+        """
+        :param model_name: The model recorded from.
+        :type model_name: Optional[str]
+
+        :param batch_size: The batch size of the backend recorded from.
+        :type batch_size: int
+
+        :param path: The recording (default is the ``llm.replay.path``
+            setting).
+        :type path: Optional[str]
+
+        :param mode: ``record`` or ``replay`` (default is the
+            ``llm.replay.mode`` setting).
+        :type mode: Optional[str]
+
+        :param llm: The backend to record from (default is the
+            ``llm.replay.backend`` setting).
+        :type llm: Optional[LLMInterface]
+
+        :param latency: Seconds before a replayed response starts (default is
+            the ``llm.replay.latency`` setting).
+        :type latency: Optional[float]
+
+        :param tokens_per_second: The rate replayed responses are generated
+            at, None for instant (default is the
+            ``llm.replay.tokens_per_second`` setting).
+        :type tokens_per_second: Optional[float]
+
+        :param strict: Raise on requests that were not recorded instead of
+            answering them with synthetic text (default is the
+            ``llm.replay.strict`` setting).
+        :type strict: Optional[bool]
+
+        :param batching: Replay ``ask_many`` as a batch generated in parallel
+            (default is the ``llm.replay.batching`` setting).
+        :type batching: Optional[bool]
+
+        :raises ValueError: If the mode is unknown.
+        """
+        self.model_name = model_name
+        self.path = Path(path or settings.get("llm.replay.path", DEFAULT_PATH))
+        self.mode = mode or settings.get("llm.replay.mode", "replay")
+        if self.mode not in MODES:
+            raise ValueError(
+                f"Unsupported replay mode: {self.mode} (use {', '.join(MODES)})"
+            )
+        self.latency = float(
+            settings.get("llm.replay.latency", 0.0) if latency is None else latency
+        )
+        self.tokens_per_second = (
+            settings.get("llm.replay.tokens_per_second")
+            if tokens_per_second is None
+            else tokens_per_second
+        )
+        self.strict = bool(
+            settings.get("llm.replay.strict", True) if strict is None else strict
+        )
+        self._lock = threading.Lock()
+        self._records = self._load()
+
+        self.llm = None
+        self.backend = self.name
+        self.model = model_name
+        if self.mode == "record":
+            backend = settings.get("llm.replay.backend", "openai")
+            if llm is None:
+                if backend == self.name:
+                    raise ValueError("The replay backend cannot record itself.")
+                llm = get_llm_backend(backend)(
+                    model_name=model_name, batch_size=batch_size
+                )
+            self.llm = llm
+            # Recorded calls are real ones, priced for the backend and model
+            # they went to.
+            self.backend = getattr(llm, "name", None) or backend
+            self.model = getattr(llm, "model", None) or model_name
+            self.generation_params = llm.generation_params
+            self.supports_batching = llm.supports_batching
+        else:
+            # Replayed responses are deterministic, hence cacheable.
+            self.generation_params = {"sample": False}
+            self.supports_batching = bool(
+                settings.get("llm.replay.batching", False)
+                if batching is None
+                else batching
+            )
+
+    def _load(self) -> dict:
+        records = {}
+        if not self.path.exists():
+            return records
+        with open(self.path, encoding="utf-8") as f:
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                    records[record["key"]] = record
+                except (ValueError, KeyError) as e:
+                    logger.warning(
+                        f"Skipping malformed replay record {self.path}:{number}: {e}"
+                    )
+        logger.debug(f"Loaded {len(records)} replay records from {self.path}")
+        return records
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def _save(
+        self,
+        messages: list,
+        params: Optional[dict],
+        response: str,
+        latency: float,
+        reported: Optional[dict] = None,
+    ):
+        reported = reported or {}
+        key = replay_key(messages, params)
+        record = {
+            "key": key,
+            "messages": messages,
+            "params": params or {},
+            "response": response,
+            "latency": latency,
+            "prompt_tokens": reported.get("prompt_tokens"),
+            "completion_tokens": reported.get("completion_tokens"),
+        }
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            self._records[key] = record
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+    def _lookup(self, messages: list, params: Optional[dict]) -> dict:
+        key = replay_key(messages, params)
+        record = self._records.get(key)
+        if record is not None:
+            return record
+        if self.strict:
+            raise ReplayMissError(
+                f"No response recorded in {self.path} for request {key[:12]}"
+            )
+        tokens = (params or {}).get("max_tokens") or SYNTHETIC_TOKENS
+        return {"response": _synthetic(key, tokens), "completion_tokens": tokens}
+
+    def _generation_time(self, record: dict) -> float:
+        if not self.tokens_per_second:
+            return 0.0
+        tokens = record.get("completion_tokens")
+        if tokens is None:
+            tokens = estimate_tokens(record["response"])
+        return tokens / self.tokens_per_second
+
+    @staticmethod
+    def _report(record: dict):
+        if record.get("prompt_tokens") is not None:
+            report_usage(record["prompt_tokens"], record["completion_tokens"])
+
+    def _keep(
+        self,
+        messages: list,
+        params: Optional[dict],
+        response: str,
+        started: float,
+        reported: dict,
+    ):
+        self._save(messages, params, response, time.perf_counter() - started, reported)
+        if reported:
+            # Pass the usage on to the caller measuring this completion.
+            report_usage(reported["prompt_tokens"], reported["completion_tokens"])
+
+    def _recorded(
+        self, messages: list, params: Optional[dict], generate: Callable[[], str]
+    ) -> str:
+        started = time.perf_counter()
+        with measure_usage() as reported:
+            response = generate()
+        self._keep(messages, params, response, started, reported)
+        return response
+
+    def _record_batch(
+        self,
+        messages: List[list],
+        prompts: List[str],
+        contexts: List[str],
+        params: Optional[dict],
+    ) -> List[str]:
+        started = time.perf_counter()
+        with measure_usage() as reported:
+            responses = self.llm.ask_many(prompts, contexts, params)
+        # A batch is timed and measured as a whole; each completion gets an
+        # equal share.
+        count = max(len(prompts), 1)
+        latency = (time.perf_counter() - started) / count
+        shares = [{}] * count
+        if reported:
+            shares = [
+                {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}
+                for prompt_tokens, completion_tokens in zip(
+                    _shares(reported["prompt_tokens"], count),
+                    _shares(reported["completion_tokens"], count),
+                )
+            ]
+        for request, response, share in zip(messages, responses, shares):
+            self._save(request, params, response, latency, share)
+        if reported:
+            report_usage(reported["prompt_tokens"], reported["completion_tokens"])
+        return responses
+
+    def _reply(
+        self, messages: list, params: Optional[dict], generate: Callable[[], str]
+    ) -> str:
+        if self.mode == "record":
+            return self._recorded(messages, params, generate)
+        record = self._lookup(messages, params)
+        time.sleep(self.latency + self._generation_time(record))
+        self._report(record)
+        return record["response"]
+
+    def _replay_stream(self, messages: list, params: Optional[dict]) -> Iterator[str]:
+        record = self._lookup(messages, params)
+        time.sleep(self.latency)
+        chunks = _chunks(record["response"])
+        pause = self._generation_time(record) / max(len(chunks), 1)
+        for chunk in chunks:
+            time.sleep(pause)
+            yield chunk
+        self._report(record)
+
+    def _record_stream(
+        self, messages: list, params: Optional[dict], chunks: Iterator[str]
+    ) -> Iterator[str]:
+        started = time.perf_counter()
+        received = []
+        with measure_usage() as reported:
+            for chunk in chunks:
+                received.append(chunk)
+                yield chunk
+        # Only a fully consumed stream is recorded.
+        self._keep(messages, params, "".join(received), started, reported)
+
+    def count_tokens(self, text: str) -> int:
+        if self.llm is not None:
+            return self.llm.count_tokens(text)
+        return estimate_tokens(text)
+
+    def ask(
+        self,
+        prompt: str,
+        context: str = "You are a helpful assistant.",
+        params: Optional[dict] = None,
+    ) -> str:
+        return self._reply(
+            _messages(prompt, context),
+            params,
+            lambda: self.llm.ask(prompt, context, params),
+        )
+
+    def chat(self, chatlog: list, params: Optional[dict] = None) -> str:
+        return self._reply(chatlog, params, lambda: self.llm.chat(chatlog, params))
+
+    def ask_many(
+        self,
+        prompts: List[str],
+        contexts: List[str],
+        params: Optional[dict] = None,
+    ) -> List[str]:
+        messages = [
+            _messages(prompt, context) for prompt, context in zip(prompts, contexts)
+        ]
+        if self.mode == "record":
+            if not self.llm.supports_batching:
+                # Each prompt is its own call, measured on its own.
+                return [
+                    self._recorded(
+                        request,
+                        params,
+                        lambda p=prompt, c=context: self.llm.ask(p, c, params),
+                    )
+                    for request, prompt, context in zip(messages, prompts, contexts)
+                ]
+            return self._record_batch(messages, prompts, contexts, params)
+        records = [self._lookup(request, params) for request in messages]
+        if self.supports_batching:
+            # A batch takes as long as its longest generation.
+            time.sleep(
+                self.latency
+                + max((self._generation_time(r) for r in records), default=0.0)
+            )
+        else:
+            time.sleep(sum(self.latency + self._generation_time(r) for r in records))
+        return [record["response"] for record in records]
+
+    def stream(
+        self,
+        prompt: str,
+        context: str = "You are a helpful assistant.",
+        params: Optional[dict] = None,
+    ) -> Iterator[str]:
+        messages = _messages(prompt, context)
+        if self.mode == "record":
+            return self._record_stream(
+                messages, params, self.llm.stream(prompt, context, params)
+            )
+        return self._replay_stream(messages, params)
+
+    def stream_chat(
+        self, chatlog: list, params: Optional[dict] = None
+    ) -> Iterator[str]:
+        if self.mode == "record":
+            return self._record_stream(
+                chatlog, params, self.llm.stream_chat(chatlog, params)
+            )
+        return self._replay_stream(chatlog, params)
+
+    async def _areply(self, messages: list, params: Optional[dict], generate) -> str:
+        if self.mode == "record":
+            started = time.perf_counter()
+            with measure_usage() as reported:
+                response = await generate()
+            self._keep(messages, params, response, started, reported)
+            return response
+        record = self._lookup(messages, params)
+        # Replayed calls wait on the event loop, so concurrency is not
+        # bounded by a thread pool.
+        await asyncio.sleep(self.latency + self._generation_time(record))
+        self._report(record)
+        return record["response"]
+
+    async def aask(
+        self,
+        prompt: str,
+        context: str = "You are a helpful assistant.",
+        params: Optional[dict] = None,
+    ) -> str:
+        return await self._areply(
+            _messages(prompt, context),
+            params,
+            lambda: self.llm.aask(prompt, context, params),
+        )
+
+    async def achat(self, chatlog: list, params: Optional[dict] = None) -> str:
+        return await self._areply(
+            chatlog, params, lambda: self.llm.achat(chatlog, params)
+        )
+
+    async def aclose(self):
+        if self.llm is not None:
+            await self.llm.aclose()
@@ -2,42 +2,231 @@
 evolving_ideas.infra.responder
 """
 
+import importlib
 import logging
+import time
+from typing import Iterator, List, Optional, Type
 
 from evolving_ideas.infra.llm_interface import LLMInterface
-from evolving_ideas.infra.local_llm_client import LocalLLM
-from evolving_ideas.infra.open_ai_client import OpenAILLM
+from evolving_ideas.infra.response_cache import ResponseCache, cache_key, is_sampled
+from evolving_ideas.infra.usage import UsageTracker, measure_usage
 from evolving_ideas.settings import settings
 
 logger = logging.getLogger(__name__)
 
-LLM_BACKENDS = {"openai": OpenAILLM, "local": LocalLLM}
+# Backends are referenced as "module:Class" and imported only when selected,
+# so that e.g. the OpenAI backend never pays for importing transformers/torch.
+LLM_BACKENDS = {
+    "openai": "evolving_ideas.infra.open_ai_client:OpenAILLM",
+    "local": "evolving_ideas.infra.local_llm_client:LocalLLM",
+    "worker": "evolving_ideas.infra.local_llm_worker:WorkerLLM",
+    "replay": "evolving_ideas.infra.replay_llm_client:ReplayLLM",
+}
 
 
-def get_llm_backend(name: str) -> LLMInterface:
+def get_llm_backend(name: str) -> Type[LLMInterface]:
     try:
-        return LLM_BACKENDS[name]
+        target = LLM_BACKENDS[name]
     except KeyError as e:
         raise ValueError(f"Unsupported LLM backend: {name}") from e
+    module_name, _, class_name = target.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Build the response cache configured under ``llm.cache``.
+
+    :return: The response cache, or None if caching is disabled.
+    :rtype: Optional[ResponseCache]
+    """
+    if not settings.get("llm.cache.enabled", True):
+        return None
+    return ResponseCache(
+        path=settings.get("llm.cache.path"),
+        memory_size=settings.get("llm.cache.memory_size", 256),
+        max_bytes=settings.get("llm.cache.max_bytes", 64 * 1024 * 1024),
+        ttl=settings.get("llm.cache.ttl"),
+    )
+
+
+def get_usage_tracker() -> UsageTracker:
+    """
+    Build the usage tracker configured under ``llm.usage``.
+
+    :return: The usage tracker.
+    :rtype: UsageTracker
+    """
+    return UsageTracker(
+        path=settings.get("llm.usage.path"),
+        prices=settings.get("llm.usage.prices"),
+    )
 
 
 class LLMResponder:
     """
     Wraps the underlying LLM for easier substitution/testing.
+    Responses are cached per backend, model (the one the backend calls),
+    messages and generation parameters. Sampled generations are only cached when ``llm.cache.sampled``
+    is set or a call passes ``cache=True``; ``cache=False`` bypasses the cache.
+    Every completion, cached or not, is recorded by the usage tracker under
+    the name of the prompt template it answers. The template's generation
+    parameters (``params``) are passed on to the backend.
     """
 
     llm: LLMInterface
 
-    def __init__(self):
+    def __init__(
+        self,
+        cache: Optional[ResponseCache] = None,
+        usage: Optional[UsageTracker] = None,
+    ):
+        """
+        :param cache: The response cache (default is built from settings).
+        :type cache: Optional[ResponseCache]
+
+        :param usage: The usage tracker (default is built from settings).
+        :type usage: Optional[UsageTracker]
+        """
         logger.debug("Initializing LLM Responder")
 
-        backend = settings.get("llm.backend", "local")
-        model = settings.get("llm.model", "tiiuae/falcon-rw-1b")
+        self.backend = settings.get("llm.backend", "local")
+        self.model = settings.get("llm.model", "tiiuae/falcon-rw-1b")
+
+        self.llm = self._connect_worker() if self.backend == "local" else None
+        if self.llm is None:
+            llm_class = get_llm_backend(self.backend)
+            self.llm = llm_class(
+                model_name=self.model, batch_size=settings.get("llm.batch_size", 8)
+            )
+        # Usage records and cache keys name the model the backend calls, which
+        # may differ from ``llm.model`` (e.g. ``llm.openai.model``).
+        self.model = getattr(self.llm, "model", None) or self.model
+        self.cache = cache if cache is not None else get_response_cache()
+        self.cache_sampled = bool(settings.get("llm.cache.sampled", False))
+        self.usage = usage if usage is not None else get_usage_tracker()
+
+    def _connect_worker(self) -> Optional[LLMInterface]:
+        """
+        Use a running local model worker instead of loading the model in
+        process, when one serves the configured model.
+
+        :return: The worker backend, or None to load the model in process.
+        :rtype: Optional[LLMInterface]
+        """
+        if not settings.get("llm.worker.enabled", True):
+            return None
+        try:
+            llm = get_llm_backend("worker")(
+                model_name=self.model,
+                socket_path=settings.get("llm.worker.socket"),
+            )
+        except ConnectionError as e:
+            logger.debug(f"Loading the local model in process: {e}")
+            return None
+        logger.debug("Using the local model worker")
+        return llm
+
+    def _cache_key(
+        self, messages: list, use_cache: Optional[bool], params: Optional[dict]
+    ) -> Optional[str]:
+        if self.cache is None or use_cache is False:
+            return None
+        params = {**getattr(self.llm, "generation_params", {}), **(params or {})}
+        if use_cache is None and not self.cache_sampled and is_sampled(params):
+            return None
+        return cache_key(self.backend, self.model, messages, params)
+
+    def _lookup(self, key: Optional[str]) -> Optional[str]:
+        if key is None:
+            return None
+        response = self.cache.get(key)
+        if response is not None:
+            logger.debug(f"LLM response cache hit: {key[:12]}")
+        return response
+
+    def _record(
+        self,
+        messages: list,
+        response: str,
+        template: Optional[str],
+        latency: float,
+        reported: Optional[dict] = None,
+        cached: bool = False,
+    ):
+        reported = reported or {}
+        prompt_tokens = reported.get("prompt_tokens")
+        if prompt_tokens is None:
+            prompt_tokens = self.llm.count_tokens(
+                "\n\n".join(str(m.get("content") or "") for m in messages)
+            )
+        completion_tokens = reported.get("completion_tokens")
+        if completion_tokens is None:
+            completion_tokens = self.llm.count_tokens(response)
+        self.usage.record(
+            # A recording replay backend reports the backend it forwards to.
+            backend=getattr(self.llm, "backend", None) or self.backend,
+            model=self.model,
+            template=template,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            latency=latency,
+            cached=cached,
+        )
 
-        llm_class = get_llm_backend(backend)
-        self.llm = llm_class(model_name=model)
+    def _cached(
+        self, key: Optional[str], messages: list, template: Optional[str], generate
+    ) -> str:
+        started = time.perf_counter()
+        response = self._lookup(key)
+        if response is not None:
+            self._record(
+                messages, response, template, time.perf_counter() - started, cached=True
+            )
+            return response
+        with measure_usage() as reported:
+            response = generate()
+        self._record(
+            messages, response, template, time.perf_counter() - started, reported
+        )
+        if key is not None:
+            self.cache.put(key, response)
+        return response
 
-    def ask(self, prompt: str, context="You are a helpful assistant.") -> str:
+    async def _acached(
+        self, key: Optional[str], messages: list, template: Optional[str], generate
+    ) -> str:
+        started = time.perf_counter()
+        response = self._lookup(key)
+        if response is not None:
+            self._record(
+                messages, response, template, time.perf_counter() - started, cached=True
+            )
+            return response
+        with measure_usage() as reported:
+            response = await generate()
+        self._record(
+            messages, response, template, time.perf_counter() - started, reported
+        )
+        if key is not None:
+            self.cache.put(key, response)
+        return response
+
+    @staticmethod
+    def _messages(prompt: str, context: str) -> list:
+        return [
+            {"role": "system", "content": context},
+            {"role": "user", "content": prompt},
+        ]
+
+    def ask(
+        self,
+        prompt: str,
+        context="You are a helpful assistant.",
+        cache: Optional[bool] = None,
+        template: Optional[str] = None,
+        params: Optional[dict] = None,
+    ) -> str:
         """
         Ask the LLM a question with a given prompt and context.
 
@@ -47,19 +236,300 @@ class LLMResponder:
         :param context: Additional context for the LLM (default is "You are a helpful assistant.").
         :type context: str
 
+        :param cache: False to bypass the response cache, True to cache even a
+            sampled generation (default follows the settings).
+        :type cache: Optional[bool]
+
+        :param template: The name of the prompt template, for usage records.
+        :type template: Optional[str]
+
+        :param params: The template's generation parameters.
+        :type params: Optional[dict]
+
         :return: The LLM's response.
         :rtype: str
         """
-        return self.llm.ask(prompt, context)
+        messages = self._messages(prompt, context)
+        return self._cached(
+            self._cache_key(messages, cache, params),
+            messages,
+            template,
+            lambda: self.llm.ask(prompt, context, params),
+        )
 
-    def chat(self, chatlog: list) -> str:
+    def chat(
+        self,
+        chatlog: list,
+        cache: Optional[bool] = None,
+        template: Optional[str] = None,
+        params: Optional[dict] = None,
+    ) -> str:
         """
         Start a chat session with the LLM.
 
         :param chatlog: A list of messages to include in the chat context.
         :type chatlog: list
 
+        :param cache: False to bypass the response cache, True to cache even a
+            sampled generation (default follows the settings).
+        :type cache: Optional[bool]
+
+        :param template: The name of the prompt template, for usage records.
+        :type template: Optional[str]
+
+        :param params: The template's generation parameters.
+        :type params: Optional[dict]
+
+        :return: The LLM's response.
+        :rtype: str
+        """
+        return self._cached(
+            self._cache_key(chatlog, cache, params),
+            chatlog,
+            template,
+            lambda: self.llm.chat(chatlog, params),
+        )
+
+    def _streamed(
+        self, key: Optional[str], messages: list, template: Optional[str], generate
+    ) -> Iterator[str]:
+        started = time.perf_counter()
+        response = self._lookup(key)
+        if response is not None:
+            self._record(
+                messages, response, template, time.perf_counter() - started, cached=True
+            )
+            yield response
+            return
+        chunks = []
+        with measure_usage() as reported:
+            for chunk in generate():
+                chunks.append(chunk)
+                yield chunk
+        # Only a fully consumed stream is recorded and cached.
+        response = "".join(chunks)
+        self._record(
+            messages, response, template, time.perf_counter() - started, reported
+        )
+        if key is not None:
+            self.cache.put(key, response)
+
+    def stream(
+        self,
+        prompt: str,
+        context="You are a helpful assistant.",
+        cache: Optional[bool] = None,
+        template: Optional[str] = None,
+        params: Optional[dict] = None,
+    ) -> Iterator[str]:
+        """
+        Ask the LLM a question and yield the response as it is generated.
+        A cached response is yielded as a single chunk.
+
+        :param prompt: The prompt to send to the LLM.
+        :type prompt: str
+
+        :param context: Additional context for the LLM (default is "You are a helpful assistant.").
+        :type context: str
+
+        :param cache: False to bypass the response cache, True to cache even a
+            sampled generation (default follows the settings).
+        :type cache: Optional[bool]
+
+        :param template: The name of the prompt template, for usage records.
+        :type template: Optional[str]
+
+        :param params: The template's generation parameters.
+        :type params: Optional[dict]
+
+        :return: The chunks of the LLM's response.
+        :rtype: Iterator[str]
+        """
+        messages = self._messages(prompt, context)
+        return self._streamed(
+            self._cache_key(messages, cache, params),
+            messages,
+            template,
+            lambda: self.llm.stream(prompt, context, params),
+        )
+
+    def stream_chat(
+        self,
+        chatlog: list,
+        cache: Optional[bool] = None,
+        template: Optional[str] = None,
+        params: Optional[dict] = None,
+    ) -> Iterator[str]:
+        """
+        Continue a chat session and yield the response as it is generated.
+
+        :param chatlog: A list of messages to include in the chat context.
+        :type chatlog: list
+
+        :param cache: False to bypass the response cache, True to cache even a
+            sampled generation (default follows the settings).
+        :type cache: Optional[bool]
+
+        :param template: The name of the prompt template, for usage records.
+        :type template: Optional[str]
+
+        :param params: The template's generation parameters.
+        :type params: Optional[dict]
+
+        :return: The chunks of the LLM's response.
+        :rtype: Iterator[str]
+        """
+        return self._streamed(
+            self._cache_key(chatlog, cache, params),
+            chatlog,
+            template,
+            lambda: self.llm.stream_chat(chatlog, params),
+        )
+
+    @property
+    def supports_batching(self) -> bool:
+        """
+        Whether the backend generates ``ask_many`` prompts in true batches.
+
+        :return: True if batching is supported.
+        :rtype: bool
+        """
+        return getattr(self.llm, "supports_batching", False)
+
+    def ask_many(
+        self,
+        prompts: List[str],
+        contexts: List[str],
+        cache: Optional[bool] = None,
+        template: Optional[str] = None,
+        params: Optional[dict] = None,
+    ) -> List[str]:
+        """
+        Ask the LLM several independent questions in one batch.
+        Cached responses are reused and only the misses are generated.
+
+        :param prompts: The prompts to send to the LLM.
+        :type prompts: List[str]
+
+        :param contexts: The context of each prompt.
+        :type contexts: List[str]
+
+        :param cache: False to bypass the response cache, True to cache even a
+            sampled generation (default follows the settings).
+        :type cache: Optional[bool]
+
+        :param template: The name of the prompt template, for usage records.
+        :type template: Optional[str]
+
+        :param params: The template's generation parameters.
+        :type params: Optional[dict]
+
+        :return: The LLM's responses, in prompt order.
+        :rtype: List[str]
+        """
+        started = time.perf_counter()
+        messages = [
+            self._messages(prompt, context)
+            for prompt, context in zip(prompts, contexts)
+        ]
+        keys = [self._cache_key(m, cache, params) for m in messages]
+        responses = [self._lookup(key) for key in keys]
+        missing = [i for i, response in enumerate(responses) if response is None]
+        lookup_latency = time.perf_counter() - started
+        for i, response in enumerate(responses):
+            if response is not None:
+                self._record(
+                    messages[i], response, template, lookup_latency, cached=True
+                )
+        if missing:
+            started = time.perf_counter()
+            generated = self.llm.ask_many(
+                [prompts[i] for i in missing],
+                [contexts[i] for i in missing],
+                params,
+            )
+            # A batch is timed as a whole; each completion gets an equal share.
+            latency = (time.perf_counter() - started) / len(missing)
+            for i, response in zip(missing, generated):
+                responses[i] = response
+                self._record(messages[i], response, template, latency)
+                if keys[i] is not None:
+                    self.cache.put(keys[i], response)
+        return responses
+
+    async def aask(
+        self,
+        prompt: str,
+        context="You are a helpful assistant.",
+        cache: Optional[bool] = None,
+        template: Optional[str] = None,
+        params: Optional[dict] = None,
+    ) -> str:
+        """
+        Asynchronously ask the LLM a question with a given prompt and context.
+
+        :param prompt: The prompt to send to the LLM.
+        :type prompt: str
+
+        :param context: Additional context for the LLM (default is "You are a helpful assistant.").
+        :type context: str
+
+        :param cache: False to bypass the response cache, True to cache even a
+            sampled generation (default follows the settings).
+        :type cache: Optional[bool]
+
+        :param template: The name of the prompt template, for usage records.
+        :type template: Optional[str]
+
+        :param params: The template's generation parameters.
+        :type params: Optional[dict]
+
+        :return: The LLM's response.
+        :rtype: str
+        """
+        messages = self._messages(prompt, context)
+        return await self._acached(
+            self._cache_key(messages, cache, params),
+            messages,
+            template,
+            lambda: self.llm.aask(prompt, context, params),
+        )
+
+    async def achat(
+        self,
+        chatlog: list,
+        cache: Optional[bool] = None,
+        template: Optional[str] = None,
+        params: Optional[dict] = None,
+    ) -> str:
+        """
+        Asynchronously continue a chat session with the LLM.
+
+        :param chatlog: A list of messages to include in the chat context.
+        :type chatlog: list
+
+        :param cache: False to bypass the response cache, True to cache even a
+            sampled generation (default follows the settings).
+        :type cache: Optional[bool]
+
+        :param template: The name of the prompt template, for usage records.
+        :type template: Optional[str]
+
+        :param params: The template's generation parameters.
+        :type params: Optional[dict]
+
         :return: The LLM's response.
         :rtype: str
         """
-        return self.llm.chat(chatlog)
+        return await self._acached(
+            self._cache_key(chatlog, cache, params),
+            chatlog,
+            template,
+            lambda: self.llm.achat(chatlog, params),
+        )
+
+    async def aclose(self):
+        """
+        Release the backend's resources bound to the running event loop.
+        """
+        await self.llm.aclose()
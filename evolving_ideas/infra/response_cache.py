@@ -0,0 +1,238 @@
+"""
+evolving_ideas.infra.response_cache
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEMORY_SIZE = 256
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_TTL = 7 * 24 * 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_responses_accessed_at ON responses(accessed_at);
+CREATE INDEX IF NOT EXISTS ix_responses_created_at ON responses(created_at);
+"""
+
+
+def cache_key(backend: str, model: str, messages: list, params: dict) -> str:
+    """
+    Build the cache key of a generation request.
+
+    :param backend: The LLM backend name (e.g. "openai").
+    :type backend: str
+
+    :param model: The model name.
+    :type model: str
+
+    :param messages: The chat messages sent to the model.
+    :type messages: list
+
+    :param params: The generation parameters.
+    :type params: dict
+
+    :return: A hex digest identifying the request.
+    :rtype: str
+    """
+    payload = json.dumps(
+        {"backend": backend, "model": model, "messages": messages, "params": params},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def is_sampled(params: dict) -> bool:
+    """
+    Check whether generation parameters produce non-deterministic output.
+
+    :param params: The generation parameters.
+    :type params: dict
+
+    :return: True if the generation samples tokens.
+    :rtype: bool
+    """
+    if "sample" in params:
+        return bool(params["sample"])
+    if "do_sample" in params:
+        return bool(params["do_sample"])
+    # OpenAI samples with temperature 1 when none is given.
+    return float(params.get("temperature", 1.0)) > 0
+
+
+class ResponseCache:
+    """
+    Two-tier cache of LLM responses.
+    Lookups hit an in-memory LRU first, then a SQLite file shared between
+    sessions. Disk entries expire after ``ttl`` seconds, and the least
+    recently used ones are evicted once the file holds more than
+    ``max_bytes`` of responses.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        memory_size: int = DEFAULT_MEMORY_SIZE,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl: Optional[float] = DEFAULT_TTL,
+    ):
+        """
+        :param path: The path of the on-disk tier, or None for memory only.
+        :type path: Optional[Path]
+
+        :param memory_size: The number of responses kept in memory.
+        :type memory_size: int
+
+        :param max_bytes: The maximum size of the responses kept on disk.
+        :type max_bytes: int
+
+        :param ttl: The lifetime of a response in seconds, or None to keep
+            responses until they are evicted.
+        :type ttl: Optional[float]
+        """
+        self.path = Path(path).resolve() if path else None
+        self.memory_size = memory_size
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        if self.path:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self._connect() as conn:
+                conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl is not None and now - created_at > self.ttl
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a response.
+
+        :param key: The request key, see :func:`cache_key`.
+        :type key: str
+
+        :return: The cached response, or None on a miss.
+        :rtype: Optional[str]
+        """
+        now = time.time()
+        with self._lock:
+            hit = self._memory.get(key)
+            if hit is not None:
+                if not self._expired(hit[0], now):
+                    self._memory.move_to_end(key)
+                    return hit[1]
+                del self._memory[key]
+        if not self.path:
+            return None
+
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT response, created_at FROM responses WHERE key = ?",
+                    (key,),
+                ).fetchone()
+                if row is None:
+                    return None
+                response, created_at = row
+                if self._expired(created_at, now):
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    return None
+                conn.execute(
+                    "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read response cache: {e}")
+            return None
+        self._remember(key, created_at, response)
+        return response
+
+    def put(self, key: str, response: str):
+        """
+        Store a response in both tiers.
+
+        :param key: The request key, see :func:`cache_key`.
+        :type key: str
+
+        :param response: The response to store.
+        :type response: str
+        """
+        now = time.time()
+        self._remember(key, now, response)
+        if not self.path:
+            return
+
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses "
+                    "(key, response, size, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, response, len(response.encode("utf-8")), now, now),
+                )
+                self._evict(conn, now)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not write response cache: {e}")
+
+    def _remember(self, key: str, created_at: float, response: str):
+        with self._lock:
+            self._memory[key] = (created_at, response)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        if self.ttl is not None:
+            conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (now - self.ttl,)
+            )
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+        excess = total[0] - self.max_bytes
+        if excess <= 0:
+            return
+        evicted = 0
+        for key, size in conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at"
+        ).fetchall():
+            if excess <= 0:
+                break
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            excess -= size
+            evicted += 1
+        logger.debug(f"Evicted {evicted} responses from {self.path}")
+
+    def clear(self):
+        """
+        Remove every cached response.
+        """
+        with self._lock:
+            self._memory.clear()
+        if self.path:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM responses")
@@ -0,0 +1,377 @@
+"""
+evolving_ideas.infra.usage
+"""
+
+import json
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from evolving_ideas.common.ids import new_ulid
+
+logger = logging.getLogger(__name__)
+
+# USD per million tokens; a model matches the longest name it starts with, so
+# dated snapshots such as "gpt-4.1-2025-04-14" use their family's price.
+DEFAULT_PRICES = {
+    "gpt-4.1": {"prompt": 2.00, "completion": 8.00},
+    "gpt-4.1-mini": {"prompt": 0.40, "completion": 1.60},
+    "gpt-4.1-nano": {"prompt": 0.10, "completion": 0.40},
+    "gpt-4o": {"prompt": 2.50, "completion": 10.00},
+    "gpt-4o-mini": {"prompt": 0.15, "completion": 0.60},
+    "gpt-4": {"prompt": 30.00, "completion": 60.00},
+    "gpt-3.5-turbo": {"prompt": 0.50, "completion": 1.50},
+}
+
+# Backends running on this machine cost nothing per token.
+LOCAL_BACKENDS = ("local", "worker", "replay")
+
+GROUP_FIELDS = ("backend", "model", "strategy", "template", "session")
+
+
+@dataclass
+class UsageRecord:
+    """
+    Token usage, latency and estimated cost of a single completion.
+    """
+
+    backend: str
+    model: str
+    template: Optional[str]
+    strategy: Optional[str]
+    prompt_tokens: int
+    completion_tokens: int
+    latency: float
+    cost: Optional[float]
+    cached: bool = False
+    session: Optional[str] = None
+    timestamp: float = field(default_factory=time.time)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Roughly count the tokens of a text, at about four characters per token,
+    for backends that cannot count them exactly.
+
+    :param text: The text.
+    :type text: str
+
+    :return: The estimated number of tokens.
+    :rtype: int
+    """
+    return math.ceil(len(text) / 4) if text else 0
+
+
+_reported: ContextVar[Optional[dict]] = ContextVar("llm_usage_reported", default=None)
+
+
+def report_usage(prompt_tokens: int, completion_tokens: int):
+    """
+    Report the exact token counts of the completion being measured.
+    Backends call this when the API returns usage; otherwise the tokens are
+    counted with the backend's :meth:`count_tokens`.
+
+    :param prompt_tokens: The tokens in the prompt.
+    :type prompt_tokens: int
+
+    :param completion_tokens: The tokens in the completion.
+    :type completion_tokens: int
+    """
+    reported = _reported.get()
+    if reported is not None:
+        reported["prompt_tokens"] = prompt_tokens
+        reported["completion_tokens"] = completion_tokens
+
+
+@contextmanager
+def measure_usage() -> Iterator[dict]:
+    """
+    Collect the usage reported by a backend during a completion.
+
+    :return: A dictionary filled by :func:`report_usage`, empty if the backend
+        reported nothing.
+    :rtype: Iterator[dict]
+    """
+    reported = {}
+    token = _reported.set(reported)
+    try:
+        yield reported
+    finally:
+        try:
+            _reported.reset(token)
+        except ValueError:
+            # A stream abandoned and closed from another context.
+            pass
+
+
+def _totals(records: Sequence[UsageRecord]) -> dict:
+    costs = [record.cost for record in records if record.cost is not None]
+    return {
+        "calls": len(records),
+        "cached_calls": sum(record.cached for record in records),
+        "prompt_tokens": sum(record.prompt_tokens for record in records),
+        "completion_tokens": sum(record.completion_tokens for record in records),
+        "latency": round(sum(record.latency for record in records), 3),
+        "cost": round(sum(costs), 6) if costs else None,
+    }
+
+
+class UsageSession:
+    """
+    The usage records of one chat session, rolled up into the idea's
+    ``method_metadata``.
+    """
+
+    def __init__(self, strategy: Optional[str] = None):
+        """
+        :param strategy: The strategy run by the session.
+        :type strategy: Optional[str]
+        """
+        self.id = new_ulid()
+        self.strategy = strategy
+        self.records: List[UsageRecord] = []
+        self._lock = threading.Lock()
+
+    def add(self, record: UsageRecord):
+        with self._lock:
+            self.records.append(record)
+
+    def summary(self) -> dict:
+        """
+        Roll up the session's usage.
+
+        :return: The totals, and the totals of each prompt template.
+        :rtype: dict
+        """
+        with self._lock:
+            records = list(self.records)
+        by_template: Dict[str, List[UsageRecord]] = {}
+        for record in records:
+            by_template.setdefault(record.template or "-", []).append(record)
+        return {
+            "session": self.id,
+            **_totals(records),
+            "by_template": {
+                name: _totals(group) for name, group in sorted(by_template.items())
+            },
+        }
+
+
+_session: ContextVar[Optional[UsageSession]] = ContextVar(
+    "llm_usage_session", default=None
+)
+
+
+class UsageTracker:
+    """
+    Records the usage of every completion.
+    Records are appended as JSON lines to a metrics file and added to the
+    current :class:`UsageSession`. Sessions are tracked per context, so calls
+    made from worker threads and event loops started by a strategy are
+    attributed to it.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        prices: Optional[Dict[str, dict]] = None,
+    ):
+        """
+        :param path: The metrics file, or None to keep records in sessions only.
+        :type path: Optional[Path]
+
+        :param prices: Prices in USD per million prompt and completion tokens,
+            by model, overriding :data:`DEFAULT_PRICES`.
+        :type prices: Optional[Dict[str, dict]]
+        """
+        self.path = Path(path).resolve() if path else None
+        self.prices = {**DEFAULT_PRICES, **(prices or {})}
+        self._lock = threading.Lock()
+
+    def cost(
+        self, backend: str, model: str, prompt_tokens: int, completion_tokens: int
+    ) -> Optional[float]:
+        """
+        Estimate the cost of a completion.
+
+        :param backend: The LLM backend name.
+        :type backend: str
+
+        :param model: The model name.
+        :type model: str
+
+        :param prompt_tokens: The tokens in the prompt.
+        :type prompt_tokens: int
+
+        :param completion_tokens: The tokens in the completion.
+        :type completion_tokens: int
+
+        :return: The cost in USD, or None if the model has no known price.
+        :rtype: Optional[float]
+        """
+        if backend in LOCAL_BACKENDS:
+            return 0.0
+        matches = [name for name in self.prices if model.startswith(name)]
+        if not matches:
+            return None
+        price = self.prices[max(matches, key=len)]
+        return (
+            prompt_tokens * price["prompt"] + completion_tokens * price["completion"]
+        ) / 1_000_000
+
+    def record(
+        self,
+        backend: str,
+        model: str,
+        template: Optional[str],
+        prompt_tokens: int,
+        completion_tokens: int,
+        latency: float,
+        cached: bool = False,
+    ) -> UsageRecord:
+        """
+        Record the usage of a completion.
+
+        :param backend: The LLM backend name.
+        :type backend: str
+
+        :param model: The model name.
+        :type model: str
+
+        :param template: The prompt template the completion answered, if known.
+        :type template: Optional[str]
+
+        :param prompt_tokens: The tokens in the prompt.
+        :type prompt_tokens: int
+
+        :param completion_tokens: The tokens in the completion.
+        :type completion_tokens: int
+
+        :param latency: The wall time of the call, in seconds.
+        :type latency: float
+
+        :param cached: Whether the response came from the response cache.
+        :type cached: bool
+
+        :return: The record.
+        :rtype: UsageRecord
+        """
+        session = _session.get()
+        record = UsageRecord(
+            backend=backend,
+            model=model,
+            template=template,
+            strategy=session.strategy if session else None,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            latency=latency,
+            cost=(
+                0.0
+                if cached
+                else self.cost(backend, model, prompt_tokens, completion_tokens)
+            ),
+            cached=cached,
+            session=session.id if session else None,
+        )
+        if session is not None:
+            session.add(record)
+        if self.path is not None:
+            self._append(record)
+        return record
+
+    def _append(self, record: UsageRecord):
+        line = json.dumps(asdict(record), ensure_ascii=False) + "\n"
+        try:
+            with self._lock:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line)
+        except OSError as e:
+            logger.warning(f"Could not write usage record: {e}")
+
+    @contextmanager
+    def session(self, strategy: Optional[str] = None) -> Iterator[UsageSession]:
+        """
+        Attribute the completions made inside the block to a new session.
+
+        :param strategy: The strategy run by the session.
+        :type strategy: Optional[str]
+
+        :return: The session collecting the records.
+        :rtype: Iterator[UsageSession]
+        """
+        session = UsageSession(strategy)
+        token = _session.set(session)
+        try:
+            yield session
+        finally:
+            _session.reset(token)
+
+
+def load_usage(path: Path, since: Optional[datetime] = None) -> List[UsageRecord]:
+    """
+    Read the records of a metrics file.
+
+    :param path: The metrics file.
+    :type path: Path
+
+    :param since: Only read records made at or after this time.
+    :type since: Optional[datetime]
+
+    :return: The records, oldest first.
+    :rtype: List[UsageRecord]
+    """
+    path = Path(path)
+    if not path.exists():
+        return []
+    start = since.timestamp() if since else None
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = UsageRecord(**json.loads(line))
+            except (ValueError, TypeError) as e:
+                logger.warning(f"Skipping malformed usage record {path}:{number}: {e}")
+                continue
+            if start is None or record.timestamp >= start:
+                records.append(record)
+    return records
+
+
+def aggregate(records: Sequence[UsageRecord], by: Sequence[str]) -> List[dict]:
+    """
+    Total usage records by some of their fields.
+
+    :param records: The records.
+    :type records: Sequence[UsageRecord]
+
+    :param by: The fields to group by, see :data:`GROUP_FIELDS`.
+    :type by: Sequence[str]
+
+    :return: One row per group with the group fields and the totals, sorted by
+        decreasing cost.
+    :rtype: List[dict]
+    """
+    unknown = set(by) - set(GROUP_FIELDS)
+    if unknown:
+        raise ValueError(f"Cannot group usage by: {', '.join(sorted(unknown))}")
+    groups: Dict[tuple, List[UsageRecord]] = {}
+    for record in records:
+        key = tuple(getattr(record, name) or "-" for name in by)
+        groups.setdefault(key, []).append(record)
+    rows = [{**dict(zip(by, key)), **_totals(group)} for key, group in groups.items()]
+    rows.sort(key=lambda row: (-(row["cost"] or 0.0), -row["calls"]))
+    return rows
@@ -3,6 +3,7 @@ evolving_ideas.interface.presenters
 """
 
 from enum import Enum
+from typing import Iterable, Union
 
 
 class ChatPresenterRoles(Enum):
@@ -70,14 +71,34 @@ class ChatLogger:
         """
         self.log(message, role=ChatPresenterRoles.USER)
 
-    def assistant(self, message: str):
+    def assistant(self, message: Union[str, Iterable[str]]) -> str:
         """
         Log an assistant message.
+        A message given as an iterable of chunks (e.g. a streamed LLM
+        response) is rendered chunk by chunk as it arrives.
 
-        :param message: The assistant message to log.
-        :type message: str
+        :param message: The assistant message to log, or its chunks.
+        :type message: Union[str, Iterable[str]]
+
+        :return: The complete message.
+        :rtype: str
         """
-        self.log(message, role=ChatPresenterRoles.ASSISTANT)
+        if isinstance(message, str):
+            self.log(message, role=ChatPresenterRoles.ASSISTANT)
+            return message
+
+        role = ChatPresenterRoles.ASSISTANT
+        print(
+            f"{ChatPresenterRoleIcons[role.name].value} {role.value.capitalize()}: ",
+            end="",
+            flush=True,
+        )
+        chunks = []
+        for chunk in message:
+            chunks.append(chunk)
+            print(chunk, end="", flush=True)
+        print()
+        return "".join(chunks)
 
 
 chat_logger = ChatLogger()
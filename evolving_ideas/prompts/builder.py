@@ -40,3 +40,16 @@ class PromptBuilder:
         if not template:
             raise ValueError(f"Prompt template '{name}' not found.")
         return template.format(**context)
+
+    def generation_params(self, name: str) -> dict:
+        """
+        Get the generation parameters declared for a template, to pass to
+        the LLM responder with the prompt.
+
+        :param name: The name of the template
+        :type name: str
+
+        :return: The generation parameters
+        :rtype: dict
+        """
+        return self.store.generation_params(name)
@@ -10,10 +10,13 @@ import yaml
 class PromptTemplateStore:
     """
     Singleton to load and cache prompt templates from YAML.
+    The generation parameters of each template are read from
+    ``generation.yml`` next to the templates, when it exists.
     """
 
     _instance = None
     _templates = {}
+    _generation = {}
 
     def __new__(cls, path: Path = Path("evolving_ideas/prompts/templates.yml")):
         if cls._instance is None:
@@ -28,6 +31,10 @@ class PromptTemplateStore:
             raise FileNotFoundError(f"Prompt template file not found: {path}")
         with open(path, "r") as f:
             cls._templates = yaml.safe_load(f)
+        generation_path = path.with_name("generation.yml")
+        if generation_path.exists():
+            with open(generation_path, "r") as f:
+                cls._generation = yaml.safe_load(f) or {}
 
     def get(self, name: str) -> str:
         """
@@ -41,6 +48,18 @@ class PromptTemplateStore:
         """
         return self._templates.get(name)
 
+    def generation_params(self, name: str) -> dict:
+        """
+        Get the generation parameters of a prompt template.
+
+        :param name: The name of the template
+        :type name: str
+
+        :return: The parameters, empty if the template declares none
+        :rtype: dict
+        """
+        return dict(self._generation.get(name) or {})
+
     def all(self) -> dict:
         """
         Get all prompt templates.
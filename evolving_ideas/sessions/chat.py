@@ -58,7 +58,12 @@ class ChatSession:
         strategy: MethodStrategy = Registry.get(
             method, self.llm_responder, self.builder, self.logger
         )
-        result = strategy.run(role, task, context)
+        with self.llm_responder.usage.session(strategy=method) as usage:
+            result = strategy.run(role, task, context)
+        method_metadata = {
+            **result.get("method_metadata", {}),
+            "usage": usage.summary(),
+        }
 
         return {
             "role": role,
@@ -67,5 +72,5 @@ class ChatSession:
             "qna": result["qna"],
             "summary": result["summary"],
             "method": method,
-            "method_metadata": result.get("method_metadata", {}),
+            "method_metadata": method_metadata,
         }
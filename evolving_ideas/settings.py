@@ -45,11 +45,54 @@ class Settings:
                 "backend": "local",
                 "model": "sshleifer/tiny-gpt2",
                 "path": "./.models/tiny-gpt2",
+                "batch_size": 8,
+                "worker": {"enabled": True, "socket": ".storage/llm_worker.sock"},
+                "prefix_cache": {"max_bytes": 256 * 1024 * 1024, "min_tokens": 64},
+                "inference": {
+                    "threads": None,
+                    "dtype": "float32",
+                    "quantize": False,
+                    "runtime": "torch",
+                },
+                "offline": False,
+                "openai": {"model": os.getenv("OPENAI_MODEL", "gpt-4.1")},
+                "validation_ttl": 24 * 3600,
+                "rate_limits": {
+                    "requests_per_minute": None,
+                    "tokens_per_minute": None,
+                    "max_in_flight": 8,
+                    "max_retries": 5,
+                },
+                "usage": {"path": ".storage/usage.jsonl", "prices": {}},
+                "replay": {
+                    "path": ".storage/llm_replay.jsonl",
+                    "mode": "replay",
+                    "backend": "openai",
+                    "latency": 0.0,
+                    "tokens_per_second": None,
+                    "strict": True,
+                    "batching": False,
+                },
+                "cache": {
+                    "enabled": True,
+                    "path": ".storage/llm_cache.db",
+                    "memory_size": 256,
+                    "max_bytes": 64 * 1024 * 1024,
+                    "ttl": 7 * 24 * 3600,
+                    "sampled": False,
+                },
             }
         }
         cls._data = {
             "storage_path": ".storage/ideas",
             "cached_path": ".storage/cached.yml",
+            "storage_format": "yaml",
+            "blob_threshold": 2048,
+            "snapshot_interval": None,
+            "shard_depth": 0,
+            "strategies": {
+                "lotus_blossom": {"concurrency": 8, "retries": 2, "retry_delay": 0.5}
+            },
             **env_data,
         }
 
@@ -2,8 +2,9 @@
 evolving_ideas.strategies.base
 """
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Iterator, List, Optional
 
 from evolving_ideas.infra.responder import LLMResponder
 from evolving_ideas.interface.presenters import ChatLogger
@@ -51,3 +52,85 @@ class MethodStrategy(ABC):
         :return: A dictionary containing the results of the strategy.
         :rtype: dict
         """
+
+    def _generation(self, template: str) -> dict:
+        """
+        Name a template and its generation parameters for an LLM responder
+        call answering a prompt built from it.
+
+        :param template: The name of the template.
+        :type template: str
+
+        :return: The ``template`` and ``params`` arguments of the call.
+        :rtype: dict
+        """
+        return {
+            "template": template,
+            "params": self.builder.generation_params(template),
+        }
+
+    def ask_each(
+        self, prompts: List[str], context: str, template: Optional[str] = None
+    ) -> Iterator[str]:
+        """
+        Ask the LLM several independent prompts.
+        When the backend supports batching, all prompts are generated in one
+        batch up front; otherwise each prompt is asked when its response is
+        consumed, so interactive steps stay interleaved.
+
+        :param prompts: The prompts to send.
+        :type prompts: List[str]
+        :param context: The context shared by all prompts.
+        :type context: str
+        :param template: The name of the template the prompts were built from.
+        :type template: Optional[str]
+
+        :return: The responses, in prompt order.
+        :rtype: Iterator[str]
+        """
+        options = self._generation(template) if template else {}
+        if self.llm_responder.supports_batching:
+            yield from self.llm_responder.ask_many(
+                prompts, [context] * len(prompts), **options
+            )
+            return
+        for prompt in prompts:
+            yield self.llm_responder.ask(prompt, context, **options)
+
+    def summarize(self, qna: List[dict], context: str) -> str:
+        """
+        Summarize the collected answers, streaming the summary to the user as
+        it is generated.
+
+        :param qna: The question and answer pairs.
+        :type qna: List[dict]
+        :param context: Context for the idea.
+        :type context: str
+
+        :return: The summary.
+        :rtype: str
+        """
+        summary_prompt = self.builder.build("summarize_answers", {"qna": qna})
+        return self.logger.assistant(
+            self.llm_responder.stream(
+                summary_prompt, context, **self._generation("summarize_answers")
+            )
+        )
+
+    async def arun(self, role: str, task: str, context: str) -> dict:
+        """
+        Run the strategy from an event loop.
+        Strategies that issue independent LLM calls override this to run them
+        concurrently; the default runs :meth:`run` in a worker thread.
+
+        :param role: The role of the AI.
+        :type role: str
+        :param task: The task to be performed.
+        :type task: str
+        :param context: Context for the idea.
+        :type context: str
+
+        :return: A dictionary containing the results of the strategy.
+        :rtype: dict
+        """
+        return await asyncio.to_thread(self.run, role, task, context)
@@ -17,7 +17,9 @@ class ClassicMethod(MethodStrategy):
         prompt = self.builder.build(
             "ask_questions", {"role": role, "task": task, "context": context}
         )
-        questions_text = self.llm_responder.ask(prompt, context)
+        questions_text = self.llm_responder.ask(
+            prompt, context, **self._generation("ask_questions")
+        )
         questions = [
             q.strip("- ").strip() for q in questions_text.split("\n") if q.strip()
         ]
@@ -31,8 +33,7 @@ class ClassicMethod(MethodStrategy):
                 self.logger.user(f"Answer: {answer}")
 
         self.logger.system("Summarizing idea...")
-        summary_prompt = self.builder.build("summarize_answers", {"qna": qna})
-        summary = self.llm_responder.ask(summary_prompt, context)
+        summary = self.summarize(qna, context)
 
         return {
             "qna": qna,
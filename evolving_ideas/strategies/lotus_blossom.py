@@ -2,29 +2,95 @@
 evolving_ideas.strategies.lotus_blossom
 """
 
+import asyncio
+import logging
+from typing import List, Optional
+
+from evolving_ideas.infra.responder import LLMResponder
+from evolving_ideas.interface.presenters import ChatLogger
+from evolving_ideas.prompts.builder import PromptBuilder
+from evolving_ideas.settings import settings
 from evolving_ideas.strategies.registry import Registry
 
 from .base import MethodStrategy
 
+logger = logging.getLogger(__name__)
+
+
+def _split_ideas(response: str) -> List[str]:
+    return [line.strip("-• ").strip() for line in response.split("\n") if line.strip()]
+
 
 class LotusBlossomMethod(MethodStrategy):
     """
     A strategy for the Lotus Blossom brainstorming technique.
+    The core ideas are expanded in one batch when the backend supports it,
+    otherwise concurrently, at most ``concurrency`` at a time; a failed
+    concurrent expansion is retried on its own up to ``retries`` times, with
+    an exponential backoff starting at ``retry_delay`` seconds.
     """
 
+    def __init__(
+        self,
+        llm_responder: LLMResponder,
+        builder: Optional[PromptBuilder] = None,
+        chat_logger: Optional[ChatLogger] = None,
+        concurrency: Optional[int] = None,
+        retries: Optional[int] = None,
+        retry_delay: Optional[float] = None,
+    ):
+        """
+        :param llm_responder: The LLM responder to use for generating responses.
+        :type llm_responder: Optional[LLMResponder]
+
+        :param builder: The prompt builder to use for generating prompts.
+        :type builder: Optional[PromptBuilder]
+
+        :param concurrency: The maximum number of expansions in flight
+            (default is the ``strategies.lotus_blossom.concurrency`` setting).
+        :type concurrency: Optional[int]
+
+        :param retries: The number of retries of a failed expansion (default is
+            the ``strategies.lotus_blossom.retries`` setting).
+        :type retries: Optional[int]
+
+        :param retry_delay: The delay before the first retry, in seconds,
+            doubled for each further one (default is the
+            ``strategies.lotus_blossom.retry_delay`` setting).
+        :type retry_delay: Optional[float]
+        """
+        super().__init__(llm_responder, builder, chat_logger)
+        if concurrency is None:
+            concurrency = settings.get("strategies.lotus_blossom.concurrency", 8)
+        if retries is None:
+            retries = settings.get("strategies.lotus_blossom.retries", 2)
+        if retry_delay is None:
+            retry_delay = settings.get("strategies.lotus_blossom.retry_delay", 0.5)
+        self.concurrency = max(1, int(concurrency))
+        self.retries = max(0, int(retries))
+        self.retry_delay = max(0.0, float(retry_delay))
+
     def run(self, role: str, task: str, context: str) -> dict:
+        return asyncio.run(self.arun(role, task, context))
+
+    async def arun(self, role: str, task: str, context: str) -> dict:
+        try:
+            return await self._blossom(role, task, context)
+        finally:
+            # Pooled clients are bound to this event loop.
+            await self.llm_responder.aclose()
+
+    async def _blossom(self, role: str, task: str, context: str) -> dict:
         self.logger.system("Starting Lotus Blossom technique...")
 
         # Step 1: Get 8 core related ideas
         core_prompt = self.builder.build(
             "lotus_core_ideas", {"role": role, "task": task, "context": context}
         )
-        core_response = self.llm_responder.ask(core_prompt, context)
-        core_ideas = [
-            line.strip("-• ").strip()
-            for line in core_response.split("\n")
-            if line.strip()
-        ]
+        core_response = await self.llm_responder.aask(
+            core_prompt, context, **self._generation("lotus_core_ideas")
+        )
+        core_ideas = _split_ideas(core_response)
         self.logger.system("Core branches:")
         for idea in core_ideas:
             self.logger.assistant(f"- {idea}")
@@ -33,21 +99,33 @@ class LotusBlossomMethod(MethodStrategy):
             {"question": "What are 8 related ideas?", "answer": core_response.strip()}
         ]
 
-        # Step 2: Expand each core idea
-        expansion_map = {}
-        for idea in core_ideas:
-            self.logger.system(f"Expanding idea: {idea}")
-            sub_prompt = self.builder.build(
+        # Step 2: Expand each core idea; results keep the core idea order
+        sub_prompts = [
+            self.builder.build(
                 "lotus_sub_ideas",
                 {"role": role, "task": task, "context": context, "idea": idea},
             )
-            sub_response = self.llm_responder.ask(sub_prompt, context)
-            sub_ideas = [
-                line.strip("-• ").strip()
-                for line in sub_response.split("\n")
-                if line.strip()
-            ]
-            expansion_map[idea] = sub_ideas
+            for idea in core_ideas
+        ]
+        if self.llm_responder.supports_batching:
+            self.logger.system(f"Expanding {len(core_ideas)} ideas in a batch")
+            sub_responses = await asyncio.to_thread(
+                self.llm_responder.ask_many,
+                sub_prompts,
+                [context] * len(sub_prompts),
+                **self._generation("lotus_sub_ideas"),
+            )
+        else:
+            semaphore = asyncio.Semaphore(self.concurrency)
+            sub_responses = await asyncio.gather(
+                *(
+                    self._expand(semaphore, idea, sub_prompt, context)
+                    for idea, sub_prompt in zip(core_ideas, sub_prompts)
+                )
+            )
+        expansion_map = {}
+        for idea, sub_response in zip(core_ideas, sub_responses):
+            expansion_map[idea] = _split_ideas(sub_response)
             qna.append(
                 {
                     "question": f"What are 8 sub-ideas for '{idea}'?",
@@ -56,8 +134,7 @@ class LotusBlossomMethod(MethodStrategy):
             )
 
         self.logger.system("Summarizing Lotus Blossom output...")
-        summary_prompt = self.builder.build("summarize_answers", {"qna": qna})
-        summary = self.llm_responder.ask(summary_prompt, context)
+        summary = await asyncio.to_thread(self.summarize, qna, context)
 
         return {
             "qna": qna,
@@ -69,5 +146,25 @@ class LotusBlossomMethod(MethodStrategy):
             },
         }
 
+    async def _expand(
+        self, semaphore: asyncio.Semaphore, idea: str, sub_prompt: str, context: str
+    ) -> str:
+        async with semaphore:
+            self.logger.system(f"Expanding idea: {idea}")
+            for attempt in range(self.retries + 1):
+                try:
+                    return await self.llm_responder.aask(
+                        sub_prompt, context, **self._generation("lotus_sub_ideas")
+                    )
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    if attempt == self.retries:
+                        raise
+                    delay = self.retry_delay * 2**attempt
+                    logger.warning(
+                        f"Expansion of '{idea}' failed ({e}), retrying in "
+                        f"{delay:.1f}s ({attempt + 1}/{self.retries})"
+                    )
+                    await asyncio.sleep(delay)
+
 
 Registry.register("lotus_blossom", LotusBlossomMethod)
@@ -25,13 +25,18 @@ class ScamperMethod(MethodStrategy):
     def run(self, role: str, task: str, context: str) -> dict:
         qna = []
 
-        for step in self.SCAMPER_STEPS:
-            self.logger.system(f"Applying SCAMPER: {step}")
-            prompt = self.builder.build(
+        prompts = [
+            self.builder.build(
                 "scamper_step",
                 {"role": role, "task": task, "context": context, "step": step},
             )
-            question = self.llm_responder.ask(prompt, context).strip()
+            for step in self.SCAMPER_STEPS
+        ]
+        questions = self.ask_each(prompts, context, template="scamper_step")
+
+        for step in self.SCAMPER_STEPS:
+            self.logger.system(f"Applying SCAMPER: {step}")
+            question = next(questions).strip()
             self.logger.assistant(question)
 
             answer = input("> ").strip()
@@ -40,8 +45,7 @@ class ScamperMethod(MethodStrategy):
                 self.logger.user(f"Answer: {answer}")
 
         self.logger.system("Summarizing SCAMPER results...")
-        summary_prompt = self.builder.build("summarize_answers", {"qna": qna})
-        summary = self.llm_responder.ask(summary_prompt, context)
+        summary = self.summarize(qna, context)
 
         return {
             "qna": qna,
@@ -23,9 +23,8 @@ class SixHatsMethod(MethodStrategy):
 
     def run(self, role: str, task: str, context: str) -> dict:
         qna = []
-        for hat, description in self.HATS.items():
-            self.logger.system(f"Thinking with the {hat} Hat: {description}")
-            prompt = self.builder.build(
+        prompts = [
+            self.builder.build(
                 "six_hats_step",
                 {
                     "role": role,
@@ -35,7 +34,13 @@ class SixHatsMethod(MethodStrategy):
                     "description": description,
                 },
             )
-            question = self.llm_responder.ask(prompt, context).strip()
+            for hat, description in self.HATS.items()
+        ]
+        questions = self.ask_each(prompts, context, template="six_hats_step")
+
+        for hat, description in self.HATS.items():
+            self.logger.system(f"Thinking with the {hat} Hat: {description}")
+            question = next(questions).strip()
             self.logger.assistant(question)
 
             answer = input("> ").strip()
@@ -44,8 +49,7 @@ class SixHatsMethod(MethodStrategy):
                 self.logger.user(f"Answer: {answer}")
 
         self.logger.system("Summarizing Six Hats insights...")
-        summary_prompt = self.builder.build("summarize_answers", {"qna": qna})
-        summary = self.llm_responder.ask(summary_prompt, context)
+        summary = self.summarize(qna, context)
 
         return {
             "qna": qna,
@@ -0,0 +1,117 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+_COMPLETION = {
+    "id": "chatcmpl-test",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt-test",
+    "choices": [
+        {
+            "index": 0,
+            "message": {"role": "assistant", "content": "ok"},
+            "finish_reason": "stop",
+        }
+    ],
+    "usage": {"prompt_tokens": 3, "completion_tokens": 1, "total_tokens": 4},
+}
+
+
+class _FakeOpenAI(BaseHTTPRequestHandler):
+    """
+    Answers chat completions from the requested model, throttling the first
+    ``throttle`` requests with a 429 and tracking how many requests are
+    served at once.
+    """
+
+    throttle = 0
+    delay = 0.0
+    requests = 0
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        cls = type(self)
+        with cls.lock:
+            cls.requests += 1
+            throttled = cls.requests <= cls.throttle
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        try:
+            time.sleep(cls.delay)
+            if throttled:
+                body = {"error": {"message": "Rate limit reached", "type": "requests"}}
+                self._reply(429, body, {"retry-after-ms": "50"})
+            else:
+                self._reply(200, {**_COMPLETION, "model": request["model"]})
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+    def _reply(self, status, body, headers=None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    handler = type("Handler", (_FakeOpenAI,), {"lock": threading.Lock()})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("OPENAI_BASE_URL", f"http://127.0.0.1:{server.server_port}/v1")
+    yield handler
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(scope="session")
+def tiny_model(tmp_path_factory):
+    """
+    A randomly initialized two-layer GPT-2 with a character-level tokenizer,
+    built locally so that no download is needed.
+    """
+    transformers = pytest.importorskip("transformers")
+    tokenizers = pytest.importorskip("tokenizers")
+    directory = tmp_path_factory.mktemp("tiny-gpt2")
+    vocab = {
+        "<eos>": 0,
+        **{c: i + 1 for i, c in enumerate(" abcdefghijklmnopqrstuvwxyz")},
+    }
+    tokenizer = tokenizers.Tokenizer(
+        tokenizers.models.WordLevel(vocab, unk_token="<eos>")
+    )
+    tokenizer.pre_tokenizer = tokenizers.pre_tokenizers.Split("", "isolated")
+    tokenizer.decoder = tokenizers.decoders.Fuse()
+    transformers.PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer, eos_token="<eos>"
+    ).save_pretrained(directory)
+    transformers.set_seed(0)
+    config = transformers.GPT2Config(
+        vocab_size=len(vocab),
+        n_positions=256,
+        n_embd=32,
+        n_layer=2,
+        n_head=2,
+        bos_token_id=0,
+        eos_token_id=0,
+        # Wide weights keep the greedy output from repeating one character.
+        initializer_range=1.0,
+    )
+    transformers.GPT2LMHeadModel(config).save_pretrained(directory)
+    return str(directory)
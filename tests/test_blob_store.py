@@ -0,0 +1,73 @@
+from dataclasses import replace
+
+from evolving_ideas.common.blob_store import BlobStore, LazyBlobDict, is_blob_ref
+from evolving_ideas.domain.models.idea import QAPair
+from evolving_ideas.domain.repositories.idea_repository import IdeaRepository
+
+STEPS = ["Substitute the frame with bamboo."] * 40
+
+
+def test_large_values_are_stored_once(tmp_path):
+    blobs = BlobStore(tmp_path / "blobs", threshold=256)
+
+    first = blobs.externalize({"steps": STEPS, "note": "short"})
+    second = blobs.externalize({"steps": list(STEPS)})
+
+    assert is_blob_ref(first["steps"]) and first["note"] == "short"
+    assert first["steps"] == second["steps"]
+    assert len(list((tmp_path / "blobs").iterdir())) == 1
+    assert blobs.get(first["steps"]) == STEPS
+
+
+def test_lazy_dict_loads_blobs_on_access(tmp_path):
+    blobs = BlobStore(tmp_path / "blobs", threshold=256)
+    stored = blobs.externalize({"steps": STEPS, "note": "short"})
+    lazy = LazyBlobDict(stored, blobs)
+
+    # Writing back an untouched or unchanged value keeps its reference.
+    assert lazy.to_refs(blobs) == stored
+    assert lazy["steps"] == STEPS
+    assert lazy.to_refs(blobs) == stored
+    lazy["steps"].append("Eliminate the chain.")
+    assert blobs.get(lazy.to_refs(blobs)["steps"]) == STEPS + ["Eliminate the chain."]
+    lazy["steps"] = ["Combine"]
+    assert lazy.to_refs(blobs) == {"steps": ["Combine"], "note": "short"}
+
+
+def test_repository_round_trips_externalized_metadata(tmp_path):
+    repo = IdeaRepository(tmp_path / "ideas", blob_threshold=256)
+    tree = repo.add(
+        role="Inventor",
+        task="Bamboo bicycles",
+        qna=[QAPair(question="Why?", answer="Because.")],
+        summary="Light frames.",
+        author="alice",
+        method="scamper",
+        method_metadata={"steps": STEPS},
+    )
+
+    assert list((tree.idea_dir / "blobs").iterdir())
+    loaded = repo.load(tree.metadata["id"]).current_version()
+    assert loaded.method_metadata["steps"] == STEPS
+
+
+def test_in_place_edits_of_loaded_metadata_are_saved(tmp_path):
+    repo = IdeaRepository(tmp_path / "ideas", blob_threshold=256)
+    tree = repo.add(
+        role="Inventor",
+        task="Bamboo bicycles",
+        qna=[QAPair(question="Why?", answer="Because.")],
+        summary="Light frames.",
+        author="alice",
+        method="scamper",
+        method_metadata={"steps": STEPS},
+    )
+
+    tree = repo.load(tree.metadata["id"])
+    parent = tree.current_version()
+    parent.method_metadata["steps"][0] = "Bamboo and hemp."
+    tree.add_new_version(replace(parent, version=2, parent_id="1"))
+
+    loaded = repo.load(tree.metadata["id"]).current_version()
+    assert loaded.version == 2
+    assert loaded.method_metadata["steps"] == ["Bamboo and hemp."] + STEPS[1:]
@@ -0,0 +1,41 @@
+import pytest
+
+from evolving_ideas.domain.models.idea import QAPair
+from evolving_ideas.domain.repositories.idea_repository import IdeaRepository
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = IdeaRepository(tmp_path / "ideas")
+    for n in range(6):
+        repo.add(
+            role="Inventor",
+            task=f"Idea {n}",
+            qna=[QAPair(question="Why?", answer="Because.")],
+            summary=f"Summary {n}",
+            author="alice",
+            method="classic",
+            method_metadata={},
+        )
+    return repo
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_iter_all_loads_every_idea(repo, executor):
+    results = list(repo.iter_all(workers=2, executor=executor))
+
+    assert sorted(r.idea_id for r in results) == repo.list()
+    assert all(r.ok for r in results)
+    summaries = {r.tree.current_version().summary for r in results}
+    assert summaries == {f"Summary {n}" for n in range(6)}
+
+
+def test_load_many_reports_failures_without_stopping(repo):
+    ids = repo.list()
+    results = {r.idea_id: r for r in repo.load_many([ids[0], "idea_missing", ids[1]])}
+
+    assert results.keys() == {ids[0], "idea_missing", ids[1]}
+    assert results[ids[0]].ok and results[ids[1]].ok
+    assert isinstance(results["idea_missing"].error, FileNotFoundError)
+    with pytest.raises(ValueError):
+        list(repo.load_many(ids, executor="fiber"))
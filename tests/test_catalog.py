@@ -0,0 +1,99 @@
+import dataclasses
+
+import pytest
+
+from evolving_ideas.domain.models.idea import QAPair
+from evolving_ideas.domain.repositories.idea_repository import IdeaRepository
+from evolving_ideas.settings import settings
+
+IDEAS = [
+    ("Solar roads", "alice", "scamper"),
+    ("Quiet drones", "bob", "six_hats"),
+    ("Edible cups", "alice", "lotus_blossom"),
+    ("Paper batteries", "carol", "scamper"),
+]
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = IdeaRepository(tmp_path / "ideas")
+    for task, author, method in IDEAS:
+        repo.add(
+            role="Inventor",
+            task=task,
+            qna=[QAPair(question="Why?", answer="Because.")],
+            summary=f"About {task}.",
+            author=author,
+            method=method,
+            method_metadata={},
+        )
+    return repo
+
+
+def _titles(entries):
+    return [entry.title for entry in entries]
+
+
+def test_query_filters_and_sorts(repo):
+    assert _titles(repo.search(author="alice")) == ["Solar roads", "Edible cups"]
+    assert _titles(repo.search(method="scamper", order_by="title")) == [
+        "Paper batteries",
+        "Solar roads",
+    ]
+    assert _titles(repo.search(order_by="title", descending=True, limit=2)) == [
+        "Solar roads",
+        "Quiet drones",
+    ]
+    assert _titles(repo.recent(2)) == ["Paper batteries", "Edible cups"]
+    with pytest.raises(ValueError):
+        repo.search(order_by="summary")
+
+
+def test_new_versions_update_the_catalog(repo):
+    idea_id = repo.search(author="bob")[0].id
+    tree = repo.load(idea_id)
+    current = tree.current_version()
+    tree.add_new_version(
+        dataclasses.replace(
+            current, version=2, parent_id="1", tags=["audio"], method="classic"
+        )
+    )
+
+    (entry,) = repo.search(tag="audio")
+    assert entry.id == idea_id
+    assert entry.current_version == 2
+    assert entry.method == "classic"
+    assert repo.search(method="six_hats") == []
+
+
+def test_reindex_rebuilds_the_catalog_from_the_files(repo):
+    expected = repo.search()
+    repo.catalog.remove(expected[0].id)
+    assert len(repo.list()) == len(IDEAS) - 1
+
+    assert repo.reindex() == len(IDEAS)
+    assert repo.search() == expected
+
+    # A store opened without its catalog indexes itself.
+    repo.catalog.path.unlink()
+    reopened = IdeaRepository(repo.store_path)
+    assert reopened.search() == expected
+
+
+def test_repository_from_settings(tmp_path, monkeypatch):
+    configured = {
+        "storage_path": str(tmp_path / "ideas"),
+        "storage_format": "json",
+        "blob_threshold": 512,
+        "snapshot_interval": 4,
+        "shard_depth": 1,
+    }
+    for key, value in configured.items():
+        monkeypatch.setitem(settings._data, key, value)
+
+    repo = IdeaRepository.from_settings()
+
+    assert repo.store_path == tmp_path / "ideas"
+    assert repo.codec.name == "json"
+    assert (repo.blob_threshold, repo.snapshot_interval) == (512, 4)
+    assert repo.layout.shard_depth == 1
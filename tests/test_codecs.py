@@ -0,0 +1,77 @@
+import importlib.util
+
+import pytest
+
+from evolving_ideas.common.codecs import (
+    CODECS,
+    codec_for,
+    find_document,
+    get_codec,
+    read_document,
+    write_document,
+)
+from evolving_ideas.domain.models.idea import QAPair
+from evolving_ideas.domain.repositories.idea_repository import IdeaRepository
+
+DOCUMENT = {
+    "id": "idea_01",
+    "title": "Café ☕ for robots",
+    "version": 3,
+    "parent_id": None,
+    "tags": ["a", "b"],
+    "qna": [{"question": "Why?", "answer": "Because."}],
+    "tree": {"children": {"1": [2, 3]}},
+}
+
+HAS_MSGPACK = importlib.util.find_spec("msgpack") is not None
+
+
+@pytest.mark.parametrize("name", sorted(CODECS))
+def test_codecs_round_trip(tmp_path, name):
+    if name == "msgpack" and not HAS_MSGPACK:
+        pytest.skip("msgpack is not installed")
+    path = tmp_path / f"metadata{get_codec(name).extension}"
+
+    write_document(path, DOCUMENT)
+
+    assert codec_for(path) is get_codec(name)
+    assert find_document(tmp_path, "metadata") == path
+    assert read_document(path) == DOCUMENT
+    assert not list(tmp_path.glob(".*"))
+
+
+def test_unknown_or_missing_formats_are_reported(tmp_path):
+    with pytest.raises(ValueError, match="Unsupported storage format"):
+        get_codec("xml")
+    with pytest.raises(ValueError, match="Unknown document format"):
+        codec_for(tmp_path / "metadata.xml")
+    if not HAS_MSGPACK:
+        with pytest.raises(ValueError, match="msgpack"):
+            get_codec("msgpack").dumps(DOCUMENT)
+
+
+def test_migrate_store_converts_every_document(tmp_path):
+    repo = IdeaRepository(tmp_path / "ideas")
+    ids = [
+        repo.add(
+            role="Inventor",
+            task=task,
+            qna=[QAPair(question="Why?", answer="Because.")],
+            summary=task,
+            author="alice",
+            method="classic",
+            method_metadata={},
+        ).metadata["id"]
+        for task in ("Solar roads", "Edible cups")
+    ]
+
+    assert repo.migrate("json") == 4
+    assert repo.migrate("json") == 0
+
+    assert not list((tmp_path / "ideas").rglob("*.yaml"))
+    for idea_id in ids:
+        tree = repo.load(idea_id)
+        assert tree.meta_path.suffix == ".json"
+        assert tree.current_version().qna == [
+            QAPair(question="Why?", answer="Because.")
+        ]
@@ -0,0 +1,77 @@
+import types
+
+import httpx
+import openai
+import pytest
+
+from evolving_ideas.infra import open_ai_client
+from evolving_ideas.infra.open_ai_client import (
+    OpenAIClientError,
+    OpenAICredentialValidator,
+)
+from evolving_ideas.settings import settings
+
+
+class FakeClient:
+    def __init__(self, api_key, valid=True):
+        self.api_key = api_key
+        self.valid = valid
+        self.checks = 0
+        self.models = types.SimpleNamespace(list=self._list)
+
+    def _list(self):
+        self.checks += 1
+        if not self.valid:
+            response = httpx.Response(
+                401, request=httpx.Request("GET", "https://api.openai.com/v1/models")
+            )
+            raise openai.AuthenticationError("bad key", response=response, body=None)
+        return []
+
+
+@pytest.fixture
+def clock(tmp_path, monkeypatch):
+    monkeypatch.setitem(settings._data, "cached_path", str(tmp_path / "cached.yml"))
+    now = [1000.0]
+    monkeypatch.setattr(open_ai_client.time, "time", lambda: now[0])
+    return now
+
+
+def test_outcome_is_cached_per_key_for_the_ttl(clock):
+    client = FakeClient("sk-one")
+    assert OpenAICredentialValidator(client, ttl=60, offline=False).validate()
+    assert OpenAICredentialValidator(client, ttl=60, offline=False).validate()
+    assert client.checks == 1
+
+    # A rotated key is checked on its own.
+    other = FakeClient("sk-two")
+    assert OpenAICredentialValidator(other, ttl=60, offline=False).validate()
+    assert other.checks == 1
+
+    clock[0] += 61
+    assert OpenAICredentialValidator(client, ttl=60, offline=False).validate()
+    assert client.checks == 2
+
+
+def test_invalid_keys_are_remembered(clock):
+    client = FakeClient("sk-bad", valid=False)
+    with pytest.raises(OpenAIClientError, match="Invalid API key"):
+        OpenAICredentialValidator(client, ttl=60, offline=False).validate()
+    with pytest.raises(OpenAIClientError, match="cached"):
+        OpenAICredentialValidator(client, ttl=60, offline=False).validate()
+    assert client.checks == 1
+
+    cache = open_ai_client.CacheStore().cache_path.read_text()
+    assert "sk-bad" not in cache
+
+
+def test_validates_once_per_instance_and_never_offline(clock):
+    client = FakeClient("sk-one")
+    validator = OpenAICredentialValidator(client, ttl=0, offline=False)
+    assert validator.validate()
+    assert validator.validate()
+    assert client.checks == 1
+
+    offline = FakeClient("sk-offline", valid=False)
+    assert OpenAICredentialValidator(offline, ttl=60, offline=True).validate()
+    assert offline.checks == 0
@@ -0,0 +1,47 @@
+import dataclasses
+
+from evolving_ideas.common.codecs import read_document
+from evolving_ideas.domain.models.idea import QAPair
+from evolving_ideas.domain.repositories.idea_repository import IdeaRepository
+from evolving_ideas.domain.services.deltas import apply, diff, is_delta
+
+
+def test_diff_and_apply_round_trip():
+    base = {"title": "A", "tags": ["x"], "context": {"role": "r", "notes": ""}}
+    target = {"title": "B", "tags": ["x", "y"], "context": {"role": "r"}}
+
+    assert apply(base, diff(base, target)) == target
+    assert diff(base, base) is None
+
+
+def test_snapshot_written_at_the_interval_boundary(tmp_path):
+    repo = IdeaRepository(tmp_path / "ideas", snapshot_interval=3)
+    tree = repo.add(
+        role="Inventor",
+        task="Folding bicycles",
+        qna=[QAPair(question="Why?", answer="Because.")],
+        summary="v1",
+        author="alice",
+        method="classic",
+        method_metadata={},
+    )
+    for number in range(2, 8):
+        tree.add_new_version(
+            dataclasses.replace(
+                tree.current_version(),
+                version=number,
+                parent_id=str(number - 1),
+                summary=f"v{number}",
+                qna=tree.current_version().qna + [QAPair(f"Q{number}", "A")],
+            )
+        )
+
+    stored = {n: read_document(tree.versions.path_for(n)) for n in range(1, 8)}
+    assert [n for n in stored if not is_delta(stored[n])] == [1, 4, 7]
+
+    reloaded = repo.load(tree.metadata["id"])
+    assert [reloaded.versions.depth(n) for n in range(1, 8)] == [0, 1, 2, 0, 1, 2, 0]
+    for number in range(1, 8):
+        version = reloaded.versions[number]
+        assert version.summary == f"v{number}"
+        assert len(version.qna) == number
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+
+from evolving_ideas.common.ids import (
+    ID_PREFIX,
+    is_sortable_id,
+    new_idea_id,
+    new_ulid,
+    ulid_bound,
+    ulid_time,
+)
+from evolving_ideas.domain.models.idea import QAPair
+from evolving_ideas.domain.repositories import idea_repository
+from evolving_ideas.domain.repositories.catalog import CatalogEntry, IdeaCatalog
+
+MOMENT = datetime(2025, 3, 14, 15, 9, 26, 535000)
+
+
+def test_ids_sort_by_creation_time():
+    same_ms = [new_ulid(1_700_000_000_000) for _ in range(50)]
+    assert same_ms == sorted(same_ms) and len(set(same_ms)) == 50
+
+    times = [MOMENT + timedelta(milliseconds=n) for n in (0, 1, 1000, 86_400_000)]
+    ids = [new_idea_id(moment) for moment in reversed(times)]
+    assert sorted(ids) == ids[::-1]
+    assert all(is_sortable_id(idea_id) for idea_id in ids)
+    assert ulid_time(ids[-1][len(ID_PREFIX) :]) == MOMENT
+    assert not is_sortable_id("idea_20240101_120000")
+
+
+def test_ulid_bound_brackets_ids_of_that_millisecond():
+    ulid = new_idea_id(MOMENT)[len(ID_PREFIX) :]
+    assert ulid_bound(MOMENT) <= ulid <= ulid_bound(MOMENT, upper=True)
+    assert ulid_bound(MOMENT, upper=True) < ulid_bound(
+        MOMENT + timedelta(milliseconds=1)
+    )
+
+
+def test_catalog_time_range_uses_id_bounds(tmp_path):
+    catalog = IdeaCatalog(tmp_path / "catalog.db")
+    days = [MOMENT + timedelta(days=n) for n in range(5)]
+    for day in days:
+        catalog.upsert(
+            CatalogEntry(
+                id=new_idea_id(day),
+                title=day.date().isoformat(),
+                author="alice",
+                created_at=day.isoformat(),
+                current_version=1,
+            )
+        )
+    # Legacy IDs are filtered on their creation timestamp instead.
+    catalog.upsert(
+        CatalogEntry(
+            id="idea_legacy",
+            title="legacy",
+            author="bob",
+            created_at=days[2].isoformat(),
+            current_version=1,
+        )
+    )
+
+    entries = catalog.query(since=days[1], until=days[3], order_by="title")
+    assert [e.title for e in entries] == [
+        "2025-03-15",
+        "2025-03-16",
+        "2025-03-17",
+        "legacy",
+    ]
+    assert [e.title for e in catalog.recent(2)] == ["2025-03-18", "2025-03-17"]
+
+
+def test_allocation_draws_a_new_id_on_collision(tmp_path, monkeypatch):
+    repo = idea_repository.IdeaRepository(tmp_path / "ideas")
+    taken = repo.add(
+        role="Inventor",
+        task="Taken",
+        qna=[QAPair(question="Why?", answer="Because.")],
+        summary="",
+        author="alice",
+        method="classic",
+        method_metadata={},
+    ).metadata["id"]
+    drawn = iter([taken, "idea_fresh"])
+    monkeypatch.setattr(idea_repository, "new_idea_id", lambda created: next(drawn))
+
+    idea_id, idea_dir = repo._allocate_id(datetime.now())
+
+    assert idea_id == "idea_fresh"
+    assert idea_dir.is_dir()
@@ -0,0 +1,74 @@
+import importlib.util
+import shutil
+
+import pytest
+import torch
+
+from evolving_ideas.infra import inference
+from evolving_ideas.infra.inference import (
+    INT8_FILE,
+    InferenceOptions,
+    export_model,
+    load_model,
+)
+from evolving_ideas.settings import settings
+
+
+def test_options_are_read_from_settings(monkeypatch):
+    monkeypatch.setitem(
+        settings._data["llm"],
+        "inference",
+        {"threads": 2, "dtype": "bfloat16", "quantize": False, "runtime": "onnx"},
+    )
+
+    assert InferenceOptions.from_settings() == InferenceOptions(
+        threads=2, dtype="bfloat16", quantize=False, runtime="onnx"
+    )
+
+
+@pytest.mark.parametrize(
+    "options, message",
+    [
+        (InferenceOptions(runtime="tensorrt"), "Unsupported runtime"),
+        (InferenceOptions(dtype="bfloat16", quantize=True), "float32 weights"),
+        (InferenceOptions(threads=0), "at least 1"),
+    ],
+)
+def test_conflicting_options_are_rejected(options, message):
+    with pytest.raises(ValueError, match=message):
+        options.validate()
+
+
+def test_auto_dtype_follows_the_cpu(monkeypatch):
+    monkeypatch.setattr(inference, "bf16_supported", lambda: True)
+    assert InferenceOptions(dtype="auto").torch_dtype == torch.bfloat16
+    monkeypatch.setattr(inference, "bf16_supported", lambda: False)
+    assert InferenceOptions(dtype="auto").torch_dtype == torch.float32
+    with pytest.raises(ValueError, match="Unsupported dtype"):
+        InferenceOptions(dtype="float16").torch_dtype
+
+
+def _logits(model, tokenizer):
+    with torch.no_grad():
+        return model(**tokenizer("solar roofs", return_tensors="pt")).logits
+
+
+def test_saved_int8_weights_match_quantizing_on_load(tiny_model, tmp_path):
+    checkpoint = shutil.copytree(tiny_model, tmp_path / "model")
+    options = InferenceOptions(quantize=True)
+    quantized, tokenizer = load_model(str(checkpoint), options)
+
+    export_model(str(checkpoint), options)
+    assert (checkpoint / INT8_FILE).is_file()
+    loaded, _ = load_model(str(checkpoint), options)
+
+    assert isinstance(loaded.lm_head, torch.ao.nn.quantized.dynamic.Linear)
+    assert torch.equal(_logits(loaded, tokenizer), _logits(quantized, tokenizer))
+
+
+@pytest.mark.skipif(
+    importlib.util.find_spec("optimum") is not None, reason="optimum is installed"
+)
+def test_onnx_runtime_requires_optimum(tiny_model):
+    with pytest.raises(ValueError, match="optimum"):
+        load_model(tiny_model, InferenceOptions(runtime="onnx"))
@@ -0,0 +1,188 @@
+import dataclasses
+import json
+import threading
+
+import pytest
+
+from evolving_ideas.common.codecs import read_document, stage_document, write_document
+from evolving_ideas.domain.repositories.idea_repository import IdeaRepository
+from evolving_ideas.domain.services import journal as journal_module
+from evolving_ideas.domain.services.journal import (
+    JOURNAL_NAME,
+    LOCK_NAME,
+    WriteJournal,
+)
+
+
+def _documents(idea_dir, value):
+    return [
+        (idea_dir / "v1.yaml", {"version": 1, "value": value}),
+        (idea_dir / "metadata.yaml", {"current_version": 1, "value": value}),
+    ]
+
+
+def test_commit_writes_every_document(tmp_path):
+    WriteJournal(tmp_path).commit(_documents(tmp_path, "new"))
+
+    assert read_document(tmp_path / "v1.yaml")["value"] == "new"
+    assert read_document(tmp_path / "metadata.yaml")["value"] == "new"
+    assert not (tmp_path / JOURNAL_NAME).exists()
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+def test_recover_replays_a_written_journal(tmp_path):
+    write_document(tmp_path / "metadata.yaml", {"value": "old"})
+    renames = [
+        (stage_document(path, document).name, path.name)
+        for path, document in _documents(tmp_path, "new")
+    ]
+    # Interrupted after the first rename.
+    (tmp_path / renames[0][0]).rename(tmp_path / renames[0][1])
+    (tmp_path / JOURNAL_NAME).write_text(json.dumps({"renames": renames}))
+
+    assert WriteJournal(tmp_path).recover() == "replayed"
+    assert read_document(tmp_path / "v1.yaml")["value"] == "new"
+    assert read_document(tmp_path / "metadata.yaml")["value"] == "new"
+    assert not (tmp_path / JOURNAL_NAME).exists()
+    assert WriteJournal(tmp_path).recover() is None
+
+
+def test_recover_rolls_back_staged_files_without_journal(tmp_path):
+    write_document(tmp_path / "metadata.yaml", {"value": "old"})
+    for path, document in _documents(tmp_path, "new"):
+        stage_document(path, document)
+
+    assert WriteJournal(tmp_path).recover() == "rolled_back"
+    assert read_document(tmp_path / "metadata.yaml")["value"] == "old"
+    assert not (tmp_path / "v1.yaml").exists()
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+def test_recover_waits_for_a_concurrent_commit(tmp_path, monkeypatch):
+    staged = threading.Event()
+    resume = threading.Event()
+    fsync_directory = journal_module.fsync_directory
+
+    def pause_before_journal(directory):
+        # The first call comes after staging, before the journal rename.
+        if not staged.is_set():
+            staged.set()
+            assert resume.wait(5)
+        fsync_directory(directory)
+
+    monkeypatch.setattr(journal_module, "fsync_directory", pause_before_journal)
+    results = {}
+    committer = threading.Thread(
+        target=WriteJournal(tmp_path).commit, args=(_documents(tmp_path, "new"),)
+    )
+    recoverer = threading.Thread(
+        target=lambda: results.update(status=WriteJournal(tmp_path).recover())
+    )
+
+    committer.start()
+    assert staged.wait(5)
+    assert list(tmp_path.glob(".*.tmp"))
+    recoverer.start()
+    recoverer.join(0.2)
+    assert recoverer.is_alive()
+
+    resume.set()
+    committer.join(5)
+    recoverer.join(5)
+    assert results["status"] is None
+    assert read_document(tmp_path / "v1.yaml")["value"] == "new"
+    assert read_document(tmp_path / "metadata.yaml")["value"] == "new"
+
+
+def test_apply_tolerates_a_removed_journal(tmp_path):
+    # A replay in another process already finished the commit.
+    journal = WriteJournal(tmp_path)
+    journal._apply([])
+    assert journal.recover() is None
+
+
+def test_failed_batch_leaves_the_idea_untouched(tmp_path):
+    repo = IdeaRepository(tmp_path / "ideas")
+    tree = repo.add(
+        role="Inventor",
+        task="Folding bicycles",
+        qna=[],
+        summary="v1",
+        author="alice",
+        method="classic",
+        method_metadata={},
+    )
+    with pytest.raises(RuntimeError):
+        with tree.batch():
+            for number in (2, 3):
+                tree.add_new_version(
+                    dataclasses.replace(
+                        tree.current_version(), version=number, parent_id="1"
+                    )
+                )
+            raise RuntimeError("interrupted")
+
+    assert tree.versions.numbers() == [1]
+    reloaded = repo.load(tree.metadata["id"])
+    assert reloaded.metadata["tree"]["current"] == 1
+    assert reloaded.versions.numbers() == [1]
+    assert not list(tree.idea_dir.glob(".*.tmp"))
+
+
+def test_opening_a_clean_idea_writes_nothing(tmp_path, monkeypatch):
+    repo = IdeaRepository(tmp_path / "ideas")
+    idea_id = repo.add(
+        role="Inventor",
+        task="Folding bicycles",
+        qna=[],
+        summary="v1",
+        author="alice",
+        method="classic",
+        method_metadata={},
+    ).metadata["id"]
+    idea_dir = repo.layout.locate(idea_id)
+    (idea_dir / LOCK_NAME).unlink(missing_ok=True)
+    monkeypatch.setattr(
+        journal_module.FileLock,
+        "acquire",
+        lambda self, blocking=True: pytest.fail("a clean open took the lock"),
+    )
+
+    tree = repo.load(idea_id)
+
+    assert tree.current_version().version == 1
+    assert not (idea_dir / LOCK_NAME).exists()
+
+
+def test_failed_commit_rolls_back_the_batch(tmp_path, monkeypatch):
+    repo = IdeaRepository(tmp_path / "ideas")
+    tree = repo.add(
+        role="Inventor",
+        task="Folding bicycles",
+        qna=[],
+        summary="v1",
+        author="alice",
+        method="classic",
+        method_metadata={},
+    )
+    fsync_directory = journal_module.fsync_directory
+
+    def disk_full(directory):
+        raise OSError("No space left on device")
+
+    def add_version_2():
+        tree.add_new_version(
+            dataclasses.replace(tree.current_version(), version=2, parent_id="1")
+        )
+
+    monkeypatch.setattr(journal_module, "fsync_directory", disk_full)
+    with pytest.raises(OSError, match="No space"):
+        add_version_2()
+
+    assert tree.current_version().version == 1
+    assert tree.versions.numbers() == [1]
+    assert not list(tree.idea_dir.glob(".*.tmp"))
+
+    monkeypatch.setattr(journal_module, "fsync_directory", fsync_directory)
+    add_version_2()
+    assert repo.load(tree.metadata["id"]).current_version().version == 2
@@ -0,0 +1,117 @@
+import dataclasses
+import json
+import threading
+
+import pytest
+
+from evolving_ideas.common.file_lock import FileLock
+from evolving_ideas.domain.models.idea import QAPair
+from evolving_ideas.domain.repositories.idea_repository import IdeaRepository
+from evolving_ideas.domain.repositories.layout import LAYOUT_NAME, StoreLayout
+from evolving_ideas.domain.services.journal import LOCK_NAME
+
+
+def _make_ideas(layout, count):
+    return [layout.create(f"idea_{n:04d}").name for n in range(count)]
+
+
+def test_reshard_moves_every_idea_and_locate_finds_it(tmp_path):
+    layout = StoreLayout(tmp_path)
+    ideas = _make_ideas(layout, 20)
+
+    assert layout.reshard(2) == 20
+
+    for idea_id in ideas:
+        path = layout.locate(idea_id)
+        assert path.is_dir()
+        assert path == layout.path_for(idea_id, 2)
+        assert len(path.relative_to(tmp_path).parts) == 3
+    assert sorted(p.name for p in layout.iter_idea_dirs()) == ideas
+    recorded = json.loads((tmp_path / LAYOUT_NAME).read_text())
+    assert recorded == {"shard_depth": 2, "previous_depth": None}
+
+    assert layout.reshard(0) == 20
+    assert sorted(p.name for p in tmp_path.iterdir() if p.is_dir()) == ideas
+
+
+def test_locate_follows_a_reshard_by_another_process(tmp_path):
+    stale = StoreLayout(tmp_path)
+    (idea_id,) = _make_ideas(stale, 1)
+
+    StoreLayout(tmp_path).reshard(1)
+
+    assert stale.locate(idea_id) == stale.path_for(idea_id, 1)
+    assert stale.shard_depth == 1
+
+
+def test_stale_process_creates_ideas_in_the_new_layout(tmp_path):
+    stale = StoreLayout(tmp_path)
+    StoreLayout(tmp_path).reshard(1)
+
+    idea_dir = stale.create("idea_new")
+
+    assert idea_dir == stale.path_for("idea_new", 1)
+
+
+def test_reshard_picks_up_ideas_created_in_the_old_layout(tmp_path, monkeypatch):
+    layout = StoreLayout(tmp_path)
+    _make_ideas(layout, 3)
+    move_all = layout._move_all
+    passes = []
+
+    def move_then_race():
+        moved = move_all()
+        if not passes:
+            # A writer that resolved the old layout before it changed.
+            (tmp_path / "idea_late").mkdir()
+        passes.append(moved)
+        return moved
+
+    monkeypatch.setattr(layout, "_move_all", move_then_race)
+
+    assert layout.reshard(1) == 4
+    assert passes == [3, 1]
+    assert layout.locate("idea_late") == layout.path_for("idea_late", 1)
+    assert not (tmp_path / "idea_late").exists()
+
+
+def test_reshard_waits_for_commits_in_progress(tmp_path):
+    layout = StoreLayout(tmp_path)
+    (idea_id,) = _make_ideas(layout, 1)
+    old_dir = layout.path_for(idea_id)
+    resharding = threading.Thread(target=layout.reshard, args=(1,))
+
+    with FileLock(old_dir / LOCK_NAME):
+        resharding.start()
+        resharding.join(0.2)
+        assert resharding.is_alive() and old_dir.is_dir()
+    resharding.join(5)
+
+    assert not old_dir.exists()
+    assert layout.locate(idea_id) == layout.path_for(idea_id, 1)
+
+
+def test_trees_opened_before_a_reshard_never_recreate_the_old_directory(tmp_path):
+    repo = IdeaRepository(tmp_path)
+    tree = repo.add(
+        role="Inventor",
+        task="Bamboo bicycles",
+        qna=[QAPair(question="Why?", answer="Because.")],
+        summary="Light frames.",
+        author="alice",
+        method="classic",
+        method_metadata=None,
+    )
+    old_dir = tree.idea_dir
+    parent = tree.current_version()
+    repo.reshard(1)
+
+    with pytest.raises(FileNotFoundError, match="reopen the idea"):
+        tree.add_new_version(dataclasses.replace(parent, version=2, parent_id="1"))
+
+    assert not old_dir.exists()
+    reopened = repo.load(tree.metadata["id"])
+    assert reopened.idea_dir != old_dir
+    assert reopened.current_version().version == 1
+    reopened.add_new_version(dataclasses.replace(parent, version=2, parent_id="1"))
+    assert repo.load(tree.metadata["id"]).current_version().version == 2
@@ -0,0 +1,6 @@
+from benchmarks.import_time import probe_import
+
+
+def test_cli_import_is_lightweight(tmp_path):
+    loaded = probe_import(tmp_path)["heavy_modules"]
+    assert not loaded, f"CLI import pulled in {loaded}"
@@ -0,0 +1,95 @@
+import pytest
+from transformers import AutoTokenizer, TextIteratorStreamer
+
+from evolving_ideas.infra.local_llm_client import LocalLLM, _cut, _stream, _until_stop
+
+GREEDY = {"sample": False, "max_tokens": 6}
+CONTEXT = "you are an inventor brainstorming green building ideas"
+
+
+def test_cut_stops_at_the_first_stop_sequence():
+    assert _cut("one\n\ntwo END three", ["END", "\n\n"]) == "one"
+    assert _cut("no stop here", ["END"]) == "no stop here"
+
+
+def test_until_stop_catches_sequences_split_across_chunks():
+    chunks = ["Solar ro", "of E", "ND wind"]
+    assert "".join(_until_stop(chunks, ["END"])) == "Solar roof "
+    assert list(_until_stop(["EN", "D"], ["END"])) == []
+    assert "".join(_until_stop(chunks, [])) == "Solar roof END wind"
+
+
+def _llm(tiny_model, **options):
+    return LocalLLM(model_name=tiny_model, **options)
+
+
+def test_prefix_reuse_matches_plain_generation(tiny_model, monkeypatch):
+    cached = _llm(tiny_model, prefix_cache_bytes=16 * 1024 * 1024, min_prefix_tokens=8)
+    plain = _llm(tiny_model, prefix_cache_bytes=0)
+    prompts = ["roofs", "walls", "doors"]
+    contexts = [CONTEXT] * len(prompts)
+
+    expected = plain.ask_many(prompts, contexts, GREEDY)
+    assert cached.ask_many(prompts, contexts, GREEDY) == expected
+    assert len(cached.prefix_cache) == 1
+
+    # A later prompt with the same context reuses the cached prefix.
+    lookup = cached.prefix_cache.lookup
+    hits = []
+    monkeypatch.setattr(
+        cached.prefix_cache,
+        "lookup",
+        lambda text: hits.append(lookup(text)) or hits[-1],
+    )
+    assert cached.ask("roofs", CONTEXT, GREEDY) == expected[0]
+    assert len(cached.prefix_cache) == 1
+    assert hits and all(hit is not None for hit in hits)
+    assert "".join(cached.stream("walls", CONTEXT, GREEDY)) == expected[1]
+
+
+def test_responses_hold_new_text_cut_at_stop_sequences(tiny_model):
+    llm = _llm(tiny_model, prefix_cache_bytes=0)
+    text = llm.ask("roofs", CONTEXT, GREEDY)
+    full = llm.ask("roofs", CONTEXT, {**GREEDY, "return_full_text": True})
+
+    assert full == f"{CONTEXT}\n\nroofs{text}".strip()
+
+    stop = text[3:5]
+    cut = llm.ask("roofs", CONTEXT, {**GREEDY, "stop": [stop]})
+    assert cut == text[: text.index(stop)].strip()
+
+
+def test_streamed_chunks_add_up_to_the_response(tiny_model):
+    llm = _llm(tiny_model, prefix_cache_bytes=0)
+    text = llm.ask("roofs", CONTEXT, GREEDY)
+    stop = {**GREEDY, "stop": [text[3:5]]}
+
+    assert "".join(llm.stream("roofs", CONTEXT, GREEDY)).strip() == text
+    assert "".join(llm.stream("roofs", CONTEXT, stop)).strip() == llm.ask(
+        "roofs", CONTEXT, stop
+    )
+
+
+def test_a_failed_generation_ends_the_stream_with_its_error(tiny_model):
+    # The timeout turns a stream left waiting into a failure.
+    streamer = TextIteratorStreamer(
+        AutoTokenizer.from_pretrained(tiny_model), timeout=10
+    )
+
+    def generate():
+        raise RuntimeError("out of memory")
+
+    with pytest.raises(RuntimeError, match="out of memory"):
+        list(_stream(generate, streamer))
+
+
+def test_batched_generation_matches_one_prompt_at_a_time(tiny_model):
+    llm = _llm(tiny_model, batch_size=2, prefix_cache_bytes=0)
+    prompts = ["roofs", "solar walls for tall towers", "doors"]
+    contexts = ["you are an inventor", "you are an architect", "be brief"]
+
+    batched = llm.ask_many(prompts, contexts, GREEDY)
+
+    assert batched == [
+        llm.ask(prompt, context, GREEDY) for prompt, context in zip(prompts, contexts)
+    ]
@@ -0,0 +1,109 @@
+import socketserver
+import threading
+
+import pytest
+
+from evolving_ideas.infra import local_llm_client, local_llm_worker
+from evolving_ideas.infra.local_llm_worker import (
+    LocalLLMWorker,
+    WorkerLLM,
+    worker_available,
+    worker_info,
+)
+
+
+class FakeLocalLLM:
+    def __init__(self, model_name, batch_size=8):
+        self.generation_params = {"max_new_tokens": 16, "do_sample": False}
+
+    def ask(self, prompt, context, params=None):
+        if prompt == "fail":
+            raise ValueError("generation failed")
+        return f"{context}: {prompt} {params or {}}"
+
+    def ask_many(self, prompts, contexts, params=None):
+        return [self.ask(p, c, params) for p, c in zip(prompts, contexts)]
+
+    def chat(self, chatlog, params=None):
+        return chatlog[-1]["content"].upper()
+
+    def stream(self, prompt, context, params=None):
+        yield from prompt.split()
+
+    def stream_chat(self, chatlog, params=None):
+        yield from chatlog[-1]["content"].upper().split()
+
+
+@pytest.fixture
+def worker(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_llm_client, "LocalLLM", FakeLocalLLM)
+    # The worker installs its SIGTERM handler, which only the main thread may.
+    monkeypatch.setattr(local_llm_worker.signal, "signal", lambda *args: None)
+    servers = []
+
+    class Server(socketserver.ThreadingUnixStreamServer):
+        def __init__(self, *args):
+            super().__init__(*args)
+            servers.append(self)
+
+    monkeypatch.setattr(socketserver, "ThreadingUnixStreamServer", Server)
+    worker = LocalLLMWorker("tiny-model", socket_path=str(tmp_path / "w.sock"))
+    thread = threading.Thread(target=worker.serve_forever)
+    thread.start()
+    while not servers and thread.is_alive():
+        threading.Event().wait(0.01)
+    yield worker
+    servers[0].shutdown()
+    thread.join(5)
+
+
+def test_ping_reports_the_served_model(worker):
+    socket_path = str(worker.socket_path)
+    info = worker_info(socket_path)
+
+    assert info["model"] == "tiny-model"
+    assert info["generation_params"] == {"max_new_tokens": 16, "do_sample": False}
+    assert worker_available(socket_path)
+    assert not worker_available(socket_path + ".missing")
+
+
+def test_worker_backend_round_trips_requests(worker):
+    llm = WorkerLLM("tiny-model", socket_path=str(worker.socket_path))
+    params = {"max_tokens": 4}
+
+    assert llm.model_name == "tiny-model"
+    assert llm.ask("Roofs?", "Builder", params) == "Builder: Roofs? {'max_tokens': 4}"
+    assert llm.ask_many(["A", "B"], ["x", "y"]) == ["x: A {}", "y: B {}"]
+    assert llm.chat([{"role": "user", "content": "hi"}]) == "HI"
+    assert list(llm.stream("solar roof tiles", "Builder")) == ["solar", "roof", "tiles"]
+    chatlog = [{"role": "user", "content": "green roofs"}]
+    assert list(llm.stream_chat(chatlog)) == ["GREEN", "ROOFS"]
+
+    with pytest.raises(RuntimeError, match="generation failed"):
+        llm.ask("fail", "Builder")
+    # The worker keeps serving after a failed request.
+    assert llm.ask("again", "Builder") == "Builder: again {}"
+
+
+def test_worker_backend_rejects_another_model(worker, tmp_path):
+    with pytest.raises(ConnectionError, match="serves tiny-model"):
+        WorkerLLM("other-model", socket_path=str(worker.socket_path))
+    with pytest.raises(ConnectionError, match="No local model worker"):
+        WorkerLLM(socket_path=str(tmp_path / "none.sock"))
+
+
+def test_second_worker_refuses_a_live_socket(worker):
+    with pytest.raises(RuntimeError, match="already serving"):
+        LocalLLMWorker(
+            "tiny-model", socket_path=str(worker.socket_path)
+        ).serve_forever()
+
+
+def test_worker_refuses_to_serve_without_unix_sockets(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_llm_client, "LocalLLM", FakeLocalLLM)
+    monkeypatch.delattr(local_llm_worker.socket, "AF_UNIX")
+    worker = LocalLLMWorker("tiny-model", socket_path=str(tmp_path / "w.sock"))
+
+    assert not worker_available(str(worker.socket_path))
+    with pytest.raises(RuntimeError, match="Unix domain sockets"):
+        worker.serve_forever()
@@ -0,0 +1,111 @@
+import asyncio
+import time
+
+import pytest
+
+from evolving_ideas.strategies.lotus_blossom import LotusBlossomMethod
+
+CORE_IDEAS = ["Solar roof", "Wind wall", "Rain barrel"]
+
+
+class FakeResponder:
+    """
+    Answers Lotus Blossom prompts, finishing the expansions in reverse order
+    and failing the first ``failures`` attempts of the "Wind wall" one.
+    """
+
+    supports_batching = False
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.attempts = []
+        self.closed = False
+
+    async def aask(self, prompt, context, template=None, params=None, cache=None):
+        if template == "lotus_core_ideas":
+            return "\n".join(f"- {idea}" for idea in CORE_IDEAS)
+        idea = next(idea for idea in CORE_IDEAS if idea in prompt)
+        if idea == "Wind wall":
+            self.attempts.append(time.perf_counter())
+            if len(self.attempts) <= self.failures:
+                raise ConnectionError("connection reset")
+        await asyncio.sleep(0.01 * (len(CORE_IDEAS) - CORE_IDEAS.index(idea)))
+        return f"{idea} one\n{idea} two"
+
+    def stream(self, prompt, context, template=None, params=None):
+        yield "Summary."
+
+    async def aclose(self):
+        self.closed = True
+
+
+class BatchingResponder(FakeResponder):
+    """
+    Expands every core idea in a single batch.
+    """
+
+    supports_batching = True
+
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    async def aask(self, prompt, context, template=None, params=None, cache=None):
+        assert template == "lotus_core_ideas"
+        return await super().aask(prompt, context, template, params, cache)
+
+    def ask_many(self, prompts, contexts, template=None, params=None, cache=None):
+        self.batches.append((template, len(prompts)))
+        return [
+            f"{idea} batched"
+            for prompt in prompts
+            for idea in CORE_IDEAS
+            if idea in prompt
+        ]
+
+
+def _run(responder, **options):
+    method = LotusBlossomMethod(responder, retry_delay=0.05, **options)
+    return method.run("Architect", "Green buildings", "Cities")
+
+
+def test_expansions_keep_the_core_idea_order():
+    responder = FakeResponder()
+    result = _run(responder)
+
+    expansion_map = result["method_metadata"]["expansion_map"]
+    assert list(expansion_map) == CORE_IDEAS
+    assert expansion_map["Wind wall"] == ["Wind wall one", "Wind wall two"]
+    assert [qa["question"] for qa in result["qna"][1:]] == [
+        f"What are 8 sub-ideas for '{idea}'?" for idea in CORE_IDEAS
+    ]
+    assert result["summary"] == "Summary."
+    assert responder.closed
+
+
+def test_failed_expansions_are_retried_with_backoff():
+    responder = FakeResponder(failures=2)
+    result = _run(responder, retries=2)
+
+    assert result["method_metadata"]["expansion_map"]["Wind wall"]
+    first, second, third = responder.attempts
+    assert second - first >= 0.05
+    assert third - second >= 0.1
+
+
+def test_expansion_gives_up_after_its_retries():
+    responder = FakeResponder(failures=3)
+    with pytest.raises(ConnectionError):
+        _run(responder, retries=1)
+    assert len(responder.attempts) == 2
+    assert responder.closed
+
+
+def test_batching_backends_expand_every_idea_in_one_batch():
+    responder = BatchingResponder()
+    result = _run(responder)
+
+    assert responder.batches == [("lotus_sub_ideas", len(CORE_IDEAS))]
+    expansion_map = result["method_metadata"]["expansion_map"]
+    assert expansion_map == {idea: [f"{idea} batched"] for idea in CORE_IDEAS}
+    assert responder.closed
@@ -0,0 +1,15 @@
+from benchmarks.memory_footprint import build_store
+
+
+def test_loaded_ideas_are_slotted_and_share_strings(tmp_path):
+    # The retained bytes per idea are measured by benchmarks.memory_footprint.
+    repo = build_store(tmp_path / "ideas", ideas=8)
+    versions = [repo.load(idea_id).current_version() for idea_id in repo.list()]
+
+    for version in versions:
+        assert not hasattr(version, "__dict__")
+        assert all(not hasattr(qa, "__dict__") for qa in version.qna)
+    first, second = versions[0], versions[4]
+    assert first.author == second.author and first.author is second.author
+    assert first.method is second.method
+    assert first.context["role"] is second.context["role"]
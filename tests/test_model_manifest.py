@@ -0,0 +1,107 @@
+import shutil
+import threading
+
+from evolving_ideas.common.file_lock import FileLock
+from evolving_ideas.infra import model_manifest
+from evolving_ideas.infra.inference import InferenceOptions
+from evolving_ideas.infra.local_llm_downloader import LocalLLMDownloader
+from evolving_ideas.infra.model_manifest import (
+    build_manifest,
+    installed_path,
+    previous_path,
+    read_manifest,
+    verify_install,
+    write_manifest,
+)
+
+OPTIONS = {"dtype": "float32", "quantize": False, "runtime": "torch"}
+
+
+def _install(directory):
+    (directory / "onnx").mkdir(parents=True)
+    (directory / "config.json").write_text('{"model_type": "gpt2"}')
+    (directory / "model.safetensors").write_bytes(b"\0" * 4096)
+    (directory / "onnx" / "model.onnx").write_bytes(b"\1" * 1024)
+    write_manifest(directory, build_manifest(directory, "tiny-gpt2", OPTIONS))
+
+
+def test_manifest_lists_every_file(tmp_path):
+    _install(tmp_path)
+    manifest = read_manifest(tmp_path)
+    assert sorted(manifest["files"]) == [
+        "config.json",
+        "model.safetensors",
+        "onnx/model.onnx",
+    ]
+    assert manifest["files"]["model.safetensors"]["size"] == 4096
+    assert verify_install(tmp_path, "tiny-gpt2", OPTIONS)
+
+
+def test_verify_rejects_incomplete_or_mismatched_installs(tmp_path):
+    assert not verify_install(tmp_path)
+    _install(tmp_path)
+    assert not verify_install(tmp_path, "other-model")
+    assert not verify_install(tmp_path, "tiny-gpt2", {**OPTIONS, "quantize": True})
+
+    # Same size, different content: only the hash notices.
+    (tmp_path / "model.safetensors").write_bytes(b"\2" * 4096)
+    assert verify_install(tmp_path, check_hashes=False)
+    assert not verify_install(tmp_path)
+
+    (tmp_path / "onnx" / "model.onnx").write_bytes(b"\1" * 10)
+    assert not verify_install(tmp_path, check_hashes=False)
+
+
+def _downloader(target):
+    return LocalLLMDownloader(
+        model_name="tiny-gpt2",
+        save_directory=str(target),
+        inference=InferenceOptions(),
+        offline=True,
+    )
+
+
+def test_interrupted_swap_is_restored(tmp_path, monkeypatch):
+    target = tmp_path / "model"
+    _install(previous_path(target))
+    stale = tmp_path / ".model.abc123"
+    stale.mkdir()
+
+    # Readers fall back to the previous install while it is swapped.
+    monkeypatch.setattr(
+        model_manifest, "settings", type("S", (), {"get": lambda key: str(target)})
+    )
+    assert installed_path("tiny-gpt2") == previous_path(target)
+
+    assert _downloader(target).download()
+    assert verify_install(target, "tiny-gpt2", OPTIONS)
+    assert not previous_path(target).exists()
+    assert not stale.exists()
+    assert installed_path("tiny-gpt2") == target
+
+
+def test_staging_of_a_live_run_is_kept(tmp_path):
+    target = tmp_path / "model"
+    _install(target)
+    live = tmp_path / ".model.live"
+    live.mkdir()
+    results = []
+    run = threading.Thread(
+        target=lambda: results.append(_downloader(target).download(force=True))
+    )
+
+    with FileLock(tmp_path / ".model.lock"):
+        run.start()
+        run.join(0.2)
+        assert run.is_alive()
+        assert live.exists()
+        # The live run finishes its install.
+        shutil.rmtree(live)
+        (tmp_path / ".model.orphan").mkdir()
+    run.join(10)
+
+    # The forced offline download of an unknown model fails and leaves the
+    # existing install in place; the orphaned staging directory is removed.
+    assert results == [False]
+    assert not (tmp_path / ".model.orphan").exists()
+    assert verify_install(target, "tiny-gpt2", OPTIONS)
@@ -0,0 +1,254 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import openai
+import pytest
+
+from evolving_ideas.infra.open_ai_client import AsyncOpenAITransport, OpenAITransport
+from evolving_ideas.infra.rate_limiter import (
+    RequestScheduler,
+    TokenBucket,
+    estimate_request_tokens,
+)
+from evolving_ideas.infra.usage import estimate_tokens
+
+
+def _ask(transport):
+    messages = [{"role": "user", "content": "hello"}]
+    return transport.chat_completion("gpt-test", messages)
+
+
+def test_retries_throttled_requests(fake_openai):
+    fake_openai.throttle = 2
+    scheduler = RequestScheduler(max_retries=3, base_delay=0.01)
+    transport = OpenAITransport(api_key="sk-test", scheduler=scheduler)
+
+    response = _ask(transport)
+
+    assert response.choices[0].message.content == "ok"
+    assert fake_openai.requests == 3
+    metrics = scheduler.metrics.snapshot()
+    assert metrics["requests"] == 3
+    assert metrics["retries"] == metrics["throttled"] == 2
+    assert metrics["failures"] == 0
+
+
+def test_gives_up_after_max_retries(fake_openai):
+    fake_openai.throttle = 10
+    scheduler = RequestScheduler(max_retries=1, base_delay=0.01)
+    transport = OpenAITransport(api_key="sk-test", scheduler=scheduler)
+
+    with pytest.raises(Exception, match="Rate limit"):
+        _ask(transport)
+
+    assert fake_openai.requests == 2
+    assert scheduler.metrics.snapshot()["failures"] == 1
+
+
+def test_caps_requests_in_flight_across_threads(fake_openai):
+    fake_openai.delay = 0.1
+    scheduler = RequestScheduler(max_in_flight=2)
+    transport = OpenAITransport(api_key="sk-test", scheduler=scheduler)
+
+    threads = [threading.Thread(target=_ask, args=(transport,)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert fake_openai.requests == 6
+    assert fake_openai.max_in_flight == 2
+    assert scheduler.metrics.snapshot()["max_queue_delay"] > 0.1
+
+
+def test_token_bucket_delays_once_exhausted():
+    bucket = TokenBucket(per_minute=600, capacity=10)
+
+    assert bucket.reserve(10) == 0.0
+    assert bucket.reserve(5) == pytest.approx(0.5, abs=0.05)
+    bucket.adjust(5)
+    assert bucket.reserve(0) == pytest.approx(0.0, abs=0.05)
+
+
+def _throttled():
+    request = httpx.Request("POST", "http://127.0.0.1/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after-ms": "10"}, request=request)
+    return openai.RateLimitError("Rate limit reached", response=response, body=None)
+
+
+def test_request_estimate_adds_message_estimates_and_the_completion_limit():
+    messages = [
+        {"role": "system", "content": "You are an inventor."},
+        {"role": "user", "content": "Ideas?"},
+        {"role": "assistant", "content": None},
+    ]
+    prompt = estimate_tokens("You are an inventor.") + estimate_tokens("Ideas?")
+
+    assert estimate_request_tokens(messages) == prompt
+    assert estimate_request_tokens(messages, max_tokens=50) == prompt + 50
+
+
+def test_stream_retries_failures_before_its_first_chunk():
+    scheduler = RequestScheduler(tokens_per_minute=6000, base_delay=0.01)
+    attempts = []
+
+    def call():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise _throttled()
+        yield from ("a", "b", 10)
+
+    chunks = scheduler.stream(
+        call,
+        estimated_tokens=100,
+        usage=lambda chunk: chunk if isinstance(chunk, int) else None,
+    )
+
+    assert list(chunks) == ["a", "b", 10]
+    assert len(attempts) == 2
+    assert scheduler.metrics.snapshot()["throttled"] == 1
+    # Two reservations of 100 tokens, the second settled at 10 used.
+    assert scheduler.tokens._tokens == pytest.approx(6000 - 100 - 10, abs=5)
+
+
+def test_stream_raises_failures_after_a_chunk_was_delivered():
+    scheduler = RequestScheduler(base_delay=0.01)
+    attempts = []
+
+    def call():
+        attempts.append(1)
+        yield "a"
+        raise _throttled()
+
+    chunks = scheduler.stream(call)
+
+    assert next(chunks) == "a"
+    with pytest.raises(openai.RateLimitError):
+        next(chunks)
+    # A new completion would not continue the first one.
+    assert len(attempts) == 1
+    assert scheduler.metrics.snapshot()["failures"] == 1
+
+
+def test_stream_holds_its_slot_until_consumed():
+    scheduler = RequestScheduler(max_in_flight=1)
+    chunks = scheduler.stream(lambda: iter(["a", "b"]))
+    assert next(chunks) == "a"
+
+    other = threading.Thread(target=scheduler.run, args=(lambda: None,))
+    other.start()
+    other.join(0.1)
+    assert other.is_alive()
+
+    chunks.close()
+    other.join(1)
+    assert not other.is_alive()
+
+
+def test_async_requests_wait_for_a_slot_without_polling():
+    scheduler = RequestScheduler(max_in_flight=2)
+    in_flight = []
+
+    async def call():
+        in_flight.append(1)
+        peak = len(in_flight)
+        await asyncio.sleep(0.02)
+        in_flight.pop()
+        return peak
+
+    async def main():
+        return await asyncio.gather(*(scheduler.arun(call) for _ in range(6)))
+
+    assert max(asyncio.run(main())) == 2
+    assert scheduler.metrics.snapshot()["requests"] == 6
+
+
+def test_threads_and_event_loops_share_the_in_flight_cap():
+    scheduler = RequestScheduler(max_in_flight=2)
+    lock = threading.Lock()
+    in_flight, peaks = [0], []
+
+    def enter():
+        with lock:
+            in_flight[0] += 1
+            peaks.append(in_flight[0])
+
+    def leave():
+        with lock:
+            in_flight[0] -= 1
+
+    def blocking():
+        enter()
+        time.sleep(0.02)
+        leave()
+
+    async def call():
+        enter()
+        await asyncio.sleep(0.02)
+        leave()
+
+    async def main():
+        await asyncio.gather(*(scheduler.arun(call) for _ in range(4)))
+
+    threads = [
+        threading.Thread(target=scheduler.run, args=(blocking,)) for _ in range(4)
+    ]
+    threads.append(threading.Thread(target=asyncio.run, args=(main(),)))
+    for thread in threads:
+        thread.start()
+    asyncio.run(main())
+    for thread in threads:
+        thread.join()
+
+    assert max(peaks) == 2
+    assert scheduler.metrics.snapshot()["requests"] == 12
+    assert scheduler._slots._free == 2
+
+
+def test_cancelled_waiters_give_their_slot_back():
+    scheduler = RequestScheduler(max_in_flight=1)
+
+    async def main():
+        release = asyncio.Event()
+
+        async def hold():
+            await release.wait()
+
+        holder = asyncio.ensure_future(scheduler.arun(hold))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(scheduler.arun(hold))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        release.set()
+        await holder
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+    asyncio.run(main())
+    assert scheduler._slots._free == 1
+    assert not scheduler._slots._waiters
+
+
+def test_async_transport_shares_a_client_per_loop_and_closes_it(fake_openai):
+    fake_openai.delay = 0.05
+    transport = AsyncOpenAITransport(
+        api_key="sk-test", scheduler=RequestScheduler(max_in_flight=3)
+    )
+    messages = [{"role": "user", "content": "hello"}]
+
+    async def main():
+        async with transport:
+            responses = await asyncio.gather(
+                *(transport.chat_completion("gpt-test", messages) for _ in range(6))
+            )
+            client = transport.client
+        return responses, client
+
+    responses, client = asyncio.run(main())
+
+    assert [r.choices[0].message.content for r in responses] == ["ok"] * 6
+    assert fake_openai.max_in_flight == 3
+    assert client.is_closed()
+    assert len(transport._clients) == 0
@@ -0,0 +1,142 @@
+import asyncio
+import time
+
+import pytest
+
+from evolving_ideas.infra.llm_interface import LLMInterface
+from evolving_ideas.infra.replay_llm_client import ReplayLLM, ReplayMissError
+from evolving_ideas.infra.responder import LLMResponder
+from evolving_ideas.infra.response_cache import ResponseCache
+from evolving_ideas.infra.usage import UsageTracker, measure_usage, report_usage
+from evolving_ideas.settings import settings
+
+
+class _EchoLLM(LLMInterface):
+    """
+    Answers by echoing the prompt, reporting usage like an API would.
+    """
+
+    generation_params = {"temperature": 0.7}
+
+    def __init__(self):
+        self.calls = 0
+
+    def ask(self, prompt, context="You are a helpful assistant.", params=None):
+        self.calls += 1
+        report_usage(10, 4)
+        return f"echo: {prompt}"
+
+    def chat(self, chatlog, params=None):
+        return self.ask(chatlog[-1]["content"])
+
+
+class _BatchLLM(_EchoLLM):
+    """
+    Answers a batch in one call, reporting the usage of the whole batch.
+    """
+
+    supports_batching = True
+
+    def ask_many(self, prompts, contexts, params=None):
+        self.calls += 1
+        report_usage(31, 9)
+        return [f"echo: {prompt}" for prompt in prompts]
+
+
+def _record(path):
+    recorder = ReplayLLM(path=str(path), mode="record", llm=_EchoLLM())
+    with measure_usage() as reported:
+        assert recorder.ask("first idea") == "echo: first idea"
+    assert reported == {"prompt_tokens": 10, "completion_tokens": 4}
+    assert "".join(recorder.stream("second idea", params={"max_tokens": 8})) == (
+        "echo: second idea"
+    )
+    assert recorder.ask_many(["a", "b"], ["ctx", "ctx"]) == ["echo: a", "echo: b"]
+    assert recorder.llm.calls == 4
+
+
+def test_replays_recorded_responses(tmp_path):
+    path = tmp_path / "replay.jsonl"
+    _record(path)
+
+    replay = ReplayLLM(path=str(path), latency=0, tokens_per_second=None)
+    assert len(replay) == 4
+    with measure_usage() as reported:
+        assert replay.ask("first idea") == "echo: first idea"
+    assert reported == {"prompt_tokens": 10, "completion_tokens": 4}
+    assert list(replay.stream("second idea", params={"max_tokens": 8})) == [
+        "echo: ",
+        "second ",
+        "idea",
+    ]
+    assert replay.ask_many(["b", "a"], ["ctx", "ctx"]) == ["echo: b", "echo: a"]
+    assert asyncio.run(replay.aask("first idea")) == "echo: first idea"
+
+    # Parameters are part of the request.
+    with pytest.raises(ReplayMissError):
+        replay.ask("second idea")
+
+
+def test_synthetic_latency_and_responses(tmp_path):
+    replay = ReplayLLM(
+        path=str(tmp_path / "replay.jsonl"),
+        latency=0.05,
+        tokens_per_second=1000,
+        strict=False,
+    )
+    started = time.perf_counter()
+    response = replay.ask("unrecorded", params={"max_tokens": 100})
+    # 50 ms before the first token, then 100 tokens at 1000 tokens/s.
+    assert time.perf_counter() - started >= 0.15
+    assert len(response.split()) == 100
+    assert replay.ask("unrecorded", params={"max_tokens": 100}) == response
+
+    async def concurrently():
+        return await asyncio.gather(
+            *(replay.aask(f"prompt {i}", params={"max_tokens": 10}) for i in range(20))
+        )
+
+    started = time.perf_counter()
+    asyncio.run(concurrently())
+    # The calls overlap on the event loop instead of adding up to a second.
+    assert time.perf_counter() - started < 0.5
+
+
+def test_records_the_usage_of_each_prompt_in_a_batch(tmp_path):
+    path = tmp_path / "replay.jsonl"
+    recorder = ReplayLLM(path=str(path), mode="record", llm=_EchoLLM())
+    recorder.ask_many(["a", "b"], ["ctx", "ctx"])
+    batcher = ReplayLLM(path=str(path), mode="record", llm=_BatchLLM())
+    with measure_usage() as reported:
+        batcher.ask_many(["c", "d"], ["ctx", "ctx"])
+    assert reported == {"prompt_tokens": 31, "completion_tokens": 9}
+    assert batcher.llm.calls == 1
+
+    replay = ReplayLLM(path=str(path), latency=0, tokens_per_second=None)
+    usage = []
+    for prompt in "abcd":
+        with measure_usage() as reported:
+            replay.ask(prompt, "ctx")
+        usage.append((reported["prompt_tokens"], reported["completion_tokens"]))
+    # Unbatched prompts are measured one by one; a batch is split evenly.
+    assert usage == [(10, 4), (10, 4), (16, 5), (15, 4)]
+
+
+def test_recorded_calls_are_priced_for_the_backend_recorded_from(
+    tmp_path, fake_openai, monkeypatch
+):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setitem(settings._data["llm"], "backend", "replay")
+    monkeypatch.setitem(settings._data["llm"], "offline", True)
+    monkeypatch.setitem(settings._data["llm"]["openai"], "model", "gpt-4.1-mini")
+    replay = settings._data["llm"]["replay"]
+    monkeypatch.setitem(replay, "path", str(tmp_path / "replay.jsonl"))
+    monkeypatch.setitem(replay, "mode", "record")
+    responder = LLMResponder(cache=ResponseCache(), usage=UsageTracker())
+
+    with responder.usage.session() as session:
+        assert responder.ask("ideas?") == "ok"
+
+    (record,) = session.records
+    assert (record.backend, record.model) == ("openai", "gpt-4.1-mini")
+    assert record.cost == pytest.approx((3 * 0.40 + 1 * 1.60) / 1e6)
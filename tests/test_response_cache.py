@@ -0,0 +1,151 @@
+import pytest
+
+from evolving_ideas.infra import response_cache
+from evolving_ideas.infra.llm_interface import LLMInterface
+from evolving_ideas.infra.responder import LLM_BACKENDS, LLMResponder
+from evolving_ideas.infra.response_cache import ResponseCache, cache_key, is_sampled
+from evolving_ideas.infra.usage import UsageTracker
+from evolving_ideas.settings import settings
+
+
+class CountingLLM(LLMInterface):
+    """
+    Answers with the number of calls made so far.
+    """
+
+    generation_params = {"temperature": 0.7}
+
+    def __init__(self, **kwargs):
+        self.calls = 0
+
+    def ask(self, prompt, context="You are a helpful assistant.", params=None):
+        self.calls += 1
+        return f"answer {self.calls}"
+
+    def chat(self, chatlog, params=None):
+        return self.ask(chatlog[-1]["content"], params=params)
+
+
+class BatchingLLM(CountingLLM):
+    """
+    Answers batches in one call, echoing each prompt.
+    """
+
+    supports_batching = True
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.batches = []
+
+    def ask_many(self, prompts, contexts, params=None):
+        self.batches.append(list(prompts))
+        return [f"answer to {prompt}" for prompt in prompts]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        self.now += 0.001
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache.time, "time", clock)
+    return clock
+
+
+def test_entries_expire_after_their_ttl(tmp_path, clock):
+    cache = ResponseCache(tmp_path / "cache.db", ttl=60)
+    cache.put("key", "response")
+
+    clock.now += 30
+    assert ResponseCache(tmp_path / "cache.db", ttl=60).get("key") == "response"
+    clock.now += 31
+    assert cache.get("key") is None
+    assert ResponseCache(tmp_path / "cache.db", ttl=60).get("key") is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    memory = ResponseCache(memory_size=2)
+    for key in "abc":
+        memory.put(key, key)
+    assert [memory.get(key) for key in "abc"] == [None, "b", "c"]
+
+    disk = ResponseCache(tmp_path / "cache.db", memory_size=0, max_bytes=10)
+    disk.put("first", "12345")
+    disk.put("second", "12345")
+    assert disk.get("first") == "12345"
+    disk.put("third", "12345")
+    assert [disk.get(key) for key in ("first", "second", "third")] == [
+        "12345",
+        None,
+        "12345",
+    ]
+
+
+def test_keys_depend_on_every_request_field():
+    messages = [{"role": "user", "content": "hi"}]
+    key = cache_key("openai", "gpt-4.1", messages, {"temperature": 0})
+    assert key == cache_key("openai", "gpt-4.1", list(messages), {"temperature": 0})
+    assert key != cache_key("local", "gpt-4.1", messages, {"temperature": 0})
+    assert key != cache_key("openai", "gpt-4.1", messages, {"temperature": 0.2})
+    assert is_sampled({}) and is_sampled({"do_sample": True})
+    assert not is_sampled({"temperature": 0.7, "sample": False})
+
+
+@pytest.fixture
+def responder(monkeypatch):
+    monkeypatch.setitem(LLM_BACKENDS, "counting", f"{__name__}:CountingLLM")
+    monkeypatch.setitem(settings._data["llm"], "backend", "counting")
+    return LLMResponder(cache=ResponseCache(), usage=UsageTracker())
+
+
+def test_sampled_generations_bypass_the_cache(responder):
+    assert responder.ask("idea?") == "answer 1"
+    assert responder.ask("idea?") == "answer 2"
+
+    greedy = {"sample": False}
+    assert responder.ask("idea?", params=greedy) == "answer 3"
+    assert responder.ask("idea?", params=greedy) == "answer 3"
+    assert responder.ask("idea?", params=greedy, cache=False) == "answer 4"
+
+    assert responder.ask("other?", cache=True) == "answer 5"
+    assert responder.ask("other?", cache=True) == "answer 5"
+
+
+def test_changing_the_openai_model_misses_the_cache(fake_openai, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setitem(settings._data["llm"], "backend", "openai")
+    monkeypatch.setitem(settings._data["llm"], "offline", True)
+    monkeypatch.setitem(settings._data["llm"]["openai"], "model", "gpt-4.1")
+    cache = ResponseCache()
+    greedy = {"sample": False}
+
+    responder = LLMResponder(cache=cache, usage=UsageTracker())
+    assert responder.ask("idea?", params=greedy) == "ok"
+    assert responder.ask("idea?", params=greedy) == "ok"
+    assert fake_openai.requests == 1
+
+    monkeypatch.setitem(settings._data["llm"]["openai"], "model", "gpt-4.1-mini")
+    responder = LLMResponder(cache=cache, usage=UsageTracker())
+    assert responder.ask("idea?", params=greedy) == "ok"
+    assert fake_openai.requests == 2
+
+
+def test_batches_only_generate_the_uncached_prompts(monkeypatch):
+    monkeypatch.setitem(LLM_BACKENDS, "batching", f"{__name__}:BatchingLLM")
+    monkeypatch.setitem(settings._data["llm"], "backend", "batching")
+    responder = LLMResponder(cache=ResponseCache(), usage=UsageTracker())
+    greedy = {"sample": False}
+    responder.ask_many(["b", "d"], ["ctx", "ctx"], params=greedy)
+
+    with responder.usage.session() as session:
+        responses = responder.ask_many(["a", "b", "c", "d"], ["ctx"] * 4, params=greedy)
+
+    assert responses == [f"answer to {prompt}" for prompt in "abcd"]
+    assert responder.llm.batches == [["b", "d"], ["a", "c"]]
+    assert [record.cached for record in session.records] == [True, True, False, False]
@@ -0,0 +1,60 @@
+import builtins
+
+from evolving_ideas.strategies.scamper import ScamperMethod
+
+
+class StepResponder:
+    """
+    Answers SCAMPER step prompts with a question naming the step, and logs
+    when each request is made.
+    """
+
+    def __init__(self, supports_batching):
+        self.supports_batching = supports_batching
+        self.events = []
+
+    def _question(self, prompt):
+        step = next(s for s in ScamperMethod.SCAMPER_STEPS if s in prompt)
+        return f"How could we {step.lower()}?"
+
+    def ask(self, prompt, context, template=None, params=None, cache=None):
+        self.events.append(("ask", template))
+        return self._question(prompt)
+
+    def ask_many(self, prompts, contexts, template=None, params=None, cache=None):
+        self.events.append(("ask_many", template, len(prompts)))
+        return [self._question(prompt) for prompt in prompts]
+
+    def stream(self, prompt, context, template=None, params=None):
+        yield "Summary."
+
+
+def _run(responder, monkeypatch):
+    def answer(prompt=""):
+        responder.events.append(("input",))
+        return "An answer"
+
+    monkeypatch.setattr(builtins, "input", answer)
+    return ScamperMethod(responder).run("Designer", "Chairs", "Offices")
+
+
+def test_batching_backends_generate_every_step_question_up_front(monkeypatch):
+    responder = StepResponder(supports_batching=True)
+    result = _run(responder, monkeypatch)
+
+    steps = len(ScamperMethod.SCAMPER_STEPS)
+    assert responder.events[0] == ("ask_many", "scamper_step", steps)
+    assert responder.events[1:] == [("input",)] * steps
+    assert [qa["question"] for qa in result["qna"]] == [
+        f"How could we {step.lower()}?" for step in ScamperMethod.SCAMPER_STEPS
+    ]
+
+
+def test_other_backends_ask_each_step_when_it_comes(monkeypatch):
+    responder = StepResponder(supports_batching=False)
+    batched = _run(StepResponder(supports_batching=True), monkeypatch)
+    result = _run(responder, monkeypatch)
+
+    steps = len(ScamperMethod.SCAMPER_STEPS)
+    assert responder.events == [("ask", "scamper_step"), ("input",)] * steps
+    assert result["qna"] == batched["qna"]
@@ -0,0 +1,76 @@
+import pytest
+
+from evolving_ideas.infra.llm_interface import LLMInterface
+from evolving_ideas.infra.responder import LLM_BACKENDS, LLMResponder
+from evolving_ideas.infra.response_cache import ResponseCache
+from evolving_ideas.infra.usage import UsageTracker, report_usage
+from evolving_ideas.interface.presenters import ChatLogger
+from evolving_ideas.settings import settings
+
+GREEDY = {"sample": False}
+
+
+class ChunkingLLM(LLMInterface):
+    """
+    Streams its answer word by word, reporting usage like an API would.
+    """
+
+    generation_params = {"temperature": 0.7}
+
+    def __init__(self, **kwargs):
+        self.calls = 0
+
+    def ask(self, prompt, context="You are a helpful assistant.", params=None):
+        return "".join(self.stream(prompt, context, params))
+
+    def chat(self, chatlog, params=None):
+        return self.ask(chatlog[-1]["content"], params=params)
+
+    def stream(self, prompt, context="You are a helpful assistant.", params=None):
+        self.calls += 1
+        for word in ["Green ", "roofs ", f"#{self.calls}"]:
+            yield word
+        report_usage(12, 3)
+
+
+@pytest.fixture
+def responder(monkeypatch):
+    monkeypatch.setitem(LLM_BACKENDS, "chunking", f"{__name__}:ChunkingLLM")
+    monkeypatch.setitem(settings._data["llm"], "backend", "chunking")
+    return LLMResponder(cache=ResponseCache(), usage=UsageTracker())
+
+
+def test_streams_chunks_then_serves_them_from_the_cache(responder):
+    with responder.usage.session() as session:
+        assert list(responder.stream("ideas?", params=GREEDY)) == [
+            "Green ",
+            "roofs ",
+            "#1",
+        ]
+        assert list(responder.stream("ideas?", params=GREEDY)) == ["Green roofs #1"]
+
+    first, cached = session.records
+    assert (first.prompt_tokens, first.completion_tokens) == (12, 3)
+    assert not first.cached and cached.cached
+
+
+def test_abandoned_streams_are_not_cached(responder):
+    chunks = responder.stream("ideas?", params=GREEDY)
+    assert next(chunks) == "Green "
+    chunks.close()
+
+    assert "".join(responder.stream("ideas?", params=GREEDY)) == "Green roofs #2"
+
+
+def test_assistant_renders_chunks_as_they_arrive(capsys):
+    rendered = []
+
+    def chunks():
+        for chunk in ["Green ", "roofs"]:
+            yield chunk
+            rendered.append(capsys.readouterr().out)
+
+    assert ChatLogger().assistant(chunks()) == "Green roofs"
+    assert rendered[0].endswith("Green ")
+    assert rendered[1] == "roofs"
+    assert capsys.readouterr().out == "\n"
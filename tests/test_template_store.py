@@ -0,0 +1,55 @@
+from pathlib import Path
+
+import pytest
+import yaml
+
+from evolving_ideas import prompts
+from evolving_ideas.prompts.template_store import PromptTemplateStore
+
+PROMPTS_DIR = Path(prompts.__file__).parent
+PARAMETERS = {"max_tokens", "stop", "sample", "temperature", "return_full_text"}
+
+
+@pytest.fixture
+def load_store(monkeypatch):
+    def load(path):
+        # The store is a singleton; start each test from a fresh one.
+        monkeypatch.setattr(PromptTemplateStore, "_instance", None)
+        monkeypatch.setattr(PromptTemplateStore, "_templates", {})
+        monkeypatch.setattr(PromptTemplateStore, "_generation", {})
+        return PromptTemplateStore(path)
+
+    return load
+
+
+def test_generation_params_are_read_next_to_the_templates(tmp_path, load_store):
+    (tmp_path / "templates.yml").write_text("step: 'Step {n}'\nfree: 'Anything'\n")
+    (tmp_path / "generation.yml").write_text(
+        'step:\n  max_tokens: 64\n  stop: ["\\n"]\n'
+    )
+    store = load_store(tmp_path / "templates.yml")
+
+    assert store.generation_params("step") == {"max_tokens": 64, "stop": ["\n"]}
+    assert store.generation_params("free") == {}
+    assert store.generation_params("missing") == {}
+
+    # Callers get a copy they may change.
+    store.generation_params("step")["max_tokens"] = 1
+    assert store.generation_params("step")["max_tokens"] == 64
+
+
+def test_templates_without_generation_file_use_defaults(tmp_path, load_store):
+    (tmp_path / "templates.yml").write_text("step: 'Step {n}'\n")
+    store = load_store(tmp_path / "templates.yml")
+
+    assert store.get("step") == "Step {n}"
+    assert store.generation_params("step") == {}
+
+
+def test_shipped_parameters_name_known_templates_and_options():
+    templates = yaml.safe_load((PROMPTS_DIR / "templates.yml").read_text())
+    generation = yaml.safe_load((PROMPTS_DIR / "generation.yml").read_text())
+
+    assert set(generation) <= set(templates)
+    for params in generation.values():
+        assert set(params) <= PARAMETERS
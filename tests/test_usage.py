@@ -0,0 +1,83 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from evolving_ideas.infra.responder import LLMResponder
+from evolving_ideas.infra.response_cache import ResponseCache
+from evolving_ideas.infra.usage import UsageTracker, aggregate, load_usage
+from evolving_ideas.settings import settings
+
+
+def test_cost_uses_the_longest_matching_price():
+    tracker = UsageTracker(prices={"custom": {"prompt": 1.0, "completion": 2.0}})
+
+    assert tracker.cost("openai", "gpt-4.1-mini-2025-04-14", 1_000_000, 0) == 0.40
+    assert tracker.cost("openai", "gpt-4.1-2025-04-14", 0, 1_000_000) == 8.00
+    assert tracker.cost("openai", "custom-model", 500_000, 500_000) == 1.5
+    assert tracker.cost("openai", "unknown", 10, 10) is None
+    assert tracker.cost("local", "gpt-4.1", 10, 10) == 0.0
+
+
+def test_sessions_collect_records_from_event_loops_and_worker_threads(tmp_path):
+    tracker = UsageTracker(tmp_path / "usage.jsonl")
+
+    def call(template):
+        tracker.record("openai", "gpt-4.1", template, 100, 10, latency=0.5)
+
+    async def expand():
+        await asyncio.gather(*(asyncio.to_thread(call, "expand") for _ in range(2)))
+
+    with tracker.session("lotus_blossom") as session:
+        call("core")
+        asyncio.run(expand())
+        tracker.record("openai", "gpt-4.1", "core", 100, 10, 0.0, cached=True)
+    tracker.record("openai", "gpt-4.1", "core", 100, 10, latency=0.5)
+
+    summary = session.summary()
+    assert summary["calls"] == 4
+    assert summary["cached_calls"] == 1
+    assert summary["prompt_tokens"] == 400
+    assert summary["cost"] == pytest.approx(3 * (100 * 2.0 + 10 * 8.0) / 1e6)
+    assert summary["by_template"]["expand"]["calls"] == 2
+
+    records = load_usage(tmp_path / "usage.jsonl")
+    assert len(records) == 5
+    assert {r.strategy for r in records[:4]} == {"lotus_blossom"}
+    assert records[4].session is None
+
+
+def test_report_groups_records_and_filters_by_time(tmp_path):
+    path = tmp_path / "usage.jsonl"
+    tracker = UsageTracker(path)
+    tracker.record("openai", "gpt-4.1", "core", 1000, 100, 1.0)
+    tracker.record("openai", "gpt-4.1-mini", "core", 1000, 100, 1.0)
+    tracker.record("local", "tiny-gpt2", "expand", 1000, 100, 1.0)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("not json\n")
+
+    rows = aggregate(load_usage(path), by=["backend"])
+    assert [(row["backend"], row["calls"]) for row in rows] == [
+        ("openai", 2),
+        ("local", 1),
+    ]
+    assert rows[1]["cost"] == 0.0
+    assert load_usage(path, since=datetime(2999, 1, 1)) == []
+    with pytest.raises(ValueError, match="prompt"):
+        aggregate([], by=["prompt"])
+
+
+def test_openai_calls_are_priced_for_the_model_called(fake_openai, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setitem(settings._data["llm"], "backend", "openai")
+    monkeypatch.setitem(settings._data["llm"], "offline", True)
+    monkeypatch.setitem(settings._data["llm"], "model", "sshleifer/tiny-gpt2")
+    monkeypatch.setitem(settings._data["llm"]["openai"], "model", "gpt-4.1-mini")
+    responder = LLMResponder(cache=ResponseCache(), usage=UsageTracker())
+
+    with responder.usage.session() as session:
+        assert responder.ask("ideas?") == "ok"
+
+    (record,) = session.records
+    assert (record.backend, record.model) == ("openai", "gpt-4.1-mini")
+    assert record.cost == pytest.approx((3 * 0.40 + 1 * 1.60) / 1e6)
@@ -0,0 +1,66 @@
+import dataclasses
+
+import pytest
+
+from evolving_ideas.domain.models.idea import QAPair
+from evolving_ideas.domain.repositories.idea_repository import IdeaRepository
+from evolving_ideas.domain.services.versions import LazyVersionMap
+
+
+@pytest.fixture
+def idea_dir(tmp_path):
+    repo = IdeaRepository(tmp_path / "ideas")
+    tree = repo.add(
+        role="Inventor",
+        task="Folding bicycles",
+        qna=[QAPair(question="Why?", answer="Because.")],
+        summary="v1",
+        author="alice",
+        method="classic",
+        method_metadata={},
+    )
+    for number in range(2, 6):
+        tree.add_new_version(
+            dataclasses.replace(
+                tree.current_version(),
+                version=number,
+                parent_id=str(number - 1),
+                summary=f"v{number}",
+            )
+        )
+    return tree.idea_dir
+
+
+def test_versions_are_parsed_on_demand_and_evicted(idea_dir):
+    versions = LazyVersionMap(idea_dir, cache_size=2)
+
+    assert versions.numbers() == [1, 2, 3, 4, 5]
+    assert versions.cached() == []
+
+    assert [versions[n].summary for n in (1, 2, 3)] == ["v1", "v2", "v3"]
+    assert versions.cached() == [2, 3]
+    versions[2]
+    assert versions.cached() == [3, 2]
+    assert [v.summary for v in versions.range(4)] == ["v4", "v5"]
+    assert versions.cached() == [4, 5]
+    with pytest.raises(KeyError):
+        versions[9]
+
+
+def test_pinned_documents_survive_eviction_until_unpinned(idea_dir):
+    versions = LazyVersionMap(idea_dir, cache_size=1)
+    document = {**versions.document(5), "version": 6, "summary": "v6"}
+
+    versions.pin(6, document, depth=1)
+    assert 6 in versions
+    for number in range(1, 6):
+        versions.document(number)
+    versions.clear_cache()
+    assert versions.document(6)["summary"] == "v6"
+    assert versions.depth(6) == 1
+
+    versions.unpin(6)
+    assert versions.document(6)["summary"] == "v6"
+    versions.discard(6)
+    assert 6 not in versions
+    assert versions.numbers() == [1, 2, 3, 4, 5]